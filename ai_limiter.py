@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Concurrency limiter and deadlines for Azure OpenAI calls.
+At most AI_MAX_CONCURRENT completions run at once; callers beyond that wait
+in a queue capped at AI_MAX_QUEUE. Each call has one deadline covering both
+the queue wait and the request itself, so a slow Azure region can never hold
+a /find interaction until its 15-minute token expires - the caller gets
+AIUnavailable instead and answers from the local search.
+
+Configuration (environment):
+    AI_MAX_CONCURRENT   completions in flight at once (default 8)
+    AI_MAX_QUEUE        callers allowed to wait for a slot (default 32, 0 = reject when busy)
+    AI_CALL_TIMEOUT     seconds from queueing to a finished reply (default 20)
+"""
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+class AIUnavailable(Exception):
+    """The AI call was not made or not finished in time; reason is queue_full or timeout"""
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+class AILimiter:
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, timeout: float = 20.0, name: str = "azure_openai"):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.name = name
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.results: Dict[str, int] = {}  # ok / error / timeout / queue_full -> calls
+
+        from bot_metrics import METRICS
+        METRICS.register_collector(self._samples)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AILimiter":
+        return cls(
+            max_concurrent=int(os.getenv("AI_MAX_CONCURRENT", 8)),
+            max_queue=int(os.getenv("AI_MAX_QUEUE", 32)),
+            timeout=float(os.getenv("AI_CALL_TIMEOUT", 20)),
+            **kwargs,
+        )
+
+    def _record(self, result: str):
+        from bot_metrics import METRICS
+        self.results[result] = self.results.get(result, 0) + 1
+        METRICS.inc("gunbot_ai_calls_total", "AI calls by outcome (ok, error, timeout, queue_full)",
+                    {"client": self.name, "result": result})
+
+    async def run(self, factory: Callable[[], Awaitable], timeout: Optional[float] = None):
+        """Await factory() within the concurrency limit and the deadline
+
+        Raises AIUnavailable("queue_full") without waiting when the queue is at
+        its cap, and AIUnavailable("timeout") when the deadline passes while
+        queued or while the call runs (the call is cancelled). Exceptions from
+        factory() propagate unchanged.
+        """
+        from bot_metrics import METRICS
+
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self._record("queue_full")
+            raise AIUnavailable("queue_full", f"{self.queued} AI calls already waiting")
+
+        queued_at = time.monotonic()
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max(0.0, deadline - queued_at))
+        except asyncio.TimeoutError:
+            self._record("timeout")
+            raise AIUnavailable("timeout", "timed out waiting for an AI slot") from None
+        finally:
+            self.queued -= 1
+            METRICS.observe("gunbot_ai_queue_wait_seconds", "Time AI calls waited for a concurrency slot",
+                            time.monotonic() - queued_at, {"client": self.name})
+
+        self.in_flight += 1
+        try:
+            result = await asyncio.wait_for(factory(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._record("timeout")
+            raise AIUnavailable("timeout", "AI reply took longer than the deadline") from None
+        except Exception:
+            self._record("error")
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+        self._record("ok")
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "results": dict(self.results),
+        }
+
+    def _samples(self):
+        labels = {"client": self.name}
+        yield ("gunbot_ai_in_flight", "gauge", "AI calls currently running", labels, self.in_flight)
+        yield ("gunbot_ai_queued", "gauge", "AI calls waiting for a concurrency slot", labels, self.queued)
+        yield ("gunbot_ai_max_concurrent", "gauge", "Configured AI concurrency limit", labels, self.max_concurrent)
@@ -6,6 +6,8 @@ Instead of AI doing the search, AI helps users navigate to the exact data they w
 import json
 import asyncio
 from typing import Dict, List, Optional
+from session_store import SessionStore
+from intent_parser import IntentParser
 
 # Mock Azure OpenAI client (replace with actual implementation)
 class MockAzureOpenAI:
@@ -61,23 +63,18 @@ class ConversationalGunBot:
     def __init__(self):
         self.ai_client = MockAzureOpenAI()
         self.database = load_gun_database()
-        self.user_sessions = {}  # Track conversation state per user
+        self.intent_parser = IntentParser(self.database)
+        self.user_sessions = SessionStore.from_env(factory=self._new_session, name="query_composer")
+    
+    @staticmethod
+    def _new_session() -> Dict:
+        return {"state": "initial", "weapon": None, "mode": None, "range": None, "conversation": []}
     
     async def handle_message(self, user_id: str, message: str) -> str:
         """Handle a user message and return appropriate response"""
         
-        # Initialize or get user session
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {
-                "state": "initial",
-                "weapon": None,
-                "mode": None,
-                "range": None,
-                "conversation": []
-            }
-        
-        session = self.user_sessions[user_id]
-        session["conversation"].append({"role": "user", "content": message})
+        # Get (or start) the user's session; history is trimmed to the token budget
+        session = self.user_sessions.add_message(user_id, "user", message)
         
         # Parse the message to extract intent and update session
         await self._update_session_from_message(session, message)
@@ -94,41 +91,27 @@ class ConversationalGunBot:
             if result:
                 response = self._format_weapon_result(result)
                 # Reset session for next query
-                self.user_sessions[user_id] = {"state": "initial", "weapon": None, "mode": None, "range": None, "conversation": []}
+                self.user_sessions.reset(user_id)
                 return response
             else:
                 return f"❌ Sorry, I couldn't find {session['weapon']} in {session['mode']} {session['range']}. Try a different category?"
         
         # Otherwise, use AI to ask for missing information
         ai_response = await self.ai_client.chat_completion(session["conversation"], user_id)
-        session["conversation"].append({"role": "assistant", "content": ai_response})
+        self.user_sessions.add_message(user_id, "assistant", ai_response)
         
         return ai_response
     
     async def _update_session_from_message(self, session: Dict, message: str) -> None:
-        """Extract weapon, mode, and range from user message"""
-        message_lower = message.lower()
-        
-        # Extract weapon name
-        weapon_keywords = ["c9", "ak", "kar", "hdr", "ffar", "lc10", "m4", "krig"]
-        for weapon in weapon_keywords:
-            if weapon in message_lower:
-                session["weapon"] = weapon
-                break
-        
-        # Extract mode
-        if "resurgence" in message_lower:
-            session["mode"] = "Resurgence"
-        elif "verdansk" in message_lower:
-            session["mode"] = "Verdansk"
+        """Extract weapon, mode, and range from user message using the database vocabulary"""
+        parsed = self.intent_parser.parse(message)
         
-        # Extract range
-        if "long" in message_lower and "range" in message_lower:
-            session["range"] = "Long Range"
-        elif "close" in message_lower and "range" in message_lower:
-            session["range"] = "Close Range"
-        elif "sniper" in message_lower:
-            session["range"] = "Sniper"
+        if len(parsed.weapon_ids) == 1:
+            session["weapon"] = self.intent_parser.weapons[parsed.weapon_ids[0]]
+        if parsed.mode:
+            session["mode"] = parsed.mode
+        if parsed.range:
+            session["range"] = parsed.range
     
     def _format_weapon_result(self, weapon_data: Dict) -> str:
         """Format weapon data for Discord response"""
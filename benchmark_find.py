@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+End-to-end /find benchmark against the local stub LLM.
+Starts stub_llm_server on the benchmark's loop, points discord_ai_bot's
+AsyncAzureOpenAI client at it and drives concurrent multi-turn /find
+conversations through the real command handler with fake interactions.
+Reports per-turn and per-conversation latency, throughput, and how much of
+the time went to the LLM versus local parsing and search.
+
+Usage:
+    python benchmark_find.py --conversations 500 --concurrency 100 --llm-latency 0.3
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List
+
+from load_simulator import FakeInteraction
+from bot_metrics import percentile
+from stub_llm_server import StubLLMServer, ScriptedReplies, load_database
+
+def build_conversations(database: Dict, count: int) -> List[List[str]]:
+    """Mix of guided multi-turn chats, fully specified one-liners and vague openers"""
+    from gun_index import clean_gun_name
+    loadouts = [(key.split("_", 1)[0], key.split("_", 1)[1], clean_gun_name(gun["gun"]))
+                for key, guns in database.get("categories", {}).items() if "_" in key for gun in guns]
+    conversations = []
+    for _ in range(count):
+        mode, range_type, weapon = random.choice(loadouts)
+        style = random.choices(["guided", "one-shot", "vague"], weights=[60, 30, 10])[0]
+        if style == "guided":
+            conversations.append([f"show me the {weapon}", mode.lower(), range_type.lower()])
+        elif style == "one-shot":
+            conversations.append([f"{weapon} {mode} {range_type}"])
+        else:
+            conversations.append(["what's good right now?", f"{weapon} please", f"{mode} {range_type}"])
+    return conversations
+
+class StageTimer:
+    """Accumulates wall time spent inside wrapped calls"""
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, stage: str, elapsed: float):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def wrap_async(self, stage: str, fn):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+    def wrap_sync(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+async def run_benchmark(args) -> Dict:
+    database = load_database()
+    if not database:
+        raise SystemExit("❌ all_guns_database.json is required")
+    stub = StubLLMServer(ScriptedReplies(database), latency=args.llm_latency, jitter=args.jitter,
+                         tokens_per_second=args.tokens_per_second)
+    url = await stub.start()
+
+    os.environ["AZURE_OPENAI_KEY"] = "stub"
+    os.environ["AZURE_OPENAI_ENDPOINT"] = url
+    os.environ.setdefault("AI_MAX_CONCURRENT", str(args.concurrency))  # measure the LLM, not the limiter queue
+    if args.no_cache:
+        os.environ["AI_CACHE_MAX"] = "0"
+    import discord_ai_bot
+    gun_bot = discord_ai_bot.gun_bot
+    find = discord_ai_bot.bot.tree.get_command("find").callback
+
+    timer = StageTimer()
+    gun_bot.ai_client.compose_query = timer.wrap_async("llm", gun_bot.ai_client.compose_query)
+    gun_bot.search_specific_weapon = timer.wrap_sync("search", gun_bot.search_specific_weapon)
+    gun_bot.intent_parser.resolve = timer.wrap_sync("intent_parse", gun_bot.intent_parser.resolve)
+
+    conversations = build_conversations(database, args.conversations)
+    turn_latencies, first_text_latencies, conversation_latencies = [], [], []
+    resolved, errors = 0, 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def converse(user_id: int, turns: List[str]):
+        nonlocal resolved, errors
+        async with semaphore:
+            started = time.perf_counter()
+            reply = ""
+            for text in turns:
+                interaction = FakeInteraction(user_id, args.discord_latency)
+                turn_started = time.perf_counter()
+                try:
+                    await find(interaction, query=text)
+                except Exception:
+                    errors += 1
+                    return
+                turn_latencies.append(time.perf_counter() - turn_started)
+                if interaction.messages:
+                    first_text_latencies.append(interaction.messages[0].created - turn_started)
+                reply = interaction.messages[-1].content if interaction.messages else ""
+                if "**Rank:**" in (reply or ""):
+                    break
+            conversation_latencies.append(time.perf_counter() - started)
+            if "**Rank:**" in (reply or ""):
+                resolved += 1
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(converse(1_000_000 + i, turns) for i, turns in enumerate(conversations)))
+    wall = time.perf_counter() - wall_started
+    await stub.stop()
+
+    busy = sum(turn_latencies) or 1.0
+    return {
+        "conversations": len(conversations),
+        "concurrency": args.concurrency,
+        "llm_latency_s": args.llm_latency,
+        "turns": len(turn_latencies),
+        "wall_s": wall,
+        "turns_per_s": len(turn_latencies) / wall if wall else 0.0,
+        "turn_p50_ms": percentile(turn_latencies, 50) * 1000,
+        "turn_p99_ms": percentile(turn_latencies, 99) * 1000,
+        "first_text_p50_ms": percentile(first_text_latencies, 50) * 1000,
+        "first_text_p99_ms": percentile(first_text_latencies, 99) * 1000,
+        "conversation_p50_ms": percentile(conversation_latencies, 50) * 1000,
+        "conversation_p99_ms": percentile(conversation_latencies, 99) * 1000,
+        "resolved": resolved,
+        "errors": errors,
+        "llm_requests": stub.requests,
+        "stages": {stage: {"calls": timer.calls[stage], "total_s": seconds, "share_of_turn_time": seconds / busy}
+                   for stage, seconds in timer.seconds.items()},
+        "cache": gun_bot.ai_client.cache.stats(),
+        "fast_path": gun_bot.intent_parser.stats(),
+        "llm_usage": gun_bot.ai_client.usage.summary(),
+        "llm_usage_report": gun_bot.ai_client.usage.report(top=3),
+    }
+
+def print_report(report: Dict):
+    print(f"\n🧪 /find: {report['conversations']} conversations, {report['concurrency']} in flight, "
+          f"stub LLM {report['llm_latency_s'] * 1000:.0f}ms")
+    print(f"   {report['turns']} turns in {report['wall_s']:.2f}s ({report['turns_per_s']:.0f} turns/s), "
+          f"{report['llm_requests']} LLM requests, {report['errors']} errors")
+    print(f"   Turn latency:         p50 {report['turn_p50_ms']:.1f}ms, p99 {report['turn_p99_ms']:.1f}ms")
+    print(f"   First visible text:   p50 {report['first_text_p50_ms']:.1f}ms, p99 {report['first_text_p99_ms']:.1f}ms")
+    print(f"   Conversation latency: p50 {report['conversation_p50_ms']:.1f}ms, p99 {report['conversation_p99_ms']:.1f}ms")
+    print(f"   Resolved to a loadout: {report['resolved']}/{report['conversations']}")
+    for stage, stats in report["stages"].items():
+        print(f"   ⏱️ {stage:<13}{stats['calls']:>7} calls {stats['total_s']:>9.2f}s "
+              f"({stats['share_of_turn_time']:.1%} of handler time)")
+    print(f"   💾 Reply cache hit rate {report['cache']['hit_rate']:.1%}, "
+          f"fast path hit rate {report['fast_path']['hit_rate']:.1%}")
+    print(report["llm_usage_report"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end /find latency benchmark against a stub LLM")
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stub seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="stub streaming rate (0 = instant)")
+    parser.add_argument("--discord-latency", type=float, default=0.0, help="seconds per fake Discord API call")
+    parser.add_argument("--no-cache", action="store_true", help="disable the compose_query reply cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    print("🔍 /find End-to-End Benchmark")
+    print("=" * 50)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
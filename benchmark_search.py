@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the production search path.
+Runs discord_search_bot.search_guns and the gun_index lookups against
+generated databases (generate_database.py) of increasing size, reports p50/p95/p99 latency,
+throughput and memory, and fails when latency regresses past a baseline.
+Classic and BM25 ranking are also compared for relevance (precision@5, MRR)
+on generated name + attachment queries with known answers.
+
+Usage:
+    python benchmark_search.py                       # 1k, 10k, 100k entries
+    python benchmark_search.py --sizes 1000 --update-baseline
+    python benchmark_search.py --threshold 0.5       # allow +50% before failing
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List
+
+from discord_search_bot import search_guns
+from gun_index import GunIndex, clean_gun_name, weapon_id
+from bot_metrics import percentile
+from vector_search import VectorIndex
+from generate_database import generate_database
+
+BASELINE_FILE = "benchmark_baseline.json"
+DEFAULT_SIZES = [1000, 10000, 100000]
+SEARCH_QUERIES = ["ak", "kar", "kar98k", "hdr", "fennec", "unknown", "lc10"]  # plain text: no filter words
+WHERE_QUERIES = ["ak-74", "kar98k", "hdr", "fjx horus", "krig"]
+ATTACHMENT_QUERIES = ["compensator", "extended mag", "kepler", "suppressor"]
+FILTER_QUERIES = ["close range smg", "best ar verdansk", "mode:resurgence slot:optic rank<=3", "sniper kar", "smg"]
+VECTOR_QUERIES = ["horus fjx", "98 kar", "swat 556", "mag extended", "krg c"]  # what lexical matching misses
+
+def time_case(fn: Callable, queries: List[str], min_runs: int, budget_s: float) -> Dict:
+    """Call fn over queries repeatedly, at least min_runs times or until budget_s is spent"""
+    fn(queries[0])  # warm caches outside the measurement
+
+    samples = []
+    started = time.perf_counter_ns()
+    deadline = started + int(budget_s * 1e9)
+    while len(samples) < min_runs or time.perf_counter_ns() < deadline:
+        for query in queries:
+            t0 = time.perf_counter_ns()
+            fn(query)
+            samples.append(time.perf_counter_ns() - t0)
+        if len(samples) >= min_runs and time.perf_counter_ns() >= deadline:
+            break
+    elapsed = sum(samples) / 1e9
+
+    return {
+        "runs": len(samples),
+        "p50_ms": percentile(samples, 50) / 1e6,
+        "p95_ms": percentile(samples, 95) / 1e6,
+        "p99_ms": percentile(samples, 99) / 1e6,
+        "throughput_ops": len(samples) / elapsed if elapsed else 0.0,
+    }
+
+def measure_memory(database: Dict) -> Dict:
+    """Peak traced allocation while building the index for database"""
+    tracemalloc.start()
+    GunIndex(database)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"index_peak_kb": peak / 1024, "database_kb": len(json.dumps(database)) / 1024}
+
+def judged_queries(index: GunIndex, count: int, seed: int) -> List[tuple]:
+    """(query, ids of relevant loadouts): weapon names alone and with one of their attachments, either order"""
+    rng = random.Random(seed)
+    by_weapon: Dict[str, List[Dict]] = {}
+    for gun in index.entries:
+        by_weapon.setdefault(weapon_id(gun["gun"]), []).append(gun)
+    with_attachment: Dict[tuple, set] = {}
+    for (name, slot), positions in index.attachments.items():
+        for position in positions:
+            gun = index.entries[position]
+            with_attachment.setdefault((clean_gun_name(gun["gun"]), name), set()).add(id(gun))
+
+    judged = []
+    pairs = sorted(with_attachment)
+    for _ in range(count):
+        style = rng.choice(["name", "name attachment", "attachment name"])
+        if style == "name":
+            wid = rng.choice(sorted(by_weapon))
+            judged.append((clean_gun_name(by_weapon[wid][0]["gun"]), {id(gun) for gun in by_weapon[wid]}))
+            continue
+        weapon, attachment = rng.choice(pairs)
+        query = f"{weapon} {attachment}" if style == "name attachment" else f"{attachment} {weapon}"
+        judged.append((query.lower(), with_attachment[(weapon, attachment)]))
+    return judged
+
+def relevance(fn: Callable, judged: List[tuple], k: int = 5) -> Dict:
+    """Mean precision@k (over min(k, relevant)), MRR and hit rate of fn(query) against judged answers"""
+    precision, reciprocal, hits = 0.0, 0.0, 0
+    for query, relevant in judged:
+        results = [id(gun) for gun in fn(query)[:k]]
+        found = [position for position, result in enumerate(results) if result in relevant]
+        precision += len(found) / min(k, len(relevant))
+        reciprocal += 1 / (found[0] + 1) if found else 0.0
+        hits += bool(found)
+    count = len(judged) or 1
+    return {"queries": len(judged), "precision_at_k": precision / count, "mrr": reciprocal / count,
+            "hit_rate": hits / count}
+
+def run_size(size: int, min_runs: int, budget_s: float, seed: int, judged_count: int = 30) -> Dict:
+    database = generate_database(size, seed=seed)
+    index = GunIndex(database)  # timed without tracemalloc overhead
+    vectors = VectorIndex(index)
+    memory = measure_memory(database)
+
+    cases = {
+        "search_guns": time_case(lambda q: search_guns(q, max_results=5, database=database, ranking="classic"),
+                                 SEARCH_QUERIES, min_runs, budget_s),
+        "search_guns_bm25": time_case(lambda q: search_guns(q, max_results=5, database=database, ranking="bm25"),
+                                      SEARCH_QUERIES, min_runs, budget_s),
+        "index_where": time_case(index.where, WHERE_QUERIES, min_runs, budget_s),
+        "index_attachment": time_case(index.resolve_attachment, ATTACHMENT_QUERIES, min_runs, budget_s),
+        "filtered_search": time_case(lambda q: search_guns(q, max_results=5, database=database),
+                                     FILTER_QUERIES, min_runs, budget_s),
+        "vector_search": time_case(lambda q: vectors.search(q, 5), VECTOR_QUERIES, min_runs, budget_s),
+    }
+
+    judged = judged_queries(index, judged_count, seed)
+    ranking_relevance = {
+        ranking: relevance(lambda q: search_guns(q, max_results=5, database=database, ranking=ranking), judged)
+        for ranking in ("classic", "bm25")
+    }
+
+    return {
+        "entries": len(index.entries),
+        "index_build_ms": index.build_time_ms,
+        "vector_build_ms": vectors.build_time_ms,
+        "memory": memory,
+        "cases": cases,
+        "relevance": ranking_relevance,
+    }
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Cases whose p95 grew by more than threshold (fractional) over the baseline"""
+    regressions = []
+    for size, result in results.items():
+        for case, stats in result["cases"].items():
+            previous = baseline.get(size, {}).get("cases", {}).get(case)
+            if not previous:
+                continue
+            limit = previous["p95_ms"] * (1 + threshold)
+            if stats["p95_ms"] > limit:
+                regressions.append(
+                    f"{case} @ {size}: p95 {stats['p95_ms']:.3f}ms > {limit:.3f}ms "
+                    f"(baseline {previous['p95_ms']:.3f}ms +{threshold:.0%})"
+                )
+    return regressions
+
+def missing_from_baseline(results: Dict, baseline: Dict) -> List[str]:
+    """Cases the gate can't check because the baseline has no numbers for them"""
+    return [f"{case} @ {size}" for size, result in results.items() for case in result["cases"]
+            if case not in baseline.get(size, {}).get("cases", {})]
+
+def print_report(results: Dict):
+    for size, result in results.items():
+        memory = result["memory"]
+        print(f"\n📊 {result['entries']} entries")
+        print(f"   Index build: {result['index_build_ms']:.1f}ms (vectors {result.get('vector_build_ms', 0):.1f}ms), "
+              f"peak {memory['index_peak_kb']:.0f} KB, database {memory['database_kb']:.0f} KB")
+        print(f"   {'case':<18}{'runs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+        for case, stats in result["cases"].items():
+            print(f"   {case:<18}{stats['runs']:>7}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                  f"{stats['p99_ms']:>10.3f}{stats['throughput_ops']:>12.0f}")
+        for ranking, stats in result.get("relevance", {}).items():
+            print(f"   🎯 {ranking:<8} precision@5 {stats['precision_at_k']:.2f}, MRR {stats['mrr']:.2f}, "
+                  f"hit rate {stats['hit_rate']:.0%} ({stats['queries']} judged queries)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the gun search path")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--min-runs", type=int, default=20, help="minimum timed calls per case")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds to spend per case")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic database seed")
+    parser.add_argument("--judged", type=int, default=30, help="relevance queries per size")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed fractional p95 regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="write full results to this file")
+    args = parser.parse_args(argv)
+
+    print("⚡ Search Benchmark Suite")
+    print("=" * 50)
+
+    results = {str(size): run_size(size, args.min_runs, args.budget, args.seed, args.judged) for size in args.sizes}
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n💡 No baseline at {args.baseline} - run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    missing = missing_from_baseline(results, baseline)
+    if missing:
+        print(f"\n⚠️ Not in the baseline, so not gated (re-run with --update-baseline): {', '.join(missing)}")
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print("\n❌ Latency regressions:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+
+    print(f"\n✅ No regressions beyond +{args.threshold:.0%} of {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
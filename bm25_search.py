@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+BM25 ranking over weapon names, attachments and category labels.
+Each loadout is a document with three weighted fields - the weapon name,
+its mode and range, and its attachment names and slots - so a multi-word
+query like "kar98k sniper verdansk" or "c9 compensator" is scored term by
+term instead of as one string. Term statistics and per-posting BM25 impacts
+(idf x saturated term frequency) are precomputed once per database version;
+a query only adds up the impacts of its terms and cuts the top-k with
+argpartition. Query terms also match longer vocabulary terms they prefix
+("kar" -> "kar98k") at a discount.
+
+Selected with search_guns(..., ranking="bm25") or SEARCH_RANKING=bm25.
+"""
+import re
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+
+from gun_index import GunIndex, DerivedIndexCache, clean_gun_name
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 1.5, "attachments": 1.0}
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.7   # a query term that only prefixes a vocabulary term counts this much
+MIN_PREFIX = 2
+
+def terms(text: str) -> List[str]:
+    """Lowercase words plus their letter/digit runs ('ak-74' -> ak, 74; 'kar98k' -> kar98k, kar, 98, k)"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    runs = [run for word in words for run in re.findall(r"[a-z]+|[0-9]+", word) if run != word]
+    return words + runs
+
+class BM25Index:
+    def __init__(self, index: GunIndex):
+        start = time.perf_counter()
+        self.index = index
+        self.version = index.version
+        n = len(index.entries)
+
+        attachments: List[List[str]] = [[] for _ in range(n)]
+        for (name, slot), positions in index.attachments.items():
+            words = terms(f"{name} {slot}")
+            for position in positions:
+                attachments[position].extend(words)
+
+        # Weighted term frequencies per document (BM25F-style field weights)
+        vocabulary: Dict[str, int] = {}
+        doc_terms: List[Dict[int, float]] = []
+        lengths = np.zeros(n, dtype=np.float32)
+        name_cache: Dict[str, List[str]] = {}
+        for position, gun in enumerate(index.entries):
+            name = clean_gun_name(gun["gun"])
+            if name not in name_cache:
+                name_cache[name] = terms(name)
+            fields = (("name", name_cache[name]), ("category", terms(f"{gun['mode']} {gun['range']}")),
+                      ("attachments", attachments[position]))
+            counts: Dict[int, float] = {}
+            for field, words in fields:
+                weight = FIELD_WEIGHTS[field]
+                for word in words:
+                    term = vocabulary.setdefault(word, len(vocabulary))
+                    counts[term] = counts.get(term, 0.0) + weight
+                lengths[position] += weight * len(words)
+            doc_terms.append(counts)
+
+        # Postings as CSR: term -> (documents, impacts)
+        self.vocabulary = vocabulary
+        self.terms_by_length = sorted(vocabulary, key=len)
+        documents = [[] for _ in vocabulary]
+        frequencies = [[] for _ in vocabulary]
+        for position, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                documents[term].append(position)
+                frequencies[term].append(tf)
+        average = float(lengths.mean()) if n else 0.0
+        norms = K1 * (1 - B + B * lengths / average) if average else np.full(n, K1, dtype=np.float32)
+
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        self.doc_ids = np.zeros(sum(len(docs) for docs in documents), dtype=np.int32)
+        self.impacts = np.zeros(len(self.doc_ids), dtype=np.float32)
+        cursor = 0
+        for term in range(len(vocabulary)):
+            docs = np.array(documents[term], dtype=np.int32)
+            tf = np.array(frequencies[term], dtype=np.float32)
+            idf = np.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.doc_ids[cursor:cursor + len(docs)] = docs
+            self.impacts[cursor:cursor + len(docs)] = idf * tf * (K1 + 1) / (tf + norms[docs])
+            cursor += len(docs)
+            self.offsets[term + 1] = cursor
+        self.ranks = np.array([gun.get("rank", 0) for gun in index.entries], dtype=np.int32)
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    def expand(self, word: str) -> List[Tuple[int, float]]:
+        """(term id, weight) for a query word: itself, else the vocabulary terms it prefixes"""
+        if word in self.vocabulary:
+            return [(self.vocabulary[word], 1.0)]
+        if len(word) < MIN_PREFIX:
+            return []
+        return [(self.vocabulary[term], PREFIX_WEIGHT) for term in self.terms_by_length
+                if len(term) > len(word) and term.startswith(word)]
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.index.entries), dtype=np.float32)
+        for word in dict.fromkeys(terms(query)):
+            for term, weight in self.expand(word):
+                start, stop = self.offsets[term], self.offsets[term + 1]
+                scores[self.doc_ids[start:stop]] += weight * self.impacts[start:stop]
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, Dict]]:
+        """[(score, loadout)] best first; ties go to the better-ranked loadout"""
+        n = len(self.index.entries)
+        if n == 0 or limit <= 0:
+            return []
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        order = np.lexsort((matched, self.ranks[matched], -scores[matched]))
+        return [(float(scores[position]), self.index.entries[position]) for position in matched[order]]
+
+_bm25_cache = DerivedIndexCache("bm25_index", BM25Index)
+bm25_stats = _bm25_cache.stats  # read by bot_metrics
+current_bm25_index = _bm25_cache.current
+load_bm25_index = _bm25_cache.load
+bm25_index_for = _bm25_cache.for_database
+
+def main(argv=None):
+    engine = load_bm25_index()
+    print(f"📚 BM25 index: {len(engine.index.entries)} loadouts, {len(engine.vocabulary)} terms, "
+          f"built in {engine.build_time_ms:.1f}ms")
+    for query in (argv if argv is not None else sys.argv[1:]) or ["kar98k sniper verdansk", "c9 compensator", "ak"]:
+        print(f"\n🔍 {query}")
+        for score, gun in engine.search(query, 5):
+            print(f"   {score:6.2f}  {clean_gun_name(gun['gun'])} - {gun['mode']} {gun['range']} (#{gun['rank']})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Dedicated executor for blocking work done on behalf of Discord handlers.
+Searches, database loads and JSON parsing run on a bounded thread pool (and
+optionally a process pool for heavy fuzzy scoring) so the gateway heartbeat
+and other guilds' commands never wait on them. Handlers only await.
+
+Configuration (environment):
+    BOT_EXECUTOR_THREADS    worker threads for blocking calls (default 4)
+    BOT_EXECUTOR_PROCESSES  worker processes for CPU-heavy scoring (default 0 = off)
+    BOT_EXECUTOR_TIMEOUT    seconds before an awaited call gives up (default 10)
+"""
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+class BlockingExecutor:
+    def __init__(self, threads: int = 4, processes: int = 0, timeout: float = 10.0):
+        self.timeout = timeout
+        self.thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="gunbot-worker")
+        self.process_pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+        self._lock = threading.Lock()
+        self._queued = 0        # submitted but not yet picked up by a worker
+        self._running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "BlockingExecutor":
+        return cls(
+            threads=int(os.getenv("BOT_EXECUTOR_THREADS", 4)),
+            processes=int(os.getenv("BOT_EXECUTOR_PROCESSES", 0)),
+            timeout=float(os.getenv("BOT_EXECUTOR_TIMEOUT", 10)),
+        )
+
+    def _dequeue(self, ticket: Dict):
+        """Take a call off the queue exactly once, whether a worker starts it or it is cancelled first"""
+        with self._lock:
+            if not ticket["dequeued"]:
+                ticket["dequeued"] = True
+                self._queued -= 1
+
+    def _track(self, ticket: Dict, fn: Callable, *args, **kwargs):
+        """Runs on the worker thread; moves the call from queued to running"""
+        self._dequeue(ticket)
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, cpu: bool = False, **kwargs):
+        """Await fn(*args, **kwargs) on a worker, raising asyncio.TimeoutError after timeout seconds
+
+        cpu=True sends the call to the process pool when one is configured; fn and
+        its arguments must then be picklable.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queued)
+
+        if cpu and self.process_pool is not None:
+            with self._lock:
+                self._queued -= 1  # the process pool keeps its own queue
+            future = loop.run_in_executor(self.process_pool, functools.partial(fn, *args, **kwargs))
+        else:
+            ticket = {"dequeued": False}
+            future = loop.run_in_executor(self.thread_pool, functools.partial(self._track, ticket, fn, *args, **kwargs))
+            # A call that times out or is cancelled while still queued never reaches _track
+            future.add_done_callback(lambda _: self._dequeue(ticket))
+
+        try:
+            result = await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queued,
+                "running": self._running,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "failures": self.failures,
+                "threads": self.thread_pool._max_workers,
+                "processes": self.process_pool._max_workers if self.process_pool else 0,
+            }
+
+    def shutdown(self):
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+_executor: Optional[BlockingExecutor] = None
+
+def get_executor() -> BlockingExecutor:
+    """Process-wide executor shared by both bots"""
+    global _executor
+    if _executor is None:
+        _executor = BlockingExecutor.from_env()
+    return _executor
+
+def shutdown_executor():
+    """Shut the shared executor down; the next get_executor() starts a fresh one"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    """Shorthand for get_executor().run(...)"""
+    return await get_executor().run(fn, *args, **kwargs)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Prometheus-format metrics for the bots.
+Command handlers record into the registry on the bot's loop, and start.py's
+aiohttp server renders it on that same loop. A scrape can't stall behind
+the Discord client: the client only awaits network I/O, blocking search and
+file work runs on the executor, and render() just reads counters and
+module-level stats without awaiting anything. The lock covers executor
+threads recording alongside the loop. Database, index, cache, executor and
+loop-lag numbers are pulled from their modules at scrape time.
+"""
+import math
+import time
+import datetime
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, str, str, Dict[str, str], float]  # name, type, help, labels, value
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile: the smallest sample with at least pct% of samples at or below it"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered), math.ceil(pct / 100 * len(ordered))) - 1)]
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._values: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, List[float]]] = {}  # labels -> bucket counts + [sum, count]
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._meta:
+            self._meta[name] = (kind, help_text)
+
+    def inc(self, name: str, help_text: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            self._declare(name, "histogram", help_text)
+            series = self._histograms.setdefault(name, {})
+            counts = series.setdefault(key, [0.0] * (len(LATENCY_BUCKETS) + 2))
+            for position, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    counts[position] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """collector() is called at scrape time and yields (name, type, help, labels, value)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            meta = dict(self._meta)
+            values = {name: dict(series) for name, series in self._values.items()}
+            histograms = {name: {key: list(counts) for key, counts in series.items()}
+                          for name, series in self._histograms.items()}
+
+        for name, series in values.items():
+            kind, help_text = meta[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(dict(key))} {_format_value(value)}")
+
+        for name, series in histograms.items():
+            _, help_text = meta[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for key, counts in series.items():
+                labels = dict(key)
+                for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), counts[:-2] + [counts[-1]]):
+                    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {_format_value(count)}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(counts[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(counts[-1])}")
+
+        families: Dict[str, List[str]] = {}  # samples of one metric must be contiguous
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                family = families.setdefault(name, [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+                family.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for family in families.values():
+            lines += family
+
+        return "\n".join(lines) + "\n"
+
+METRICS = MetricsRegistry()
+
+def record_command(interaction, status: str = "ok"):
+    """Count a finished slash command and observe its latency since interaction_check"""
+    command = interaction.command.qualified_name if interaction.command else "unknown"
+    METRICS.inc("gunbot_commands_total", "Slash commands handled", {"command": command, "status": status})
+    if status != "ok":
+        METRICS.inc("gunbot_command_errors_total", "Slash commands that raised", {"command": command})
+    started = getattr(interaction, "extras", {}).get("metrics_started")
+    if started is not None:
+        METRICS.observe("gunbot_command_latency_seconds", "Slash command handler latency",
+                        time.perf_counter() - started, {"command": command})
+
+def attach(bot):
+    """Time every slash command on bot and count its completion"""
+    tree = bot.tree
+    original_check = tree.interaction_check
+
+    async def interaction_check(interaction) -> bool:
+        interaction.extras["metrics_started"] = time.perf_counter()
+        return await original_check(interaction)
+
+    async def on_app_command_completion(interaction, command):
+        record_command(interaction)
+
+    tree.interaction_check = interaction_check
+    bot.add_listener(on_app_command_completion)
+
+def _parse_updated(value: str) -> Optional[float]:
+    try:
+        parsed = datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S UTC")
+    except (TypeError, ValueError):
+        return None
+    return parsed.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+def _database_samples() -> Iterable[Sample]:
+    from gun_index import current_index, index_stats, derived_caches
+    from build_similarity import current_similarity, similarity_stats
+    import vector_search, search_query, bm25_search  # register their derived index caches
+
+    caches = [("gun_index", index_stats), ("build_similarity", similarity_stats)]
+    caches += [(name, cache.stats) for name, cache in derived_caches.items()]
+    for cache, stats in caches:
+        lookups = stats["hits"] + stats["misses"]
+        yield ("gunbot_cache_hits_total", "counter", "Cache lookups served without rebuilding", {"cache": cache}, stats["hits"])
+        yield ("gunbot_cache_misses_total", "counter", "Cache lookups that rebuilt", {"cache": cache}, stats["misses"])
+        yield ("gunbot_cache_hit_ratio", "gauge", "Hits / lookups since start", {"cache": cache},
+               stats["hits"] / lookups if lookups else 0.0)
+    yield ("gunbot_index_reloads_total", "counter", "Index rebuilds after the database changed", {}, index_stats["reloads"])
+
+    index = current_index()
+    if index is not None:
+        yield ("gunbot_database_info", "gauge", "Loaded database version", {"version": index.version}, 1)
+        yield ("gunbot_database_entries", "gauge", "Loadouts in the loaded database", {}, len(index.entries))
+        yield ("gunbot_index_build_seconds", "gauge", "Time to build the lookup index", {"index": "gun_index"},
+               index.build_time_ms / 1000)
+        updated = _parse_updated(index.database.get("last_updated"))
+        if updated is not None:
+            yield ("gunbot_database_age_seconds", "gauge", "Seconds since the database was scraped", {},
+                   time.time() - updated)
+
+    engine = current_similarity()
+    if engine is not None:
+        yield ("gunbot_index_build_seconds", "gauge", "Time to build the lookup index", {"index": "build_similarity"},
+               engine.build_time_ms / 1000)
+
+    for name, cache in derived_caches.items():
+        if cache.current() is not None:
+            yield ("gunbot_index_build_seconds", "gauge", "Time to build the lookup index", {"index": name},
+                   cache.current().build_time_ms / 1000)
+
+def _runtime_samples() -> Iterable[Sample]:
+    from bot_executor import get_executor
+    from loop_monitor import get_loop_monitor
+
+    stats = get_executor().stats()
+    yield ("gunbot_executor_queue_depth", "gauge", "Blocking calls waiting for a worker", {}, stats["queue_depth"])
+    yield ("gunbot_executor_running", "gauge", "Blocking calls running on workers", {}, stats["running"])
+    yield ("gunbot_executor_timeouts_total", "counter", "Blocking calls that timed out", {}, stats["timeouts"])
+
+    snapshot = get_loop_monitor().snapshot()
+    for quantile in ("50", "95", "99"):
+        yield ("gunbot_event_loop_lag_seconds", "gauge", "Rolling event-loop scheduling lag",
+               {"quantile": f"0.{quantile}"}, snapshot[f"lag_p{quantile}_ms"] / 1000)
+    yield ("gunbot_event_loop_lag_max_seconds", "gauge", "Worst event-loop lag since start", {}, snapshot["lag_max_ms"] / 1000)
+    yield ("gunbot_slow_callbacks_total", "counter", "Loop steps slower than the monitor threshold", {},
+           snapshot["slow_callbacks"])
+
+METRICS.register_collector(_database_samples)
+METRICS.register_collector(_runtime_samples)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Build-similarity engine for "similar loadouts" recommendations.
+Every loadout becomes a vector over the attachment vocabulary, pairwise
+cosine similarity is computed with NumPy in row blocks, and the top-k
+neighbours of each build are kept so /similar answers from a lookup.
+"""
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from gun_index import GunIndex, load_gun_index, weapon_id, clean_gun_name, ALL_GUNS_STORE
+
+BLOCK_ROWS = 1024  # rows scored per matrix product; bounds memory to BLOCK_ROWS x n floats
+
+SLOT_WEIGHT = 0.5  # shared slot layout counts, but less than a shared attachment
+
+class BuildSimilarity:
+    def __init__(self, index: GunIndex, k: int = 10):
+        start = time.perf_counter()
+        self.index = index
+        self.version = index.version
+        self.k = k
+
+        # Columns: one per (attachment, slot) plus one per slot, so builds made of
+        # weapon-specific parts (e.g. sniper barrels) still match on layout
+        vocabulary = {attachment: column for column, attachment in enumerate(index.attachments)}
+        slots = {slot: len(vocabulary) + column for column, slot in enumerate(index.slot_counts)}
+        n = len(index.entries)
+        self.vectors = np.zeros((n, len(vocabulary) + len(slots)), dtype=np.float32)
+        for attachment, positions in index.attachments.items():
+            self.vectors[positions, vocabulary[attachment]] = 1.0
+            self.vectors[positions, slots[attachment[1]]] = SLOT_WEIGHT
+
+        norms = np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        np.divide(self.vectors, norms, out=self.vectors, where=norms > 0)
+
+        ids = [weapon_id(gun["gun"]) for gun in index.entries]
+        self.weapon_codes = {wid: code for code, wid in enumerate(dict.fromkeys(ids))}
+        self.codes = np.array([self.weapon_codes[wid] for wid in ids], dtype=np.int32)
+        self.neighbours, self.scores = self._top_k_neighbours()
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    def _top_k_neighbours(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine top-k per build, excluding builds of the same weapon"""
+        n = self.vectors.shape[0]
+        k = min(self.k, max(n - 1, 0))
+        neighbours = np.zeros((n, k), dtype=np.int64)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if k == 0:
+            return neighbours, scores
+
+        for start in range(0, n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n)
+            similarity = self.vectors[start:stop] @ self.vectors.T
+            similarity[self.codes[start:stop, None] == self.codes[None, :]] = -1.0
+
+            top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(similarity, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            neighbours[start:stop] = np.take_along_axis(top, order, axis=1)
+            scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+        return neighbours, scores
+
+    def similar_weapons(self, query: str, limit: int = 5) -> List[Dict]:
+        """Weapons whose builds are closest to any build of the queried weapon"""
+        wid = self.index.resolve_weapon(query)
+        if wid is None:
+            return []
+
+        best = {}
+        for position in np.flatnonzero(self.codes == self.weapon_codes[wid]):
+            for neighbour, score in zip(self.neighbours[position], self.scores[position]):
+                if score <= 0:
+                    continue
+                gun = self.index.entries[neighbour]
+                other = self.codes[neighbour]
+                if other not in best or score > best[other]["score"]:
+                    best[other] = {
+                        "score": float(score),
+                        "gun": gun,
+                        "source": self.index.entries[position],
+                    }
+
+        ranked = sorted(best.values(), key=lambda match: (-match["score"], match["gun"]["rank"]))
+        return ranked[:limit]
+
+_similarity_cache = {"version": None, "engine": None}
+similarity_stats = {"hits": 0, "misses": 0}  # read by bot_metrics
+
+def current_similarity() -> Optional[BuildSimilarity]:
+    """The most recently built engine, without rebuilding"""
+    return _similarity_cache["engine"]
+
+def load_build_similarity(path: str = ALL_GUNS_STORE) -> BuildSimilarity:
+    """Return the similarity engine for the current database, rebuilding on version change"""
+    index = load_gun_index(path)
+    if _similarity_cache["version"] != index.version:
+        similarity_stats["misses"] += 1
+        _similarity_cache["engine"] = BuildSimilarity(index)
+        _similarity_cache["version"] = index.version
+    else:
+        similarity_stats["hits"] += 1
+    return _similarity_cache["engine"]
+
+def scaled_database(database: Dict, factor: int) -> Dict:
+    """Repeat every category factor times with renamed weapons to simulate growth"""
+    categories = {}
+    for category_key, guns in database.get("categories", {}).items():
+        scaled = []
+        for copy in range(factor):
+            for gun in guns:
+                clone = dict(gun)
+                clone["gun"] = clean_gun_name(gun["gun"]) + (f" V{copy}" if copy else "")
+                clone["rank"] = len(scaled) + 1
+                scaled.append(clone)
+        categories[category_key] = scaled
+    total = sum(len(guns) for guns in categories.values())
+    return {"last_updated": database.get("last_updated"), "total_guns": total, "categories": categories}
+
+def main():
+    print("🧮 Build Similarity Matrix Timing")
+    print("=" * 50)
+
+    base = load_gun_index().database
+    for factor in (1, 10, 100):
+        index = GunIndex(scaled_database(base, factor))
+        engine = BuildSimilarity(index)
+        print(f"📊 {factor:>3}x: {len(index.entries):>6} builds, "
+              f"{engine.vectors.shape[1]} features -> top-{engine.k} in {engine.build_time_ms:.1f}ms")
+
+    engine = load_build_similarity()
+    print()
+    for query in ("kar98k", "c9", "hdr"):
+        matches = engine.similar_weapons(query)
+        names = ", ".join(f"{clean_gun_name(m['gun']['gun'])} ({m['score']:.2f})" for m in matches)
+        print(f"🔍 Similar to {query}: {names}")
+
+if __name__ == "__main__":
+    main()
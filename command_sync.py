@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Slash-command sync that only talks to Discord when the command schema changed.
+The tree's serialized commands are hashed and compared with the hash stored
+after the last successful sync, so reconnects and restarts of an unchanged
+bot skip tree.sync() (and its rate limit and brief command gaps).
+
+Configuration (environment):
+    COMMAND_SYNC_STATE   file that stores the last synced hashes (default .command_sync.json)
+    COMMAND_SYNC_FORCE   1/true to sync even when the hash matches
+"""
+import os
+import json
+import time
+import hashlib
+from typing import Dict, List
+
+COMMAND_SYNC_STATE = os.getenv("COMMAND_SYNC_STATE", ".command_sync.json")
+
+def command_schema(tree) -> List[Dict]:
+    """The payload tree.sync() would upload, in a stable order"""
+    commands = [command.to_dict(tree) for command in tree.get_commands()]
+    return sorted(commands, key=lambda command: (command.get("type", 1), command["name"]))
+
+def schema_hash(tree) -> str:
+    payload = json.dumps(command_schema(tree), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def _state_key(tree, guild=None) -> str:
+    """One entry per application and scope so both bots can share a state file"""
+    client = getattr(tree, "client", None)
+    application_id = getattr(client, "application_id", None) or "unknown"
+    return f"{application_id}:{guild.id if guild is not None else 'global'}"
+
+def _load_state(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(path: str, state: Dict[str, Dict]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+async def sync_if_changed(tree, guild=None, force: bool = None, state_path: str = None) -> Dict:
+    """Sync tree only when its schema hash differs from the last successful sync
+
+    Returns {"synced", "reason", "hash", "commands", "duration_ms"}. A failed
+    sync raises and leaves the stored hash untouched, so the next call retries.
+    """
+    if force is None:
+        force = os.getenv("COMMAND_SYNC_FORCE", "").lower() in ("1", "true", "yes")
+    state_path = state_path or COMMAND_SYNC_STATE
+
+    started = time.perf_counter()
+    current = schema_hash(tree)
+    key = _state_key(tree, guild)
+    state = _load_state(state_path)
+    previous = state.get(key, {}).get("hash")
+
+    if previous == current and not force:
+        return {"synced": False, "reason": "unchanged", "hash": current,
+                "commands": len(tree.get_commands()),
+                "duration_ms": (time.perf_counter() - started) * 1000}
+
+    synced = await tree.sync(guild=guild)
+    state[key] = {"hash": current, "commands": len(synced),
+                  "synced_at": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())}
+    try:
+        _save_state(state_path, state)
+    except OSError as e:
+        print(f"⚠️ Could not save command sync state: {e}")
+
+    return {"synced": True, "reason": "forced" if force else "changed" if previous else "first sync",
+            "hash": current, "commands": len(synced),
+            "duration_ms": (time.perf_counter() - started) * 1000}
+
+def record_sync(result: Dict):
+    """Log a sync_if_changed() result and export it on /metrics"""
+    from bot_metrics import METRICS
+
+    if result["synced"]:
+        print(f"✅ Synced {result['commands']} commands in {result['duration_ms']:.0f}ms ({result['reason']})")
+    else:
+        print(f"⏭️ Command schema unchanged ({result['hash'][:12]}) - skipped sync")
+    METRICS.inc("gunbot_command_syncs_total", "on_ready command tree sync decisions",
+                {"result": "synced" if result["synced"] else "skipped"})
+    METRICS.set("gunbot_command_sync_seconds", "Duration of the last command sync check",
+                result["duration_ms"] / 1000)
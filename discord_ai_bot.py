@@ -4,31 +4,95 @@ Discord bot with Azure OpenAI query composition integration
 """
 import os
 import json
+import time
 import asyncio
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 from dotenv import load_dotenv
 import discord
 from discord.ext import commands
 from openai import AsyncAzureOpenAI
+from bot_executor import run_blocking
+from loop_monitor import get_loop_monitor
+import bot_metrics
+from command_sync import sync_if_changed, record_sync
+from single_flight import coalesce
+from session_store import SessionStore, flush_sessions
+from intent_parser import IntentParser
+from response_cache import ResponseCache
+from ai_limiter import AILimiter, AIUnavailable
+from llm_usage import UsageLedger, prompt_components, count_tokens
 
 load_dotenv()
 
+SEARCH_READY = "SEARCH_READY:"
+STREAM_REPLIES = os.getenv("AI_STREAM_REPLIES", "true").lower() in ("1", "true", "yes")
+EDIT_INTERVAL = float(os.getenv("AI_STREAM_EDIT_INTERVAL", 1.0))  # seconds between message edits
+DISCORD_MESSAGE_LIMIT = 2000
+
+def visible_text(reply: str) -> str:
+    """The part of a reply shown to users (everything before SEARCH_READY:, even a half-streamed one)"""
+    text = reply.split(SEARCH_READY, 1)[0]
+    for size in range(len(SEARCH_READY) - 1, 0, -1):
+        if text.endswith(SEARCH_READY[:size]):
+            text = text[:-size]
+            break
+    return text.strip()
+
+def search_ready_complete(reply: str) -> bool:
+    """True once the SEARCH_READY parameters line has been fully received"""
+    if SEARCH_READY not in reply:
+        return False
+    return "\n" in reply.split(SEARCH_READY, 1)[1].lstrip()
+
+def split_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """Split text into Discord-sized pages, preferring line breaks"""
+    pages = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        pages.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not pages:
+        pages.append(text)
+    return pages
+
 class AzureGunBotAI:
     def __init__(self):
+        self.limiter = AILimiter.from_env()  # Bounded concurrency, one deadline per call
         self.client = AsyncAzureOpenAI(
             api_key=os.getenv("AZURE_OPENAI_KEY"),
             api_version="2024-02-01",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            timeout=self.limiter.timeout
         )
+        self.cache = ResponseCache.from_env()
+        self.usage = UsageLedger.from_env()  # Tokens/latency per call, user and hour
         
-    async def compose_query(self, conversation_history: List[Dict], available_categories: Dict) -> str:
-        """Use Azure OpenAI to help compose search queries"""
+    async def compose_query(self, conversation_history: List[Dict], available_categories: Dict,
+                            on_text: Optional[Callable[[str], Awaitable]] = None,
+                            user_id: Optional[str] = None) -> str:
+        """Use Azure OpenAI to help compose search queries
+
+        With on_text, the completion is streamed and on_text(visible text so far)
+        is awaited as it grows; the stream is closed as soon as a complete
+        SEARCH_READY line arrives so the local search can start right away.
+        Raises AIUnavailable when the limiter's queue is full or the deadline
+        passes, so the caller can answer locally instead. Every call made is
+        recorded in self.usage under user_id.
+        """
         
+        cache_key = self.cache.key(conversation_history, available_categories)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        categories_json = json.dumps(available_categories, indent=2)
         system_prompt = f"""
 You are a helpful Warzone weapon expert. Help users find specific weapon loadouts by asking clarifying questions.
 
 Available categories:
-{json.dumps(available_categories, indent=2)}
+{categories_json}
 
 When a user mentions a weapon, check if you need more information:
 1. Which game mode? (Resurgence or Verdansk)
@@ -40,24 +104,89 @@ Once you have both mode and range category, respond with:
 Be conversational and helpful. Use emojis and make it engaging.
 """
         
-        try:
+        components = prompt_components(system_prompt, categories_json, conversation_history)
+        call = {"model": "gpt-4", "usage": None, "reply": ""}
+        
+        async def complete() -> str:
+            call["started"] = time.perf_counter()  # after the limiter queue
             response = await self.client.chat.completions.create(
                 model="gpt-4",  # or gpt-35-turbo for lower cost
                 messages=[{"role": "system", "content": system_prompt}] + conversation_history,
                 max_tokens=200,
-                temperature=0.3
+                temperature=0.3,
+                stream=on_text is not None
             )
-            
-            return response.choices[0].message.content
-            
+            if on_text is None:
+                call["model"] = response.model or call["model"]
+                call["usage"] = response.usage
+                return response.choices[0].message.content
+            call["streaming"] = True  # accepted: the prompt is billed even if the stream breaks
+            return await self._consume_stream(response, on_text, call)
+        
+        try:
+            started = time.perf_counter()
+            reply = await self.limiter.run(complete)
+        except AIUnavailable:
+            if "started" in call:  # the request was sent, then the deadline passed
+                self._account(user_id, "timeout", call, components, "")
+                await self.usage.persist()
+            raise
         except Exception as e:
+            self._account(user_id, "error", call, components, "")
+            await self.usage.persist()
+            # Never cached, so the next identical question retries the model
             return f"Sorry, I'm having trouble right now. Try using the regular `/search` command! Error: {e}"
+        
+        self._account(user_id, "search_ready" if SEARCH_READY in reply else "continue", call, components, reply)
+        await self.usage.persist()
+        self.cache.put(cache_key, reply, time.perf_counter() - started)
+        return reply
+    
+    def _account(self, user_id: Optional[str], outcome: str, call: Dict, components: Dict[str, int], reply: str):
+        """Record a call's tokens: the API's usage block, else an estimate (streams carry none)
+
+        A request that failed before the API accepted it isn't billed and is
+        recorded as 0 tokens; one that timed out or broke mid-stream is
+        estimated from the prompt and whatever text had arrived.
+        """
+        usage = call["usage"]
+        if usage is not None:
+            prompt_tokens, completion_tokens, estimated = usage.prompt_tokens, usage.completion_tokens, False
+        elif outcome == "error" and not call.get("streaming"):
+            prompt_tokens, completion_tokens, estimated = 0, 0, False
+        else:
+            prompt_tokens, completion_tokens = sum(components.values()), count_tokens(reply or call["reply"])
+            estimated = True
+        latency = time.perf_counter() - call.get("started", time.perf_counter())
+        self.usage.record(user_id, call["model"], outcome, prompt_tokens, completion_tokens, latency,
+                          components, estimated)
+    
+    async def _consume_stream(self, stream, on_text: Callable[[str], Awaitable], call: Dict) -> str:
+        reply = ""
+        shown = ""
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                reply += chunk.choices[0].delta.content
+                call["reply"] = reply  # accounted if the stream breaks or times out
+                if search_ready_complete(reply):
+                    break  # parameters are complete; skip whatever the model says after them
+                text = visible_text(reply)
+                if text and text != shown:
+                    shown = text
+                    await on_text(text)
+        finally:
+            await stream.close()
+        return reply
 
 class ConversationalGunBot:
     def __init__(self):
         self.ai_client = AzureGunBotAI()
         self.database = self.load_gun_database()
-        self.user_sessions = {}  # Track conversations per user
+        self.user_sessions = SessionStore.from_env(name="ai_bot")  # Bounded, TTL-evicting conversations
+        self.intent_parser = IntentParser(self.database)  # Local fast path for fully specified queries
+        bot_metrics.METRICS.register_collector(self.intent_parser.samples)
         
     def load_gun_database(self):
         """Load the gun database"""
@@ -78,32 +207,43 @@ class ConversationalGunBot:
             categories[mode].append(range_type)
         return categories
     
-    async def handle_conversation(self, user_id: str, message: str) -> str:
-        """Handle conversational search with AI"""
+    async def handle_conversation(self, user_id: str, message: str,
+                                  on_text: Optional[Callable[[str], Awaitable]] = None) -> str:
+        """Handle conversational search with AI; on_text receives streamed reply text"""
         
-        # Initialize user session
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {"conversation": []}
+        # Fully specified query ("c9 verdansk close range"): answer locally, no LLM call
+        intent = self.intent_parser.resolve(message)
+        if intent is not None:
+            self.user_sessions.reset(user_id)
+            await self.user_sessions.persist()
+            return self.format_weapon_result(intent.loadout)
         
-        session = self.user_sessions[user_id]
-        session["conversation"].append({"role": "user", "content": message})
+        # Get (or start) the user's session; history is trimmed to the token budget
+        session = self.user_sessions.add_message(user_id, "user", message)
         
         # Get AI response
         categories = self.get_available_categories()
-        ai_response = await self.ai_client.compose_query(session["conversation"], categories)
+        try:
+            ai_response = await self.ai_client.compose_query(session["conversation"], categories, on_text=on_text,
+                                                          user_id=user_id)
+        except AIUnavailable as e:
+            return await self.local_fallback(session["conversation"], e.reason)
         
         # Check if AI is ready to search
-        if "SEARCH_READY:" in ai_response:
+        if SEARCH_READY in ai_response:
             # Extract search parameters
-            search_params = ai_response.split("SEARCH_READY:")[1].strip()
+            search_params = ai_response.split(SEARCH_READY)[1].strip().splitlines()[0].strip()
             try:
                 mode, range_type, weapon = search_params.split("_", 2)
                 
                 # Perform the actual search
-                result = self.search_specific_weapon(weapon, mode, range_type)
+                result = await coalesce("find", (weapon.lower(), mode, range_type),
+                                        lambda: run_blocking(self.search_specific_weapon, weapon, mode, range_type),
+                                        version=id(self.database))  # reads the in-memory copy, not the file
                 
                 # Clear conversation for next search
-                self.user_sessions[user_id] = {"conversation": []}
+                self.user_sessions.reset(user_id)
+                await self.user_sessions.persist()
                 
                 if result:
                     return self.format_weapon_result(result)
@@ -115,9 +255,41 @@ class ConversationalGunBot:
         
         else:
             # Continue conversation
-            session["conversation"].append({"role": "assistant", "content": ai_response})
+            self.user_sessions.add_message(user_id, "assistant", ai_response)
+            await self.user_sessions.persist()
             return ai_response
     
+    async def local_fallback(self, conversation: List[Dict], reason: str) -> str:
+        """Answer from the plain name search when the AI is busy or too slow"""
+        from discord_search_bot import search_guns
+        bot_metrics.METRICS.inc("gunbot_ai_fallbacks_total", "/find turns answered by local search instead of the AI",
+                                {"reason": reason})
+        print(f"⚠️ AI unavailable ({reason}) - answering /find from local search")
+        
+        # Prefer the weapon named anywhere in the conversation over the latest message alone
+        user_text = " ".join(m["content"] for m in conversation if m["role"] == "user")
+        parsed = self.intent_parser.parse(user_text)
+        if len(parsed.weapon_ids) == 1:
+            query = self.intent_parser.weapons[parsed.weapon_ids[0]]
+        else:
+            query = conversation[-1]["content"]
+        
+        results = await coalesce("search", (query.lower(), 5),
+                                 lambda: run_blocking(search_guns, query, 5, cpu=True))
+        if parsed.mode or parsed.range:
+            results = [gun for gun in results
+                       if (parsed.mode is None or gun["mode"] == parsed.mode)
+                       and (parsed.range is None or gun["range"] == parsed.range)] or results
+        
+        notice = "⏳ The AI assistant is busy right now, so here's a quick search instead."
+        if not results:
+            return f"{notice}\n🚫 No weapons found matching **{query}** - try `/search` with a weapon name."
+        if len(results) == 1:
+            return f"{notice}\n\n{self.format_weapon_result(results[0])}"
+        lines = [f"**{i}.** {gun['gun']} - {gun['mode']} {gun['range']} (Rank #{gun['rank']})"
+                 for i, gun in enumerate(results, 1)]
+        return f"{notice}\n\n" + "\n".join(lines) + "\n\n💡 Add a mode and range (e.g. `verdansk close range`) to narrow it down"
+    
     def search_specific_weapon(self, weapon_name: str, mode: str, range_type: str) -> Optional[Dict]:
         """Search for a weapon in a specific category"""
         category_key = f"{mode}_{range_type}"
@@ -158,7 +330,16 @@ class ConversationalGunBot:
 # Discord Bot Setup
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
+class AIGunBot(commands.Bot):
+    async def close(self):
+        """Save AI sessions before disconnecting so a restart doesn't lose them"""
+        await flush_sessions()
+        await super().close()
+
+bot = AIGunBot(command_prefix='!', intents=intents)
+loop_monitor = get_loop_monitor()
+loop_monitor.attach(bot.tree)
+bot_metrics.attach(bot)
 
 # Initialize conversational bot
 gun_bot = ConversationalGunBot()
@@ -166,30 +347,92 @@ gun_bot = ConversationalGunBot()
 @bot.event
 async def on_ready():
     print(f"🤖 AI Gun Bot logged in as {bot.user}")
+    loop_monitor.start()
     try:
-        synced = await bot.tree.sync()
-        print(f"✅ Synced {len(synced)} slash commands")
+        bot.command_sync = await sync_if_changed(bot.tree)
+        record_sync(bot.command_sync)
     except Exception as e:
         print(f"❌ Failed to sync commands: {e}")
 
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+    original = getattr(error, "original", error)
+    bot_metrics.record_command(interaction, "timeout" if isinstance(original, asyncio.TimeoutError) else "error")
+    print(f"❌ Command error: {original}")
+    message = "❌ Something went wrong. Try using `/search` for basic search."
+    if interaction.response.is_done():
+        await interaction.followup.send(message)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
+class ProgressiveReply:
+    """A followup message that is edited as streamed text arrives, at most once per EDIT_INTERVAL"""
+    def __init__(self, interaction: discord.Interaction, interval: float = EDIT_INTERVAL):
+        self.interaction = interaction
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.message = None
+        self.text = ""
+        self.shown = ""          # text Discord has confirmed
+        self.last_edit = 0.0
+        self._editing = False
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def update(self, text: str):
+        """Called with the full visible text so far; never blocks on a Discord edit"""
+        self.text = text[:DISCORD_MESSAGE_LIMIT]
+        if self.message is None:
+            text = self.text
+            self.message = await self.interaction.followup.send(text, wait=True)
+            self.shown = text
+            self.last_edit = time.perf_counter()
+            bot_metrics.METRICS.observe("gunbot_llm_first_text_seconds", "Time from /find to the first visible reply text",
+                                        self.last_edit - self.started)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+    
+    async def _flush(self):
+        await asyncio.sleep(max(0.0, self.last_edit + self.interval - time.perf_counter()))
+        if self.text != self.shown:
+            text = self.text
+            self.last_edit = time.perf_counter()
+            self._editing = True
+            try:
+                await self.message.edit(content=text)
+                self.shown = text
+            finally:
+                self._editing = False
+    
+    async def finish(self, response: str):
+        """Replace the streamed text with the final response, paging anything over 2000 characters"""
+        if self._flush_task is not None and not self._flush_task.done():
+            if self._editing:
+                # Let the in-flight edit land so we know what Discord is showing
+                await asyncio.gather(self._flush_task, return_exceptions=True)
+            else:
+                self._flush_task.cancel()
+        pages = split_message(response)
+        if self.message is None:
+            await self.interaction.followup.send(pages[0])
+        elif pages[0] != self.shown:
+            await self.message.edit(content=pages[0])
+        for page in pages[1:]:
+            await self.interaction.followup.send(page)
+
 @bot.tree.command(name="find", description="Find a weapon with AI assistance")
 async def find_weapon(interaction: discord.Interaction, query: str):
     """AI-powered conversational weapon search"""
     await interaction.response.defer()
     
+    reply = ProgressiveReply(interaction)
     try:
         user_id = str(interaction.user.id)
-        response = await gun_bot.handle_conversation(user_id, query)
-        
-        # Split long responses for Discord's character limit
-        if len(response) > 2000:
-            await interaction.followup.send(response[:2000])
-            await interaction.followup.send(response[2000:])
-        else:
-            await interaction.followup.send(response)
+        response = await gun_bot.handle_conversation(user_id, query,
+                                                     on_text=reply.update if STREAM_REPLIES else None)
+        await reply.finish(response)
             
     except Exception as e:
-        await interaction.followup.send(f"❌ Error: {e}\nTry using `/search` for basic search.")
+        await reply.finish(f"❌ Error: {e}\nTry using `/search` for basic search.")
 
 @bot.tree.command(name="search", description="Quick weapon search (original functionality)")  
 async def search_weapon(interaction: discord.Interaction, weapon_name: str):
@@ -204,7 +447,8 @@ async def search_weapon(interaction: discord.Interaction, weapon_name: str):
     for guns in database.get("categories", {}).values():
         all_guns.extend(guns)
     
-    results = search_guns(weapon_name, max_results=5)
+    results = await coalesce("search", (weapon_name.lower(), 5),
+                             lambda: run_blocking(search_guns, weapon_name, 5, cpu=True))
     
     if not results:
         await interaction.followup.send(f"🚫 No weapons found matching **{weapon_name}**")
@@ -6,18 +6,32 @@ from difflib import SequenceMatcher
 from dotenv import load_dotenv
 import discord
 from discord.ext import commands
+from gun_index import load_gun_index, clean_gun_name, weapon_id
+from build_similarity import load_build_similarity, current_similarity
+from vector_search import load_vector_index, vector_index_for
+from search_query import load_filter_index, filter_index_for
+from bm25_search import load_bm25_index, bm25_index_for
+from bot_executor import run_blocking, get_executor
+from loop_monitor import get_loop_monitor
+import bot_metrics
+from command_sync import sync_if_changed, record_sync
+from single_flight import coalesce
 
 # === Load Environment ===
 load_dotenv()
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_SEARCH_BOT_TOKEN")
 DISCORD_CHANNEL_ID = os.getenv("DISCORD_CHANNEL_ID")  # Add channel ID from environment
 ALL_GUNS_STORE = "all_guns_database.json"
+SEARCH_RANKING = os.getenv("SEARCH_RANKING", "classic").lower()  # classic (name match) or bm25
 
 # === Bot Setup ===
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True  # Enable guild (server) intents
 bot = commands.Bot(command_prefix="!", intents=intents)
+loop_monitor = get_loop_monitor()
+loop_monitor.attach(bot.tree)
+bot_metrics.attach(bot)
 
 def load_all_guns_database():
     """Load the comprehensive guns database"""
@@ -37,9 +51,32 @@ def similarity(a, b):
     """Calculate similarity between two strings"""
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-def search_guns(query, max_results=10):
-    """Search for guns by name with fuzzy matching"""
-    database = load_all_guns_database()
+def search_guns(query, max_results=10, database=None, ranking=None):
+    """Search for guns by name with fuzzy matching
+
+    Queries with filters ("close range smg", "mode:verdansk slot:optic rank<=3")
+    run as a posting-list plan (search_query.py). Other queries are ranked by
+    ranking (default SEARCH_RANKING): "classic" matches the query against the
+    weapon name as one string, "bm25" scores its words over names, categories
+    and attachments (bm25_search.py). When neither finds anything, the hashed
+    n-gram vector index answers instead (reordered, split or misspelled words).
+    """
+    from_disk = database is None
+    filters = load_filter_index(ALL_GUNS_STORE) if from_disk else filter_index_for(database)
+    structured = filters.search(query, max_results)
+    if structured is not None:
+        return structured
+    
+    if (ranking or SEARCH_RANKING) == "bm25":
+        engine = load_bm25_index(ALL_GUNS_STORE) if from_disk else bm25_index_for(database)
+        ranked = engine.search(query, max_results)
+        if ranked:
+            return [gun for score, gun in ranked]
+        engine = load_vector_index(ALL_GUNS_STORE) if from_disk else vector_index_for(database)
+        return [gun for score, gun in engine.search(query, max_results)]
+    
+    if database is None:
+        database = load_all_guns_database()
     if not database or not database.get("categories"):
         return []
     
@@ -60,10 +97,21 @@ def search_guns(query, max_results=10):
                 score = similarity(query_lower, gun_name) * 0.8
                 results.append((score, gun))
     
+    # Nothing lexical: fall back to the vector index
+    if not results:
+        engine = load_vector_index(ALL_GUNS_STORE) if from_disk else vector_index_for(database)
+        return [gun for score, gun in engine.search(query, max_results)]
+    
     # Sort by score (highest first) and return top results
     results.sort(key=lambda x: x[0], reverse=True)
     return [gun for score, gun in results[:max_results]]
 
+def top_in_category(mode, range_type, limit=10):
+    """(top guns, valid category keys); guns is None when the category doesn't exist"""
+    categories = load_all_guns_database().get("categories", {})
+    guns = categories.get(f"{mode}_{range_type}")
+    return (guns[:limit] if guns is not None else None), list(categories)
+
 def format_gun_embed(gun):
     """Format gun data as a Discord embed"""
     emoji_map = {
@@ -111,19 +159,93 @@ def format_gun_embed(gun):
     embed.set_footer(text=f"🔍 BO6 Meta Gun Database")
     return embed
 
+class GunButton(discord.ui.DynamicItem[discord.ui.Button], template=r"gun:(?P<category>[^:]+):(?P<weapon>[a-z0-9-]+)"):
+    """Search-result button routed by custom_id, so it works for any message, even after a restart"""
+    def __init__(self, category_key: str, wid: str, label: str = "🔍"):
+        super().__init__(discord.ui.Button(
+            label=label,
+            style=discord.ButtonStyle.primary,
+            custom_id=f"gun:{category_key}:{wid}",
+        ))
+        self.category_key = category_key
+        self.wid = wid
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["category"], match["weapon"], item.label)
+
+    async def callback(self, interaction: discord.Interaction):
+        index = await run_blocking(load_gun_index, ALL_GUNS_STORE)
+        gun = index.loadout(self.category_key, self.wid)
+        if gun is None:
+            await interaction.response.send_message(
+                "🚫 That loadout is no longer in the meta - run `/search` again.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=format_gun_embed(gun))
+
+bot.add_dynamic_items(GunButton)
+
+def result_buttons(results):
+    """One GunButton per distinct loadout, labelled with its number in the result list
+
+    Buttons carry category + weapon id, so GunButton routes clicks without
+    per-message state. A repeat of an earlier loadout gets no button, so its
+    number is skipped rather than shifting the labels of the rest.
+    """
+    buttons = []
+    seen = set()
+    for i, gun in enumerate(results, 1):
+        custom_id = (f"{gun['mode']}_{gun['range']}", weapon_id(gun["gun"]))
+        if custom_id in seen:
+            continue
+        seen.add(custom_id)
+        buttons.append(GunButton(*custom_id, label=str(i)))
+    return buttons
+
 @bot.event
 async def on_ready():
     print(f"🤖 Search Bot logged in as {bot.user}")
     print(f"📊 Connected to {len(bot.guilds)} servers")
+    loop_monitor.start()
+    
+    index_ready = getattr(bot, "index_ready", None)  # set by start.py, which builds the indexes
+    if index_ready is None:  # run standalone
+        from start import index_database
+        index = await index_database({})
+    else:
+        index = await index_ready
+    similarity = current_similarity()
+    if index is not None and similarity is not None:
+        print(f"🗂️ Indexed {len(index.entries)} loadouts ({len(index.weapons)} weapons) in {index.build_time_ms:.1f}ms")
+        print(f"🧮 Precomputed similar builds in {similarity.build_time_ms:.1f}ms")
     
     try:
-        print("🔄 Syncing commands globally...")
-        commands = await bot.tree.sync()
-        print(f"✅ Successfully synced {len(commands)} commands")
+        bot.command_sync = await sync_if_changed(bot.tree)
+        record_sync(bot.command_sync)
     except Exception as e:
         print(f"❌ Failed to sync commands: {e}")
         print("Please ensure the bot has the 'applications.commands' scope when invited")
 
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+    """Report timed-out background work instead of leaving the user on 'thinking...'"""
+    original = getattr(error, "original", error)
+    bot_metrics.record_command(interaction, "timeout" if isinstance(original, asyncio.TimeoutError) else "error")
+    if isinstance(original, asyncio.TimeoutError):
+        stats = get_executor().stats()
+        print(f"⏳ /{interaction.command.name if interaction.command else '?'} timed out "
+              f"(queue depth {stats['queue_depth']}, running {stats['running']})")
+        message = "⏳ That took too long - the bot is busy. Please try again in a moment."
+    else:
+        print(f"❌ Command error: {original}")
+        message = "❌ Something went wrong while handling that command."
+    
+    embed = discord.Embed(title="🚫 Request Failed", description=message, color=0xe74c3c)
+    if interaction.response.is_done():
+        await interaction.followup.send(embed=embed)
+    else:
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.event
 async def on_message(message):
     # Ignore messages from the bot itself
@@ -135,17 +257,20 @@ async def on_message(message):
         await bot.process_commands(message)
 
 @bot.tree.command(name="search", description="Search for a weapon loadout")
+@discord.app_commands.describe(weapon_name='Weapon name and/or filters, e.g. "close range smg" or "mode:verdansk slot:optic rank<=3"')
 async def search(interaction: discord.Interaction, weapon_name: str):
     """Search for a weapon by name"""
     print(f"Received search command for: {weapon_name}")  # Debug log
     await interaction.response.defer()
     
-    results = search_guns(weapon_name, max_results=5)
+    results = await coalesce("search", (weapon_name.lower(), 5),
+                             lambda: run_blocking(search_guns, weapon_name, 5, cpu=True))
     
     if not results:
         embed = discord.Embed(
             title="🚫 No Results Found", 
-            description=f"No weapons found matching **{weapon_name}**\n\nTry searching with partial names like 'ak', 'kar', 'fennec', etc.",
+            description=f"No weapons found matching **{weapon_name}**\n\nTry searching with partial names like 'ak', 'kar', 'fennec', etc. "
+                        f"or filters like `close range smg` or `mode:verdansk slot:optic rank<=3`.",
             color=0xe74c3c
         )
         await interaction.followup.send(embed=embed)
@@ -168,19 +293,8 @@ async def search(interaction: discord.Interaction, weapon_name: str):
             color=0x3498db
         )
         
-        # Create view with buttons
-        view = discord.ui.View()
-        for i, gun in enumerate(results, 1):
-            button = discord.ui.Button(
-                label=str(i), 
-                style=discord.ButtonStyle.primary,
-                custom_id=f"select_{i-1}"  # Store index in custom_id
-            )
-            
-            async def button_callback(interaction: discord.Interaction, gun=gun):
-                await interaction.response.send_message(embed=format_gun_embed(gun))
-            
-            button.callback = button_callback
+        view = discord.ui.View(timeout=None)
+        for button in result_buttons(results):
             view.add_item(button)
         
         await interaction.followup.send(embed=embed, view=view)
@@ -190,7 +304,8 @@ async def gun(interaction: discord.Interaction, weapon_name: str):
     """Get detailed info for a specific weapon"""
     await interaction.response.defer()
     
-    results = search_guns(weapon_name, max_results=1)
+    results = await coalesce("search", (weapon_name.lower(), 1),
+                             lambda: run_blocking(search_guns, weapon_name, 1, cpu=True))
     
     if not results:
         embed = discord.Embed(
@@ -204,6 +319,122 @@ async def gun(interaction: discord.Interaction, weapon_name: str):
     embed = format_gun_embed(results[0])
     await interaction.followup.send(embed=embed)
 
+@bot.tree.command(name="where", description="Show every mode and category a weapon ranks in")
+async def where(interaction: discord.Interaction, weapon_name: str):
+    """Show every placement of a weapon from the reverse index"""
+    await interaction.response.defer()
+    
+    index = await run_blocking(load_gun_index, ALL_GUNS_STORE)
+    placements = index.where(weapon_name)
+    
+    if not placements:
+        embed = discord.Embed(
+            title="🚫 Weapon Not Found", 
+            description=f"No weapon found matching **{weapon_name}**\n\nUse `/search <partial_name>` to find available weapons.",
+            color=0xe74c3c
+        )
+        await interaction.followup.send(embed=embed)
+        return
+    
+    name = index.weapons[index.resolve_weapon(weapon_name)]
+    embed = discord.Embed(
+        title=f"📍 {name} across the meta",
+        description=f"Ranked in **{len(placements)}** categories",
+        color=0x3498db
+    )
+    
+    by_mode = {}
+    for placement in placements:
+        by_mode.setdefault(placement.mode, []).append(placement)
+    
+    for mode, mode_placements in by_mode.items():
+        lines = [f"**#{p.rank}** {p.category}" for p in sorted(mode_placements, key=lambda p: p.rank)]
+        embed.add_field(name=mode, value="\n".join(lines)[:1024], inline=True)
+    
+    image = next((p.loadout.get("image") for p in placements if p.loadout.get("image")), None)
+    if image:
+        embed.set_thumbnail(url=image)
+    
+    embed.set_footer(text="💡 Use /gun <weapon_name> for the full loadout")
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="attachment", description="Show which weapons run an attachment and how popular it is")
+async def attachment(interaction: discord.Interaction, attachment_name: str):
+    """Look up an attachment in the inverted attachment index"""
+    await interaction.response.defer()
+    
+    index = await run_blocking(load_gun_index, ALL_GUNS_STORE)
+    matches = index.resolve_attachment(attachment_name)
+    
+    if not matches:
+        embed = discord.Embed(
+            title="🚫 Attachment Not Found", 
+            description=f"No attachment found matching **{attachment_name}**\n\nTry names like 'compensator', 'kepler' or 'extended mag'.",
+            color=0xe74c3c
+        )
+        await interaction.followup.send(embed=embed)
+        return
+    
+    name = matches[0][0]
+    embed = discord.Embed(title=f"🔧 {name}", color=0xf1c40f)
+    
+    for match_name, slot in matches[:3]:
+        stats = index.attachment_stats(match_name, slot)
+        share = stats["builds"] / stats["slot_total"] * 100 if stats["slot_total"] else 0
+        description = f"Used in **{stats['builds']}** builds - #{stats['slot_rank']} {slot} ({share:.0f}% of {slot} picks)\n"
+        description += "\n".join(f"• {category}: {count}" for category, count in stats["per_category"][:8])
+        embed.add_field(name=f"{slot} popularity", value=description[:1024], inline=False)
+        
+        builds = sorted(index.attachment_builds(match_name, slot), key=lambda gun: gun["rank"])
+        weapons = []
+        for gun in builds:
+            line = f"**#{gun['rank']}** {clean_gun_name(gun['gun'])} - {gun['mode']} {gun['range']}"
+            if line not in weapons:
+                weapons.append(line)
+        value = "\n".join(weapons[:10])
+        if len(weapons) > 10:
+            value += f"\n... and {len(weapons) - 10} more"
+        embed.add_field(name="Weapons running it", value=value[:1024], inline=False)
+        
+        leaders = ", ".join(f"{leader} ({count})" for leader, count in stats["slot_leaders"])
+        embed.add_field(name=f"Top {slot} picks", value=leaders[:1024], inline=False)
+    
+    embed.set_footer(text="🔍 BO6 Meta Gun Database")
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="similar", description="Find weapons with loadouts similar to a weapon")
+async def similar(interaction: discord.Interaction, weapon_name: str):
+    """Recommend weapons from the precomputed build-similarity neighbours"""
+    await interaction.response.defer()
+    
+    engine = await run_blocking(load_build_similarity, ALL_GUNS_STORE)
+    matches = engine.similar_weapons(weapon_name)
+    
+    if not matches:
+        embed = discord.Embed(
+            title="🚫 No Similar Weapons", 
+            description=f"No similar loadouts found for **{weapon_name}**\n\nUse `/search <partial_name>` to find available weapons.",
+            color=0xe74c3c
+        )
+        await interaction.followup.send(embed=embed)
+        return
+    
+    name = engine.index.weapons[engine.index.resolve_weapon(weapon_name)]
+    description = f"Loadouts closest to **{name}** by shared attachments:\n\n"
+    for i, match in enumerate(matches, 1):
+        gun = match["gun"]
+        description += f"**{i}.** {clean_gun_name(gun['gun'])} - {gun['mode']} {gun['range']} (Rank #{gun['rank']}) · {match['score'] * 100:.0f}% match\n"
+    
+    description += f"\n💡 Use `/gun <weapon_name>` for detailed loadout"
+    
+    embed = discord.Embed(
+        title=f"🧬 Similar to {name}",
+        description=description,
+        color=0x1abc9c
+    )
+    
+    await interaction.followup.send(embed=embed)
+
 @bot.tree.command(name="top", description="Show top weapons in a category")
 async def top(interaction: discord.Interaction, 
               mode: str = "Resurgence", 
@@ -211,11 +442,10 @@ async def top(interaction: discord.Interaction,
     """Show top weapons in a specific category"""
     await interaction.response.defer()
     
-    database = load_all_guns_database()
-    category_key = f"{mode}_{range_type}"
+    guns, valid_categories = await coalesce("top", (mode, range_type),
+                                            lambda: run_blocking(top_in_category, mode, range_type))
     
-    if category_key not in database.get("categories", {}):
-        valid_categories = list(database.get("categories", {}).keys())
+    if guns is None:
         embed = discord.Embed(
             title="🚫 Invalid Category", 
             description=f"Category **{mode} - {range_type}** not found.\n\nValid categories:\n" + 
@@ -225,8 +455,6 @@ async def top(interaction: discord.Interaction,
         await interaction.followup.send(embed=embed)
         return
     
-    guns = database["categories"][category_key][:10]  # Top 10
-    
     if not guns:
         embed = discord.Embed(
             title="🚫 No Data", 
@@ -265,7 +493,9 @@ async def top(interaction: discord.Interaction,
 @bot.tree.command(name="stats", description="Show database statistics")
 async def stats(interaction: discord.Interaction):
     """Show database statistics"""
-    database = load_all_guns_database()
+    await interaction.response.defer()
+    
+    database = await run_blocking(load_all_guns_database)
     
     if not database or not database.get("categories"):
         embed = discord.Embed(
@@ -296,6 +526,15 @@ async def stats(interaction: discord.Interaction):
     
     await interaction.followup.send(embed=embed)
 
+@where.autocomplete('weapon_name')
+async def where_weapon_autocomplete(interaction: discord.Interaction, current: str):
+    index = await run_blocking(load_gun_index, ALL_GUNS_STORE)
+    current_lower = current.lower()
+    return [
+        discord.app_commands.Choice(name=name, value=name)
+        for name in sorted(index.weapons.values()) if current_lower in name.lower()
+    ][:25]  # Discord limits to 25 choices
+
 # Command autocomplete for mode and range_type
 @top.autocomplete('mode')
 async def mode_autocomplete(interaction: discord.Interaction, current: str):
@@ -308,7 +547,7 @@ async def mode_autocomplete(interaction: discord.Interaction, current: str):
 @top.autocomplete('range_type')
 async def range_type_autocomplete(interaction: discord.Interaction, current: str):
     # Get all possible categories from the database
-    database = load_all_guns_database()
+    database = await run_blocking(load_all_guns_database)
     categories = set()
     
     for category_key in database.get("categories", {}):
@@ -1,103 +1,211 @@
 #!/usr/bin/env python3
 """
 Download the latest gun database artifact from GitHub Actions.
-Useful for local development or manual deployment.
+Useful for local development or manual deployment; entrypoint.sh and
+start.py use it at container start.
+
+The artifact zip is streamed to a temp file over a pooled, retrying session,
+checked against the size (and digest, when GitHub reports one) from the
+artifact listing, and only all_guns_database.json is extracted and atomically
+swapped in. When the newest artifact ID matches the one recorded after the
+last download and the database is still intact, nothing is downloaded.
 """
 import os
+import sys
 import json
-import requests
+import shutil
+import hashlib
 import zipfile
-from io import BytesIO
+import argparse
+import tempfile
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def download_latest_database(repo_owner=None, repo_name=None, github_token=None):
-    """Download the latest gun database artifact from GitHub Actions"""
-    
-    # Try to get repo info from environment or git
-    if not repo_owner or not repo_name:
+DATABASE_FILE = "all_guns_database.json"
+ARTIFACT_NAME = "gun-database"
+ARTIFACT_STATE = ".database_artifact.json"  # stored next to the database
+GITHUB_API_URL = "https://api.github.com"
+CHUNK_SIZE = 1 << 20
+
+class ArtifactError(Exception):
+    """The downloaded artifact failed verification or has no database in it"""
+
+def make_session(github_token: Optional[str] = None, retries: int = 3) -> requests.Session:
+    """requests.Session with connection pooling and retries on connection errors, 429 and 5xx"""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept"] = "application/vnd.github+json"
+    if github_token:
+        session.headers["Authorization"] = f"token {github_token}"
+    return session
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _state_path(dest: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(dest)), ARTIFACT_STATE)
+
+def load_artifact_state(dest: str = DATABASE_FILE) -> Dict:
+    try:
+        with open(_state_path(dest), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_artifact_state(dest: str, state: Dict):
+    path = _state_path(dest)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+def is_current(artifact: Dict, dest: str = DATABASE_FILE) -> bool:
+    """True when artifact was the last one installed at dest and dest is unmodified"""
+    state = load_artifact_state(dest)
+    if state.get("artifact_id") != artifact["id"] or not os.path.exists(dest):
+        return False
+    return file_sha256(dest) == state.get("database_sha256")
+
+def latest_artifact(session: requests.Session, repo_owner: str, repo_name: str,
+                    api_url: str = GITHUB_API_URL) -> Optional[Dict]:
+    """Newest non-expired gun-database artifact, or None"""
+    response = session.get(f"{api_url}/repos/{repo_owner}/{repo_name}/actions/artifacts",
+                           params={"name": ARTIFACT_NAME, "per_page": 10}, timeout=(10, 30))
+    response.raise_for_status()
+    artifacts = [a for a in response.json().get("artifacts", [])
+                 if a["name"] == ARTIFACT_NAME and not a.get("expired")]
+    if not artifacts:
+        return None
+    return max(artifacts, key=lambda a: a["created_at"])
+
+def stream_to_file(session: requests.Session, url: str, path: str) -> Dict:
+    """Stream url into path in chunks; returns {"size", "sha256"} of what was written"""
+    digest = hashlib.sha256()
+    size = 0
+    with session.get(url, stream=True, timeout=(10, 60)) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    return {"size": size, "sha256": digest.hexdigest()}
+
+def verify_download(artifact: Dict, downloaded: Dict):
+    expected_size = artifact.get("size_in_bytes")
+    if expected_size is not None and downloaded["size"] != expected_size:
+        raise ArtifactError(f"size mismatch: got {downloaded['size']} bytes, expected {expected_size}")
+    expected_digest = artifact.get("digest")  # "sha256:<hex>" on newer GitHub API responses
+    if expected_digest and expected_digest.startswith("sha256:") and downloaded["sha256"] != expected_digest[7:]:
+        raise ArtifactError("sha256 mismatch")
+
+def extract_database(zip_path: str, dest: str = DATABASE_FILE) -> Dict:
+    """Extract only the database member of zip_path and atomically replace dest"""
+    with zipfile.ZipFile(zip_path) as z:
+        members = [info for info in z.infolist()
+                   if not info.is_dir() and os.path.basename(info.filename) == os.path.basename(DATABASE_FILE)]
+        if not members:
+            raise ArtifactError(f"{os.path.basename(DATABASE_FILE)} not found in artifact")
+        member = min(members, key=lambda info: info.filename.count("/"))
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".json.tmp")
         try:
-            # Try to get from git remote
-            import subprocess
-            result = subprocess.run(['git', 'remote', 'get-url', 'origin'], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                url = result.stdout.strip()
-                # Parse GitHub URL
-                if 'github.com' in url:
-                    parts = url.replace('https://github.com/', '').replace('.git', '').split('/')
-                    repo_owner = parts[0]
-                    repo_name = parts[1]
-        except:
-            pass
-    
-    # Fallback values
-    if not repo_owner:
-        repo_owner = input("Enter GitHub username/organization: ").strip()
-    if not repo_name:
-        repo_name = input("Enter repository name: ").strip()
-    
+            with os.fdopen(fd, "wb") as out, z.open(member) as source:
+                shutil.copyfileobj(source, out, CHUNK_SIZE)
+            with open(tmp_path, "r") as f:
+                db = json.load(f)
+            if "categories" not in db or "total_guns" not in db:
+                raise ArtifactError("invalid database structure")
+            os.replace(tmp_path, dest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return db
+
+def _detect_repo():
+    """(owner, name) from the git origin remote, or (None, None)"""
+    try:
+        import subprocess
+        result = subprocess.run(['git', 'remote', 'get-url', 'origin'],
+                                capture_output=True, text=True)
+        if result.returncode == 0:
+            url = result.stdout.strip()
+            # Parse GitHub URL
+            if 'github.com' in url:
+                parts = url.replace('https://github.com/', '').replace('git@github.com:', '').replace('.git', '').split('/')
+                return parts[0], parts[1]
+    except Exception:
+        pass
+    return None, None
+
+def download_latest_database(repo_owner=None, repo_name=None, github_token=None, dest=DATABASE_FILE,
+                             force=False, api_url=GITHUB_API_URL, session=None):
+    """Download the latest gun database artifact from GitHub Actions
+
+    Returns True when dest holds the latest database (downloaded now or already
+    current), False on any failure; an existing dest is never left half-written.
+    """
+    if not repo_owner or not repo_name:
+        detected_owner, detected_name = _detect_repo()
+        repo_owner = repo_owner or detected_owner
+        repo_name = repo_name or detected_name
+    if not repo_owner or not repo_name:
+        print("❌ Repository unknown - set GITHUB_REPO_OWNER and GITHUB_REPO_NAME")
+        return False
+
     if not github_token:
         github_token = os.getenv('GITHUB_TOKEN')
         if not github_token:
             print("⚠️ No GitHub token found. You may hit rate limits.")
             print("   Set GITHUB_TOKEN in your .env file for authenticated access.")
-    
+
     print(f"🔍 Fetching artifacts from {repo_owner}/{repo_name}...")
-    
-    # GitHub API endpoints
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    if github_token:
-        headers['Authorization'] = f'token {github_token}'
-    
-    artifacts_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/actions/artifacts"
-    
+    session = session or make_session(github_token)
+    zip_path = None
+
     try:
-        # Get list of artifacts
-        response = requests.get(artifacts_url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Find gun-database artifacts
-        gun_artifacts = [a for a in data['artifacts'] if a['name'] == 'gun-database']
-        
-        if not gun_artifacts:
+        latest = latest_artifact(session, repo_owner, repo_name, api_url)
+        if latest is None:
             print("❌ No gun database artifacts found!")
             print("   Make sure the scraper workflow has run successfully.")
             return False
-        
-        # Get the latest artifact
-        latest = gun_artifacts[0]  # Artifacts are sorted by created_at desc
-        
-        print(f"📊 Found artifact from {latest['created_at']}")
-        print(f"💾 Size: {latest['size_in_bytes']} bytes")
-        
-        # Download artifact
-        download_url = latest['archive_download_url']
-        
-        print("⬇️ Downloading artifact...")
-        download_response = requests.get(download_url, headers=headers)
-        download_response.raise_for_status()
-        
-        # Extract ZIP file
-        with zipfile.ZipFile(BytesIO(download_response.content)) as z:
-            z.extractall('.')
-        
-        # Verify the file
-        if os.path.exists('all_guns_database.json'):
-            with open('all_guns_database.json', 'r') as f:
-                db = json.load(f)
-            
-            print("✅ Database downloaded successfully!")
-            print(f"📊 Total weapons: {db['total_guns']}")
-            print(f"📅 Last updated: {db['last_updated']}")
-            print("🤖 Ready to run Discord bot: python discord_search_bot.py")
+
+        print(f"📊 Found artifact {latest['id']} from {latest['created_at']}")
+        if not force and is_current(latest, dest):
+            print("✅ Database is already up to date - skipping download")
             return True
-        else:
-            print("❌ Database file not found in artifact!")
-            return False
-            
+
+        print(f"⬇️ Downloading artifact ({latest.get('size_in_bytes', '?')} bytes)...")
+        fd, zip_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".zip.tmp")
+        os.close(fd)
+        downloaded = stream_to_file(session, latest['archive_download_url'], zip_path)
+        verify_download(latest, downloaded)
+        db = extract_database(zip_path, dest)
+        _save_artifact_state(dest, {
+            "artifact_id": latest["id"],
+            "created_at": latest["created_at"],
+            "archive_sha256": downloaded["sha256"],
+            "database_sha256": file_sha256(dest),
+        })
+
+        print("✅ Database downloaded successfully!")
+        print(f"📊 Total weapons: {db['total_guns']}")
+        print(f"📅 Last updated: {db.get('last_updated', 'Unknown')}")
+        return True
+
     except requests.exceptions.RequestException as e:
         print(f"❌ Error downloading artifact: {e}")
         if '404' in str(e):
@@ -105,23 +213,35 @@ def download_latest_database(repo_owner=None, repo_name=None, github_token=None)
         elif '403' in str(e):
             print("   You may need a GitHub token for private repositories.")
         return False
+    except (ArtifactError, zipfile.BadZipFile, ValueError) as e:
+        print(f"❌ Artifact rejected: {e}")
+        return False
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
         return False
+    finally:
+        if zip_path and os.path.exists(zip_path):
+            os.remove(zip_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the latest gun database artifact")
+    parser.add_argument("--owner", default=os.getenv('GITHUB_REPO_OWNER'), help="GitHub user/organization")
+    parser.add_argument("--repo", default=os.getenv('GITHUB_REPO_NAME'), help="repository name")
+    parser.add_argument("--output", default=DATABASE_FILE)
+    parser.add_argument("--force", action="store_true", help="download even if the artifact is unchanged")
+    args = parser.parse_args(argv)
 
-def main():
     print("🔫 Gun Database Downloader")
     print("=" * 40)
-    
-    # Check if database already exists
-    if os.path.exists('all_guns_database.json'):
-        choice = input("Database already exists. Download fresh copy? (y/N): ").strip().lower()
-        if choice != 'y':
-            print("🚫 Download cancelled.")
-            return
-    
-    success = download_latest_database()
-    
+
+    owner, repo = args.owner, args.repo
+    if (not owner or not repo) and sys.stdin.isatty():
+        detected_owner, detected_name = _detect_repo()
+        owner = owner or detected_owner or input("Enter GitHub username/organization: ").strip()
+        repo = repo or detected_name or input("Enter repository name: ").strip()
+
+    success = download_latest_database(owner, repo, dest=args.output, force=args.force)
+
     if success:
         print("\n🎯 Next steps:")
         print("1. Set up Discord bot token in .env file")
@@ -129,6 +249,7 @@ def main():
     else:
         print("\n💡 Alternative: Run the scraper locally")
         print("   python scrape.py")
+    return 0 if success else 1
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
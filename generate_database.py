@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Synthetic gun database generator for load and scale testing.
+Emits databases with the same schema as all_guns_database.json at any size,
+with realistic weapon names (shared prefixes, 'NEW' badges), attachment
+vocabularies, mode/category mixes and rank orders. Seeded for determinism.
+
+Usage:
+    python generate_database.py 10000 -o synthetic_10k.json --seed 7
+"""
+import json
+import random
+import argparse
+import datetime
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+# Category mix roughly mirrors the live database: Warzone long range dominates
+CATEGORY_WEIGHTS = {
+    ("Resurgence", "Long Range"): 25,
+    ("Resurgence", "Close Range"): 11,
+    ("Resurgence", "Sniper"): 4,
+    ("Verdansk", "Long Range"): 26,
+    ("Verdansk", "Close Range"): 11,
+    ("Verdansk", "Sniper"): 4,
+    ("Multiplayer", "Assault Rifle"): 5,
+    ("Multiplayer", "SMG"): 4,
+    ("Multiplayer", "Shotgun"): 2,
+    ("Multiplayer", "LMG"): 2,
+    ("Multiplayer", "Marksman Rifle"): 2,
+    ("Multiplayer", "Sniper"): 2,
+    ("Multiplayer", "Pistol"): 2,
+}
+
+# Families share prefixes so partial searches ("ak", "kar", "fjx") hit several weapons
+NAME_PREFIXES = ["AK", "KAR", "FJX", "LC", "MX", "XM", "SWAT", "KRIG", "GPR", "AMR",
+                 "HDR", "KSV", "TAQ", "PP", "MCW", "SVD", "LR", "AS", "CR", "DM"]
+NAME_SUFFIXES = ["-74", "-47", "98k", " Horus", " Imperium", "10", "9", "4", " 5.56", " C",
+                 " 91", " MOD 4", "-56", "-919", " 7.62", " VAL", "-56 AMAX", "-10", " Guardian", " 762"]
+
+SLOTS = {
+    "Optic": ["KEPLER MICROFLEX", "VOLZHSKIY REFLEX", "JAK GLASSLESS", "RANGE CALLER V3.4 OPTIC", "SLATE REFLECTOR"],
+    "Muzzle": ["COMPENSATOR", "SUPPRESSOR", "SHADOWSTRIKE SUPPRESSOR", "MONOLITHIC SUPPRESSOR", "BRUEN PENDULUM"],
+    "Barrel": ["LONG BARREL", "REINFORCED BARREL", "GAIN-TWIST BARREL", "SHORT BARREL"],
+    "Underbarrel": ["VERTICAL FOREGRIP", "RANGER FOREGRIP", "G-GRIP", "DR-6 HANDSTOP"],
+    "Magazine": ["EXTENDED MAG", "EXTENDED MAG II", "FAST MAG", "DRUM MAG"],
+    "Rear Grip": ["COMMANDO GRIP", "QUICKDRAW GRIP", "RECON SLING"],
+    "Stock": ["INFILTRATOR STOCK", "BALANCED STOCK", "NO STOCK"],
+    "Fire Mods": ["RAPID FIRE", "RECOIL SPRINGS"],
+    "Ammunition": ["HIGH GRAIN ROUNDS", "HOLLOW POINT", "FMJ ROUNDS"],
+    "Laser": ["TARGET LASER", "STEADY AIM LASER"],
+}
+
+@lru_cache(maxsize=None)
+def zipf_cum_weights(count: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights, cached so large lists are not re-weighted per draw"""
+    return list(accumulate(1 / (position + 1) ** skew for position in range(count)))
+
+def zipf_choice(rng: random.Random, items: List, skew: float = 1.1):
+    """Pick from items with a Zipf-like bias towards the front of the list"""
+    return rng.choices(items, cum_weights=zipf_cum_weights(len(items), skew), k=1)[0]
+
+def zipf_sample(rng: random.Random, items: List, k: int, skew: float = 1.1) -> List:
+    """k distinct items in a Zipf-weighted random order (weighted shuffle, front of the list favoured)"""
+    keys = [rng.random() ** ((position + 1) ** skew) for position in range(len(items))]
+    order = sorted(range(len(items)), key=keys.__getitem__, reverse=True)
+    return [items[position] for position in order[:k]]
+
+def generate_weapon_names(rng: random.Random, count: int) -> List[str]:
+    """Unique weapon names built from shared family prefixes"""
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = zipf_choice(rng, NAME_PREFIXES, 0.6) + rng.choice(NAME_SUFFIXES)
+        while name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def generate_loadout(rng: random.Random, weapon: str, slot_count: int,
+                     specific_rate: float = 0.2) -> List[str]:
+    """Attachment lines in the scraper's '• NAME — Slot' format
+
+    Some parts are weapon-specific ('KAR98K LONG BARREL'), so the attachment
+    vocabulary grows with the number of weapons as it does in the live data.
+    """
+    lines = []
+    for slot in rng.sample(list(SLOTS), slot_count):
+        attachment = zipf_choice(rng, SLOTS[slot])
+        if rng.random() < specific_rate:
+            attachment = f"{weapon.upper()} {attachment}"
+        lines.append(f"• {attachment} — {slot}")
+    if rng.random() < 0.85:
+        lines.append("• Up to date for — Season 4")
+    else:
+        lines.append(f"• {rng.choice(['May', 'Jun'])} {rng.randint(1, 28)}, 2025")
+    return lines
+
+def generate_database(size: int, seed: Optional[int] = 0, weapon_count: Optional[int] = None,
+                      new_badge_rate: float = 0.03) -> Dict:
+    """Build a schema-compatible database with size loadouts in total
+
+    Like the live data, a weapon appears at most once per category, so there
+    are always at least as many weapons as the largest category has entries.
+    """
+    rng = random.Random(seed)
+    categories_list = list(CATEGORY_WEIGHTS)
+    counts = dict.fromkeys(categories_list, 0)
+    for category in rng.choices(categories_list, weights=list(CATEGORY_WEIGHTS.values()), k=size):
+        counts[category] += 1
+
+    weapon_count = max(weapon_count or max(10, int(size ** 0.5 * 5)), max(counts.values()))
+    weapons = generate_weapon_names(rng, weapon_count)
+    new_weapons = set(rng.sample(weapons, max(1, int(len(weapons) * new_badge_rate))))
+
+    categories = {}
+    for (mode, range_type), count in counts.items():
+        guns = []
+        for rank, name in enumerate(zipf_sample(rng, weapons, count, 0.8), start=1):
+            guns.append({
+                "rank": rank,
+                "mode": mode,
+                "range": range_type,
+                "gun": f"{name}\nNEW" if name in new_weapons else name,
+                "class": generate_loadout(rng, name, rng.randint(4, 5)),
+                "image": f"https://i.imgur.com/synthetic{rng.randrange(10 ** 6)}.png" if rng.random() < 0.9 else None,
+                "updated": rng.choice(["", "Unknown"]),
+            })
+        categories[f"{mode}_{range_type}"] = guns
+
+    return {
+        "last_updated": datetime.datetime(2025, 6, 6, tzinfo=datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "total_guns": size,
+        "categories": categories,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic gun database")
+    parser.add_argument("size", type=int, help="total number of loadouts")
+    parser.add_argument("-o", "--output", default="synthetic_guns_database.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--weapons", type=int, help="distinct weapon names (default scales with size; never below the largest category)")
+    args = parser.parse_args()
+
+    database = generate_database(args.size, seed=args.seed, weapon_count=args.weapons)
+    with open(args.output, "w") as f:
+        json.dump(database, f, indent=2)
+
+    print(f"✅ Wrote {database['total_guns']} loadouts in {len(database['categories'])} categories to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Precomputed lookup structures over the gun database.
+The index is built once per database version, so slash commands answer from
+dictionary lookups instead of rescanning every category on each request.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+from difflib import get_close_matches
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ALL_GUNS_STORE = "all_guns_database.json"
+
+class Placement(NamedTuple):
+    """One appearance of a weapon in a meta category"""
+    mode: str
+    category: str
+    rank: int
+    loadout: Dict
+
+def clean_gun_name(name: str) -> str:
+    """Strip scraper badges such as '\\nNEW' from a weapon name"""
+    return name.split("\n")[0].strip()
+
+def weapon_id(name: str) -> str:
+    """Stable identifier for a weapon: 'FFAR 1\\nNEW' -> 'ffar-1'"""
+    return re.sub(r"[^a-z0-9]+", "-", clean_gun_name(name).lower()).strip("-")
+
+def parse_attachment(line: str) -> Optional[Tuple[str, str]]:
+    """Split a class line like '• COMPENSATOR — Muzzle' into (name, slot)
+
+    Date stamps and 'Up to date for — Season 4' footers are not attachments.
+    """
+    text = line.strip().lstrip("•").strip()
+    if " — " not in text:
+        return None
+    name, slot = (part.strip() for part in text.split(" — ", 1))
+    if not name or not slot or name.lower().startswith("up to date"):
+        return None
+    return name, slot
+
+def attachment_key(name: str) -> str:
+    """Case- and punctuation-insensitive attachment lookup key"""
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+def database_version(database: Dict) -> str:
+    """Short content hash identifying a database snapshot"""
+    payload = json.dumps(database, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+class GunIndex:
+    def __init__(self, database: Dict):
+        start = time.perf_counter()
+        self.database = database
+        self.version = database_version(database)
+        self.entries: List[Dict] = []           # every loadout, in category order
+        self.weapons: Dict[str, str] = {}       # weapon id -> display name
+        self.placements: Dict[str, List[Placement]] = {}  # weapon id -> every category/rank
+        self.loadouts: Dict[Tuple[str, str], Dict] = {}   # (category key, weapon id) -> loadout
+        self.attachments: Dict[Tuple[str, str], List[int]] = {}  # (name, slot) -> entry positions
+        self.attachment_names: Dict[str, List[Tuple[str, str]]] = {}  # lookup key -> (name, slot) pairs
+        self.slot_counts: Dict[str, Counter] = {}  # slot -> attachment name -> number of builds
+
+        for category_key, guns in database.get("categories", {}).items():
+            for gun in guns:
+                wid = weapon_id(gun["gun"])
+                position = len(self.entries)
+                self.entries.append(gun)
+                self.weapons.setdefault(wid, clean_gun_name(gun["gun"]))
+                self.placements.setdefault(wid, []).append(
+                    Placement(gun["mode"], gun["range"], gun["rank"], gun)
+                )
+                self.loadouts.setdefault((category_key, wid), gun)
+                for line in gun.get("class", []):
+                    parsed = parse_attachment(line)
+                    if parsed is None:
+                        continue
+                    postings = self.attachments.setdefault(parsed, [])
+                    if postings and postings[-1] == position:
+                        continue  # same attachment listed twice in one build
+                    postings.append(position)
+                    if len(postings) == 1:
+                        self.attachment_names.setdefault(attachment_key(parsed[0]), []).append(parsed)
+                    self.slot_counts.setdefault(parsed[1], Counter())[parsed[0]] += 1
+
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    def resolve_weapon(self, query: str) -> Optional[str]:
+        """Map user input to a weapon id (exact, then prefix, then substring, then fuzzy)"""
+        wid = weapon_id(query)
+        if not wid:
+            return None
+        if wid in self.placements:
+            return wid
+
+        compact = wid.replace("-", "")
+        for matches in (
+            [w for w in self.weapons if w.replace("-", "").startswith(compact)],
+            [w for w in self.weapons if compact in w.replace("-", "")],
+        ):
+            if matches:
+                return min(matches, key=len)
+
+        close = get_close_matches(wid, list(self.weapons), n=1, cutoff=0.6)
+        return close[0] if close else None
+
+    def where(self, query: str) -> Optional[List[Placement]]:
+        """Every (mode, category, rank, loadout) for the weapon matching query"""
+        wid = self.resolve_weapon(query)
+        if wid is None:
+            return None
+        return self.placements[wid]
+
+    def loadout(self, category_key: str, wid: str) -> Optional[Dict]:
+        """The loadout of a weapon in one category, e.g. ('Resurgence_Long Range', 'ffar-1')"""
+        return self.loadouts.get((category_key, wid))
+
+    def resolve_attachment(self, query: str) -> List[Tuple[str, str]]:
+        """Map user input to (name, slot) pairs (exact, then substring, then fuzzy)"""
+        key = attachment_key(query)
+        if not key:
+            return []
+        if key in self.attachment_names:
+            return self.attachment_names[key]
+
+        matches = [k for k in self.attachment_names if key in k]
+        if not matches:
+            matches = get_close_matches(key, list(self.attachment_names), n=1, cutoff=0.6)
+        if not matches:
+            return []
+        best = min(matches, key=len)
+        return self.attachment_names[best]
+
+    def attachment_builds(self, name: str, slot: str) -> List[Dict]:
+        """Every loadout running the given attachment"""
+        return [self.entries[position] for position in self.attachments.get((name, slot), [])]
+
+    def attachment_stats(self, name: str, slot: str) -> Dict:
+        """Popularity of an attachment within its slot and per category"""
+        builds = self.attachment_builds(name, slot)
+        slot_counter = self.slot_counts.get(slot, Counter())
+        ranking = [attachment for attachment, _ in slot_counter.most_common()]
+        per_category = Counter(f"{gun['mode']} - {gun['range']}" for gun in builds)
+        return {
+            "name": name,
+            "slot": slot,
+            "builds": len(builds),
+            "slot_total": sum(slot_counter.values()),
+            "slot_rank": ranking.index(name) + 1 if name in ranking else None,
+            "slot_leaders": slot_counter.most_common(5),
+            "per_category": per_category.most_common(),
+        }
+
+_index_cache = {"key": None, "index": None}
+index_stats = {"hits": 0, "misses": 0, "reloads": 0}  # read by bot_metrics
+
+def current_index() -> Optional[GunIndex]:
+    """The most recently built index, without touching the disk"""
+    return _index_cache["index"]
+
+def database_file_key(path: str = ALL_GUNS_STORE) -> Tuple:
+    """(path, mtime, size) of the database file - what load_gun_index rebuilds on"""
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return (path, None, None)
+
+def load_gun_index(path: str = ALL_GUNS_STORE) -> GunIndex:
+    """Return the index for the database on disk, rebuilding only when the file changes"""
+    key = database_file_key(path)
+
+    if _index_cache["key"] == key and _index_cache["index"] is not None:
+        index_stats["hits"] += 1
+        return _index_cache["index"]
+    index_stats["misses"] += 1
+
+    database = {"categories": {}, "total_guns": 0}
+    if key[1] is not None:
+        try:
+            with open(path, "r") as f:
+                database = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load gun index from {path}: {e}")
+
+    index = GunIndex(database)
+    if _index_cache["index"] is not None:
+        index_stats["reloads"] += 1
+    _index_cache["key"] = key
+    _index_cache["index"] = index
+    return index
+
+derived_caches: Dict[str, "DerivedIndexCache"] = {}  # name -> cache, read by bot_metrics
+
+class DerivedIndexCache:
+    """Single-slot cache for an index built from a GunIndex (vector, filter, BM25 ...)
+
+    Looked up by source object first (same object: no rehash), then by database
+    version (same content: no rebuild).
+    """
+    def __init__(self, name: str, build: Callable[[GunIndex], Any]):
+        self.name = name
+        self.build = build
+        self.source = None
+        self.version = None
+        self.engine = None
+        self.stats = {"hits": 0, "misses": 0}
+        derived_caches[name] = self
+
+    def current(self):
+        """The most recently built index, without rebuilding"""
+        return self.engine
+
+    def _get(self, source, version_of: Callable[[], str]):
+        if self.engine is not None and self.source is source:
+            self.stats["hits"] += 1
+            return self.engine
+        version = version_of()
+        if self.engine is not None and self.version == version:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            self.engine = self.build(source if isinstance(source, GunIndex) else GunIndex(source))
+            self.version = version
+        self.source = source
+        return self.engine
+
+    def load(self, path: str = ALL_GUNS_STORE):
+        """The index for the database on disk, rebuilt when its version changes"""
+        index = load_gun_index(path)
+        return self._get(index, lambda: index.version)
+
+    def for_database(self, database: Dict):
+        """The index for an in-memory database"""
+        return self._get(database, lambda: database_version(database))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Deterministic /find intent parser built from the database vocabulary.
+Weapon names, modes and categories (plus a few common aliases such as "lr",
+"cqb", "rebirth" or "dmr") come from the loaded database, so a query like
+"c9 verdansk close range" resolves straight to its loadout without a round
+trip to Azure OpenAI. Anything ambiguous - several weapons, no matching
+loadout, more than one possible category - is left to the LLM.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from gun_index import clean_gun_name, weapon_id
+
+# alias -> canonical mode / category label; only aliases whose target exists are used
+MODE_ALIASES = {
+    "rebirth": "Resurgence", "resu": "Resurgence", "resurg": "Resurgence",
+    "wz": "Verdansk", "br": "Verdansk",
+    "mp": "Multiplayer", "multi": "Multiplayer",
+}
+RANGE_ALIASES = {
+    "lr": "Long Range", "long": "Long Range",
+    "cr": "Close Range", "close": "Close Range", "short": "Close Range", "cqb": "Close Range",
+    "snipe": "Sniper", "snipers": "Sniper", "sniping": "Sniper",
+    "ar": "Assault Rifle", "assault": "Assault Rifle",
+    "smgs": "SMG", "shotguns": "Shotgun", "lmgs": "LMG",
+    "marksman": "Marksman Rifle", "dmr": "Marksman Rifle",
+    "pistols": "Pistol", "handgun": "Pistol", "secondary": "Pistol",
+}
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+class Intent(NamedTuple):
+    """A query resolved to one loadout"""
+    weapon_id: str
+    weapon: str
+    mode: str
+    range: str
+    loadout: Dict
+
+class ParsedQuery(NamedTuple):
+    """Whatever parts of a query were recognised; weapon_ids has every candidate"""
+    weapon_ids: Tuple[str, ...]
+    mode: Optional[str]
+    range: Optional[str]
+
+class IntentParser:
+    def __init__(self, database: Dict):
+        self.weapons: Dict[str, str] = {}                        # weapon id -> display name
+        self.categories: Dict[str, List[Tuple[str, str]]] = {}   # weapon id -> [(mode, range)]
+        self.loadouts: Dict[Tuple[str, str, str], Dict] = {}     # (mode, range, weapon id) -> loadout
+        modes, ranges = set(), set()
+
+        for category_key, guns in database.get("categories", {}).items():
+            if "_" not in category_key:
+                continue
+            mode, range_type = category_key.split("_", 1)
+            modes.add(mode)
+            ranges.add(range_type)
+            for gun in guns:
+                wid = weapon_id(gun["gun"])
+                self.weapons.setdefault(wid, clean_gun_name(gun["gun"]))
+                if (mode, range_type, wid) not in self.loadouts:
+                    self.loadouts[(mode, range_type, wid)] = gun
+                    self.categories.setdefault(wid, []).append((mode, range_type))
+
+        self.compact_weapons = {wid.replace("-", ""): wid for wid in self.weapons}
+        self.mode_words = {mode.lower(): mode for mode in modes}
+        self.mode_words.update({alias: mode for alias, mode in MODE_ALIASES.items() if mode in modes})
+        self.range_phrases = {tuple(tokenize(range_type)): range_type for range_type in ranges}
+        self.range_phrases.update({(alias,): range_type for alias, range_type in RANGE_ALIASES.items()
+                                   if range_type in ranges})
+        self.hits = 0
+        self.misses = 0
+
+    def _match_weapons(self, tokens: List[str]) -> Tuple[Tuple[str, ...], set]:
+        """Weapon ids named in tokens and the token positions they used"""
+        for size in (3, 2, 1):  # "ak 74" / "krig c" before single words
+            for start in range(len(tokens) - size + 1):
+                compact = "".join(tokens[start:start + size])
+                if compact in self.compact_weapons:
+                    return (self.compact_weapons[compact],), set(range(start, start + size))
+
+        for position, token in enumerate(tokens):
+            if len(token) < 3 or not token[0].isalpha() or token in self.mode_words:
+                continue
+            if any(token in phrase for phrase in self.range_phrases):
+                continue
+            matches = tuple(wid for compact, wid in self.compact_weapons.items() if compact.startswith(token))
+            if matches:
+                return matches, {position}
+        return (), set()
+
+    def parse(self, query: str) -> ParsedQuery:
+        tokens = tokenize(query)
+        weapon_ids, used = self._match_weapons(tokens)
+        rest = [token for position, token in enumerate(tokens) if position not in used]
+
+        mode = next((self.mode_words[token] for token in rest if token in self.mode_words), None)
+        range_type = None
+        for phrase, label in sorted(self.range_phrases.items(), key=lambda item: -len(item[0])):
+            if any(tuple(rest[i:i + len(phrase)]) == phrase for i in range(len(rest) - len(phrase) + 1)):
+                range_type = label
+                break
+        return ParsedQuery(weapon_ids, mode, range_type)
+
+    def resolve(self, query: str) -> Optional[Intent]:
+        """The single loadout a query names, or None when the LLM should clarify"""
+        parsed = self.parse(query)
+        intent = None
+        if len(parsed.weapon_ids) == 1 and (parsed.mode or parsed.range):
+            wid = parsed.weapon_ids[0]
+            candidates = [(mode, range_type) for mode, range_type in self.categories.get(wid, [])
+                          if (parsed.mode is None or mode == parsed.mode)
+                          and (parsed.range is None or range_type == parsed.range)]
+            if len(candidates) == 1:
+                mode, range_type = candidates[0]
+                intent = Intent(wid, self.weapons[wid], mode, range_type, self.loadouts[(mode, range_type, wid)])
+
+        if intent is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return intent
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def samples(self):
+        """Fast-path counters for bot_metrics.METRICS.register_collector"""
+        stats = self.stats()
+        yield ("gunbot_intent_fastpath_total", "counter", "/find queries resolved locally (hit) or sent to the LLM (miss)",
+               {"result": "hit"}, stats["hits"])
+        yield ("gunbot_intent_fastpath_total", "counter", "/find queries resolved locally (hit) or sent to the LLM (miss)",
+               {"result": "miss"}, stats["misses"])
+        yield ("gunbot_intent_fastpath_hit_ratio", "gauge", "Share of /find queries that skipped the LLM", {},
+               stats["hit_rate"])
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Token and latency accounting for Azure OpenAI calls.
+Every compose_query call is recorded with its prompt and completion tokens,
+latency, model and outcome (search_ready, continue, error, timeout) and
+aggregated per hour and per user. The prompt is also split into its parts -
+fixed instructions, the embedded categories JSON, earlier history and the
+new message - so the report shows which of them the tokens are spent on.
+
+Token counts come from the API's usage block when it has one; streamed
+replies carry none on this API version, so those are estimated at ~4
+characters per token (the same estimate the session store uses).
+
+Configuration (environment):
+    AI_USAGE_LOG     append every call as a JSON line to this file (default off)
+    AI_USAGE_HOURS   hourly buckets kept in memory (default 48)
+
+Usage:
+    python llm_usage.py ai_usage.jsonl [--top 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+COMPONENTS = ("instructions", "categories", "history", "message")
+MESSAGE_OVERHEAD = 4  # tokens the chat format adds per message
+
+def count_tokens(text: str) -> int:
+    return len(text or "") // 4
+
+def prompt_components(system_prompt: str, categories_json: str, conversation: List[Dict]) -> Dict[str, int]:
+    """Estimated prompt tokens per component; categories_json is the part of system_prompt it embeds"""
+    categories = count_tokens(categories_json)
+    return {
+        "instructions": max(0, count_tokens(system_prompt) - categories) + MESSAGE_OVERHEAD,
+        "categories": categories,
+        "history": sum(count_tokens(m.get("content")) + MESSAGE_OVERHEAD for m in conversation[:-1]),
+        "message": sum(count_tokens(m.get("content")) + MESSAGE_OVERHEAD for m in conversation[-1:]),
+    }
+
+def hour_of(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:00", time.gmtime(timestamp))
+
+def _bucket() -> Dict:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency": 0.0, "estimated": 0}
+
+def _add(bucket: Dict, record: Dict):
+    bucket["calls"] += 1
+    bucket["prompt_tokens"] += record["prompt_tokens"]
+    bucket["completion_tokens"] += record["completion_tokens"]
+    bucket["latency"] += record["latency"]
+    bucket["estimated"] += 1 if record["estimated"] else 0
+
+class UsageLedger:
+    def __init__(self, max_hours: int = 48, path: Optional[str] = None, name: str = "compose_query",
+                 metrics: bool = True):
+        self.max_hours = max_hours
+        self.path = path
+        self.name = name
+        self.totals: Dict[tuple, Dict] = {}                  # (model, outcome) -> bucket
+        self.components: Dict[str, int] = {component: 0 for component in COMPONENTS}
+        self.hours: "OrderedDict[str, Dict]" = OrderedDict()  # hour -> {"total": bucket, "users": {user: bucket}}
+        self._pending: List[Dict] = []
+        self.metrics = metrics
+        if metrics:
+            from bot_metrics import METRICS
+            METRICS.register_collector(self._samples)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "UsageLedger":
+        return cls(
+            max_hours=int(os.getenv("AI_USAGE_HOURS", 48)),
+            path=os.getenv("AI_USAGE_LOG") or None,
+            **kwargs,
+        )
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "UsageLedger":
+        """Rebuild a ledger from an AI_USAGE_LOG file (keeps every hour in it)"""
+        ledger = cls(max_hours=10 ** 6, metrics=False, **kwargs)
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    ledger.add(json.loads(line))
+        return ledger
+
+    def record(self, user: Optional[str], model: str, outcome: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, components: Dict[str, int], estimated: bool = False) -> Dict:
+        """Account one LLM call"""
+        record = {
+            "time": time.time(), "user": user or "unknown", "model": model, "outcome": outcome,
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "latency": round(latency, 4), "estimated": estimated, "components": components,
+        }
+        self.add(record)
+        if self.path:
+            self._pending.append(record)
+        if self.metrics:
+            from bot_metrics import METRICS
+            labels = {"model": model, "outcome": outcome}
+            METRICS.inc("gunbot_llm_calls_total", "LLM calls by model and outcome", labels)
+            METRICS.inc("gunbot_llm_prompt_tokens_total", "Prompt tokens sent to the LLM", labels, prompt_tokens)
+            METRICS.inc("gunbot_llm_completion_tokens_total", "Completion tokens returned by the LLM", labels,
+                        completion_tokens)
+            METRICS.observe("gunbot_llm_call_seconds", "LLM call latency", latency, {"outcome": outcome})
+            for component, tokens in components.items():
+                METRICS.inc("gunbot_llm_prompt_component_tokens_total",
+                            "Estimated prompt tokens by prompt component", {"component": component}, tokens)
+        return record
+
+    def add(self, record: Dict):
+        """Fold a record into the totals, the per-component sums and its hour"""
+        _add(self.totals.setdefault((record["model"], record["outcome"]), _bucket()), record)
+        for component, tokens in record.get("components", {}).items():
+            self.components[component] = self.components.get(component, 0) + tokens
+
+        hour = hour_of(record["time"])
+        if hour not in self.hours:
+            self.hours[hour] = {"total": _bucket(), "users": {}}
+            while len(self.hours) > self.max_hours:
+                self.hours.popitem(last=False)
+        bucket = self.hours[hour]
+        _add(bucket["total"], record)
+        _add(bucket["users"].setdefault(record["user"], _bucket()), record)
+
+    async def persist(self):
+        """Append pending records to AI_USAGE_LOG off the loop"""
+        if not self.path or not self._pending:
+            return
+        from bot_executor import run_blocking
+        pending, self._pending = self._pending, []
+        try:
+            await run_blocking(self._append, pending)
+        except Exception as e:
+            print(f"⚠️ Could not write LLM usage log: {e}")
+
+    def _append(self, records: List[Dict]):
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def summary(self) -> Dict:
+        total = _bucket()
+        for bucket in self.totals.values():
+            for field in total:
+                total[field] += bucket[field]
+        by_outcome: Dict[str, int] = {}
+        for (_, outcome), bucket in self.totals.items():
+            by_outcome[outcome] = by_outcome.get(outcome, 0) + bucket["calls"]
+        component_total = sum(self.components.values()) or 1
+        return {
+            **total,
+            "mean_latency": total["latency"] / total["calls"] if total["calls"] else 0.0,
+            "outcomes": by_outcome,
+            "components": {c: {"tokens": t, "share": t / component_total} for c, t in self.components.items()},
+        }
+
+    def top_users(self, hour: Optional[str] = None, limit: int = 10) -> List[tuple]:
+        """[(user, bucket)] by total tokens in an hour (default: the latest)"""
+        if not self.hours:
+            return []
+        users = self.hours[hour or next(reversed(self.hours))]["users"]
+        ranked = sorted(users.items(), key=lambda item: -(item[1]["prompt_tokens"] + item[1]["completion_tokens"]))
+        return ranked[:limit]
+
+    def report(self, top: int = 10) -> str:
+        summary = self.summary()
+        if not summary["calls"]:
+            return "📭 No LLM calls recorded"
+        lines = [
+            f"🧮 {summary['calls']} LLM calls, {summary['prompt_tokens']} prompt + "
+            f"{summary['completion_tokens']} completion tokens, mean latency {summary['mean_latency'] * 1000:.0f}ms"
+            + (f" ({summary['estimated']} streamed calls estimated)" if summary["estimated"] else ""),
+            "   Outcomes: " + ", ".join(f"{outcome} {calls}" for outcome, calls in sorted(summary["outcomes"].items())),
+            "   Prompt tokens by component:",
+        ]
+        for component, stats in sorted(summary["components"].items(), key=lambda item: -item[1]["tokens"]):
+            lines.append(f"     {component:<13}{stats['tokens']:>10} tokens  {stats['share']:>6.1%}")
+        lines.append("   Per hour (UTC):")
+        for hour, bucket in self.hours.items():
+            total = bucket["total"]
+            lines.append(f"     {hour}  {total['calls']:>6} calls {total['prompt_tokens']:>9} prompt "
+                         f"{total['completion_tokens']:>8} completion  {len(bucket['users'])} users")
+        lines.append(f"   Top users in {next(reversed(self.hours))}:")
+        for user, bucket in self.top_users(limit=top):
+            lines.append(f"     {user:<22}{bucket['calls']:>6} calls "
+                         f"{bucket['prompt_tokens'] + bucket['completion_tokens']:>9} tokens")
+        return "\n".join(lines)
+
+    def _samples(self):
+        if not self.hours:
+            return
+        hour = next(reversed(self.hours))
+        total = self.hours[hour]["total"]
+        yield ("gunbot_llm_hour_calls", "gauge", "LLM calls in the current UTC hour", {}, total["calls"])
+        for kind in ("prompt", "completion"):
+            yield ("gunbot_llm_hour_tokens", "gauge", "LLM tokens in the current UTC hour", {"kind": kind},
+                   total[f"{kind}_tokens"])
+        yield ("gunbot_llm_hour_users", "gauge", "Users who reached the LLM in the current UTC hour", {},
+               len(self.hours[hour]["users"]))
+        for user, bucket in self.top_users(hour):  # top users only, to bound label cardinality
+            yield ("gunbot_llm_user_hour_tokens", "gauge", "LLM tokens of the heaviest users in the current UTC hour",
+                   {"user": user}, bucket["prompt_tokens"] + bucket["completion_tokens"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise an AI_USAGE_LOG file")
+    parser.add_argument("path", nargs="?", default=os.getenv("AI_USAGE_LOG", "ai_usage.jsonl"))
+    parser.add_argument("--top", type=int, default=10, help="users listed for the latest hour")
+    args = parser.parse_args(argv)
+    try:
+        ledger = UsageLedger.load(args.path)
+    except FileNotFoundError:
+        print(f"❌ {args.path} not found - set AI_USAGE_LOG on the bot to record calls")
+        return 1
+    print(ledger.report(args.top))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
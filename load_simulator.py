@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Offline Discord interaction load simulator.
+Fires thousands of concurrent slash command and autocomplete invocations at the
+real handlers of discord_search_bot.py and discord_ai_bot.py on one asyncio
+loop, using fake Interaction/response/followup objects instead of a gateway.
+Reports end-to-end handler latency, event-loop lag and error rates.
+
+Usage:
+    python load_simulator.py --bot search --requests 5000 --concurrency 500
+    python load_simulator.py --bot ai --ai-latency 0.3
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List
+
+from bot_metrics import percentile
+
+class SimulatedProtocolError(Exception):
+    """A handler used the interaction in a way Discord would reject"""
+
+class FakeMessage:
+    def __init__(self, content=None, embed=None, view=None):
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.edits = 0
+        self.created = time.perf_counter()
+
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        self.content = content if content is not None else self.content
+        self.embed = embed if embed is not None else self.embed
+        self.edits += 1
+        return self
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _acknowledge(self):
+        if self._done:
+            raise SimulatedProtocolError("interaction already acknowledged")
+        await asyncio.sleep(self.interaction.discord_latency)
+        self._done = True
+
+    async def defer(self, **kwargs):
+        await self._acknowledge()
+
+    async def send_message(self, content=None, embed=None, view=None, **kwargs):
+        await self._acknowledge()
+        self.interaction.messages.append(FakeMessage(content, embed, view))
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        await self._acknowledge()
+
+    async def autocomplete(self, choices):
+        await self._acknowledge()
+        self.interaction.choices = choices
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, view=None, wait=False, **kwargs):
+        if not self.interaction.response.is_done():
+            raise SimulatedProtocolError("followup sent before the interaction was acknowledged")
+        if content is not None and len(content) > 2000:
+            raise SimulatedProtocolError(f"message content is {len(content)} characters (max 2000)")
+        await asyncio.sleep(self.interaction.discord_latency)
+        message = FakeMessage(content, embed, view)
+        self.interaction.messages.append(message)
+        return message
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"sim-user-{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self):
+        return self.name
+
+class FakeInteraction:
+    def __init__(self, user_id: int, discord_latency: float = 0.0):
+        self.user = FakeUser(user_id)
+        self.id = random.getrandbits(63)
+        self.guild_id = 1
+        self.channel_id = 1
+        self.discord_latency = discord_latency
+        self.messages: List[FakeMessage] = []
+        self.choices = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+class ScriptedAI:
+    """Offline stand-in for AzureGunBotAI with a fixed response delay"""
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def compose_query(self, conversation_history: List[Dict], available_categories: Dict, on_text=None,
+                            user_id=None) -> str:
+        await asyncio.sleep(self.latency)
+        last = conversation_history[-1]["content"].lower()
+        if "verdansk" in last and "close" in last:
+            weapon = last.split()[0]
+            return f"SEARCH_READY: Verdansk_Close Range_{weapon}"
+        return "🎯 Which mode? **Resurgence** or **Verdansk**? And which range?"
+
+def search_bot_workload(bot_module, weapons: List[str], modes: List[str], ranges: List[str]) -> List[tuple]:
+    """(name, weight, coroutine factory) for discord_search_bot handlers"""
+    tree = bot_module.bot.tree
+
+    def command(name, **kwargs):
+        callback = tree.get_command(name).callback
+        return lambda interaction: callback(interaction, **{k: v() for k, v in kwargs.items()})
+
+    def autocomplete(fn, current):
+        async def run(interaction):
+            return await fn(interaction, current())
+        return run
+
+    pick = random.choice
+    workload = [
+        ("search", 30, command("search", weapon_name=lambda: pick(weapons)[:random.randint(2, 6)])),
+        ("gun", 15, command("gun", weapon_name=lambda: pick(weapons))),
+        ("top", 15, command("top", mode=lambda: pick(modes), range_type=lambda: pick(ranges))),
+        ("stats", 5, command("stats")),
+        ("autocomplete:mode", 10, autocomplete(bot_module.mode_autocomplete, lambda: pick(modes)[:2])),
+        ("autocomplete:range_type", 10, autocomplete(bot_module.range_type_autocomplete, lambda: pick(ranges)[:2])),
+    ]
+    for name, arg in (("where", "weapon_name"), ("similar", "weapon_name")):
+        if tree.get_command(name):
+            workload.append((name, 5, command(name, **{arg: lambda: pick(weapons)})))
+    if hasattr(bot_module, "GunButton"):
+        from gun_index import load_gun_index
+        custom_ids = [f"gun:{category}:{wid}" for category, wid in load_gun_index().loadouts]
+
+        async def click(interaction):
+            # Route a click by custom_id the way the view store does for dynamic items
+            button = bot_module.discord.ui.Button(label="1", custom_id=pick(custom_ids))
+            match = bot_module.GunButton.__discord_ui_compiled_template__.fullmatch(button.custom_id)
+            item = await bot_module.GunButton.from_custom_id(interaction, button, match)
+            await item.callback(interaction)
+
+        workload.append(("button", 10, click))
+    return workload
+
+def ai_bot_workload(bot_module, weapons: List[str]) -> List[tuple]:
+    """(name, weight, coroutine factory) for discord_ai_bot handlers"""
+    tree = bot_module.bot.tree
+    find = tree.get_command("find").callback
+    search = tree.get_command("search").callback
+    pick = random.choice
+    return [
+        ("find", 60, lambda interaction: find(interaction, query=random.choice([
+            f"{pick(weapons)} verdansk close range", f"show me {pick(weapons)}", "best sniper"]))),
+        ("search", 40, lambda interaction: search(interaction, weapon_name=pick(weapons)[:4])),
+    ]
+
+async def measure_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01):
+    """Record how late the loop wakes a sleeping task, in seconds"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+async def run_simulation(workload: List[tuple], requests: int, concurrency: int,
+                         discord_latency: float) -> Dict:
+    names = [name for name, _, _ in workload]
+    weights = [weight for _, weight, _ in workload]
+    factories = {name: factory for name, _, factory in workload}
+
+    latencies = defaultdict(list)
+    errors = defaultdict(lambda: defaultdict(int))
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def invoke(name: str, user_id: int):
+        interaction = FakeInteraction(user_id, discord_latency)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await factories[name](interaction)
+            except Exception as e:
+                errors[name][type(e).__name__] += 1
+            latencies[name].append(time.perf_counter() - start)
+
+    from single_flight import SINGLE_FLIGHT
+    saved_before = sum(SINGLE_FLIGHT.saved.values())
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        invoke(random.choices(names, weights=weights)[0], random.randint(1, max(1, requests // 4)))
+        for _ in range(requests)
+    ))
+    wall = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    report = {"requests": requests, "concurrency": concurrency, "wall_s": wall,
+              "throughput_rps": requests / wall if wall else 0.0, "commands": {},
+              "coalesced": sum(SINGLE_FLIGHT.saved.values()) - saved_before}
+    for name in names:
+        values = latencies.get(name, [])
+        error_count = sum(errors[name].values())
+        report["commands"][name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "error_rate": error_count / len(values) if values else 0.0,
+            "errors": dict(errors[name]),
+        }
+    report["loop_lag"] = {
+        "samples": len(lag_samples),
+        "p50_ms": percentile(lag_samples, 50) * 1000,
+        "p99_ms": percentile(lag_samples, 99) * 1000,
+        "max_ms": max(lag_samples, default=0.0) * 1000,
+    }
+    return report
+
+def print_report(title: str, report: Dict):
+    print(f"\n🤖 {title}: {report['requests']} invocations, {report['concurrency']} in flight, "
+          f"{report['wall_s']:.2f}s ({report['throughput_rps']:.0f}/s)")
+    print(f"   {'command':<26}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, stats in report["commands"].items():
+        print(f"   {name:<26}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+              f"{stats['p99_ms']:>10.1f}{stats['error_rate']:>8.0%}")
+        for error, count in stats["errors"].items():
+            print(f"      ❌ {error}: {count}")
+    lag = report["loop_lag"]
+    print(f"   ⏱️ Event-loop lag: p50 {lag['p50_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms, max {lag['max_ms']:.1f}ms")
+    print(f"   🤝 Executions saved by single-flight coalescing: {report['coalesced']}")
+
+def load_vocabulary():
+    from gun_index import load_gun_index
+    index = load_gun_index()
+    weapons = sorted(index.weapons.values()) or ["ak-74", "c9", "kar98k"]
+    categories = list(index.database.get("categories", {}))
+    modes = sorted({key.split("_", 1)[0] for key in categories}) or ["Resurgence"]
+    ranges = sorted({key.split("_", 1)[1] for key in categories if "_" in key}) or ["Long Range"]
+    return weapons, modes, ranges
+
+async def main_async(args) -> Dict:
+    weapons, modes, ranges = load_vocabulary()
+    reports = {}
+
+    if args.bot in ("search", "both"):
+        import discord_search_bot
+        workload = search_bot_workload(discord_search_bot, weapons, modes, ranges)
+        reports["discord_search_bot"] = await run_simulation(workload, args.requests, args.concurrency,
+                                                             args.discord_latency)
+        print_report("discord_search_bot", reports["discord_search_bot"])
+
+    if args.bot in ("ai", "both"):
+        # The AI bot builds its OpenAI client at import time; give it placeholder credentials
+        os.environ.setdefault("AZURE_OPENAI_KEY", "load-simulator")
+        os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+        import discord_ai_bot
+        discord_ai_bot.gun_bot.ai_client = ScriptedAI(args.ai_latency)
+        workload = ai_bot_workload(discord_ai_bot, weapons)
+        reports["discord_ai_bot"] = await run_simulation(workload, args.requests, args.concurrency,
+                                                         args.discord_latency)
+        print_report("discord_ai_bot", reports["discord_ai_bot"])
+
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent Discord command traffic offline")
+    parser.add_argument("--bot", choices=["search", "ai", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="max invocations in flight")
+    parser.add_argument("--discord-latency", type=float, default=0.0, help="seconds per fake Discord API call")
+    parser.add_argument("--ai-latency", type=float, default=0.2, help="seconds per scripted AI reply")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    print("🚦 Discord Interaction Load Simulator")
+    print("=" * 50)
+
+    reports = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
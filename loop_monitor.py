@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Event-loop lag monitor and slow-callback reporting for the bots.
+A sampler task measures how late the loop wakes it (scheduling lag), and a
+task factory times every step a task runs on the loop, so a callback that
+blocks for longer than the threshold is logged with the slash command that
+triggered it. Rolling percentiles are exposed through snapshot() for the
+health/metrics endpoints in start.py.
+
+Configuration (environment):
+    LOOP_MONITOR_ENABLED    1/true to enable (default off)
+    LOOP_MONITOR_INTERVAL   seconds between lag samples (default 0.25)
+    LOOP_MONITOR_SLOW_MS    step duration that counts as slow (default 100)
+"""
+import os
+import time
+import asyncio
+import datetime
+import contextvars
+from collections import deque
+from typing import Dict, Optional
+
+from bot_metrics import percentile
+
+current_command: contextvars.ContextVar = contextvars.ContextVar("current_command", default=None)
+
+class _TimedCoroutine:
+    """Drives a coroutine step by step, reporting steps that hold the loop too long"""
+    def __init__(self, coro, monitor: "LoopMonitor", task_name: Optional[str]):
+        self.coro = coro
+        self.monitor = monitor
+        self.task_name = task_name
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            try:
+                yielded = self.coro.throw(error) if error is not None else self.coro.send(value)
+            except StopIteration as stop:
+                self.monitor._record_step(time.perf_counter() - start, self.task_name)
+                return stop.value
+            except BaseException:
+                self.monitor._record_step(time.perf_counter() - start, self.task_name)
+                raise
+            self.monitor._record_step(time.perf_counter() - start, self.task_name)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.25, slow_threshold_ms: float = 100.0,
+                 window: int = 2400, enabled: bool = True):
+        self.enabled = enabled
+        self.interval = interval
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.lag_samples = deque(maxlen=window)
+        self.slow_callbacks = deque(maxlen=50)
+        self.slow_count = 0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor":
+        return cls(
+            interval=float(os.getenv("LOOP_MONITOR_INTERVAL", 0.25)),
+            slow_threshold_ms=float(os.getenv("LOOP_MONITOR_SLOW_MS", 100)),
+            enabled=os.getenv("LOOP_MONITOR_ENABLED", "").lower() in ("1", "true", "yes"),
+        )
+
+    def attach(self, tree):
+        """Tag each slash command's task with its name so slow steps can be attributed"""
+        original_check = tree.interaction_check
+
+        async def interaction_check(interaction) -> bool:
+            if interaction.command is not None:
+                current_command.set(f"/{interaction.command.qualified_name}")
+            return await original_check(interaction)
+
+        tree.interaction_check = interaction_check
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Install the task factory and lag sampler on the running loop (idempotent)"""
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        loop = loop or asyncio.get_running_loop()
+        monitor = self
+
+        def task_factory(loop, coro, **kwargs):
+            async def timed():
+                return await _TimedCoroutine(coro, monitor, getattr(coro, "__qualname__", None))
+            return asyncio.Task(timed(), loop=loop, **kwargs)
+
+        if loop.get_task_factory() is None:
+            loop.set_task_factory(task_factory)
+        self._task = loop.create_task(self._sample())
+        print(f"⏱️ Loop monitor started (sample every {self.interval}s, slow > {self.slow_threshold * 1000:.0f}ms)")
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.lag_samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def _record_step(self, duration: float, task_name: Optional[str]):
+        if duration < self.slow_threshold:
+            return
+        source = current_command.get() or task_name or "unknown"
+        self.slow_count += 1
+        self.slow_callbacks.append({
+            "source": source,
+            "duration_ms": round(duration * 1000, 1),
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        })
+        print(f"🐢 Slow callback: {source} blocked the event loop for {duration * 1000:.0f}ms")
+
+    def snapshot(self) -> Dict:
+        """Rolling lag percentiles (ms) and recent slow callbacks; safe to call from other threads"""
+        samples = list(self.lag_samples)
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "samples": len(samples),
+            "lag_p50_ms": percentile(samples, 50) * 1000,
+            "lag_p95_ms": percentile(samples, 95) * 1000,
+            "lag_p99_ms": percentile(samples, 99) * 1000,
+            "lag_max_ms": self.max_lag * 1000,
+            "slow_callbacks": self.slow_count,
+            "recent_slow_callbacks": list(self.slow_callbacks)[-10:],
+        }
+
+_monitor: Optional[LoopMonitor] = None
+
+def get_loop_monitor() -> LoopMonitor:
+    """Process-wide monitor configured from the environment"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor.from_env()
+    return _monitor
@@ -4,31 +4,8 @@ Performance test for local JSON vs theoretical database search
 """
 import time
 import json
-from difflib import SequenceMatcher
 
-def similarity(a, b):
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-
-def search_guns_local(query, all_guns, max_results=10):
-    """Current JSON search implementation"""
-    results = []
-    query_lower = query.lower()
-    
-    for gun in all_guns:
-        gun_name = gun["gun"].lower()
-        
-        # Exact match (highest priority)
-        if query_lower in gun_name:
-            score = 1.0 if query_lower == gun_name else 0.9
-            results.append((score, gun))
-        # Fuzzy match (lower priority)
-        elif similarity(query_lower, gun_name) > 0.6:
-            score = similarity(query_lower, gun_name) * 0.8
-            results.append((score, gun))
-    
-    # Sort by score and return top results
-    results.sort(key=lambda x: x[0], reverse=True)
-    return [gun for score, gun in results[:max_results]]
+from discord_search_bot import search_guns
 
 def main():
     print("⚡ Performance Testing: Local JSON Search")
@@ -61,9 +38,9 @@ def main():
     
     total_time = 0
     for query in test_queries:
-        start = time.time()
-        results = search_guns_local(query, all_guns)
-        end = time.time()
+        start = time.perf_counter()
+        results = search_guns(query, database=db)
+        end = time.perf_counter()
         
         search_time = (end - start) * 1000  # Convert to milliseconds
         total_time += search_time
@@ -83,6 +60,8 @@ def main():
     print("   ✅ Instant Discord bot responses") 
     print("   ✅ No network latency")
     print("   ✅ No external dependencies")
+    print()
+    print("📏 For percentiles and scaling runs: python benchmark_search.py")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Response cache for Azure OpenAI query-composition calls.
+Many /find conversations open with the same message ("best sniper",
+"show me c9"), so compose_query replies are cached by the normalized
+conversation plus a hash of the available categories. Entries expire after
+a TTL, the cache is size-bounded (LRU), and it is cleared whenever the
+categories change. Only successful model replies are ever stored.
+
+Configuration (environment):
+    AI_CACHE_MAX   max cached replies (default 500, 0 disables)
+    AI_CACHE_TTL   seconds a reply stays valid (default 900)
+"""
+import os
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+def normalize_message(content: str) -> str:
+    """Case, whitespace and trailing punctuation don't change the question"""
+    return re.sub(r"\s+", " ", (content or "").lower()).strip().rstrip("?!. ")
+
+def categories_hash(categories: Dict) -> str:
+    return hashlib.sha1(json.dumps(categories, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 500, ttl: float = 900.0, name: str = "compose_query"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[str, Tuple[float, str, float]]" = OrderedDict()  # key -> (stored at, reply, latency)
+        self._categories_hash: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+        from bot_metrics import METRICS
+        METRICS.register_collector(self._samples)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ResponseCache":
+        return cls(
+            max_entries=int(os.getenv("AI_CACHE_MAX", 500)),
+            ttl=float(os.getenv("AI_CACHE_TTL", 900)),
+            **kwargs,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def key(self, conversation: List[Dict], categories: Dict) -> str:
+        """Cache key for a conversation; clears the cache if the categories changed since the last call"""
+        current = categories_hash(categories)
+        if current != self._categories_hash:
+            if self._entries:
+                self.invalidations += 1
+                print(f"♻️ Categories changed ({self._categories_hash} → {current}) - cleared {len(self._entries)} cached replies")
+            self._entries.clear()
+            self._categories_hash = current
+        normalized = [(message["role"], normalize_message(message.get("content"))) for message in conversation]
+        payload = json.dumps([current, normalized], separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, reply: str, latency: float):
+        """Store a successful reply together with the latency a hit will save"""
+        if not self.enabled or not reply:
+            return
+        self._entries[key] = (time.monotonic(), reply, latency)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._categories_hash = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _samples(self):
+        stats = self.stats()
+        labels = {"cache": self.name}
+        yield ("gunbot_cache_hits_total", "counter", "Cache lookups served without rebuilding", labels, stats["hits"])
+        yield ("gunbot_cache_misses_total", "counter", "Cache lookups that rebuilt", labels, stats["misses"])
+        yield ("gunbot_cache_hit_ratio", "gauge", "Hits / lookups since start", labels, stats["hit_rate"])
+        yield ("gunbot_llm_cache_entries", "gauge", "Cached LLM replies", labels, stats["entries"])
+        yield ("gunbot_llm_cache_saved_seconds_total", "counter", "LLM latency avoided by cache hits", labels,
+               stats["saved_seconds"])
+        yield ("gunbot_llm_cache_evictions_total", "counter", "Cached LLM replies evicted for space", labels,
+               stats["evictions"])
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Structured /search queries compiled to posting-list intersections.
+A query is free text plus optional filters:
+
+    mode:verdansk  range:"close range"  class:smg  attachment:compensator
+    slot:optic  rank<=3
+
+Bare words that name a mode, range or weapon class ("close range smg",
+"best ar verdansk") become filters too, unless they are part of a weapon
+name. Every filter value maps to a sorted posting list of loadout positions,
+precomputed once per database version; the plan intersects the smallest
+lists first and only the surviving candidates are scored against the free
+text, so filtered queries never scan the whole database.
+"""
+import re
+import sys
+import time
+import numpy as np
+from difflib import SequenceMatcher
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from gun_index import GunIndex, DerivedIndexCache, clean_gun_name, weapon_id
+from intent_parser import MODE_ALIASES, RANGE_ALIASES, tokenize
+
+FIELDS = ("mode", "range", "class", "attachment", "slot")
+WARZONE_RANGES = ("Long Range", "Close Range", "Sniper")  # Warzone categories; Multiplayer ones are weapon classes
+STOPWORDS = {"best", "top", "meta", "the", "a", "an", "in", "for", "on", "with", "show", "me", "guns", "gun",
+             "loadout", "loadouts", "build", "builds", "class", "weapon", "weapons"}
+
+FILTER_PATTERN = re.compile(
+    r'(?P<field>[a-z]+):(?:"(?P<quoted>[^"]*)"|(?P<value>\S+))'
+    r'|rank\s*(?P<op><=|<)\s*(?P<rank>\d+)',
+    re.IGNORECASE,
+)
+
+class Filter(NamedTuple):
+    field: str
+    value: str           # as typed
+    labels: Tuple        # resolved vocabulary entries it matches (OR-ed)
+
+class ParsedSearch(NamedTuple):
+    text: str                     # free text left for name scoring
+    filters: Tuple[Filter, ...]
+    max_rank: Optional[int]
+    errors: Tuple[str, ...]       # filters that matched nothing in the vocabulary
+
+    @property
+    def structured(self) -> bool:
+        return bool(self.filters or self.max_rank is not None or self.errors)
+
+class PlanStep(NamedTuple):
+    filter: Filter
+    postings: np.ndarray
+
+class Plan(NamedTuple):
+    steps: Tuple[PlanStep, ...]   # smallest posting list first
+    max_rank: Optional[int]
+    text: str
+
+    def explain(self) -> str:
+        parts = [f"{step.filter.field}={'|'.join(map(str, step.filter.labels))} ({len(step.postings)})"
+                 for step in self.steps]
+        if self.max_rank is not None:
+            parts.append(f"rank<={self.max_rank}")
+        return " ∩ ".join(parts or ["all"]) + (f" → text '{self.text}'" if self.text else "")
+
+def name_score(query: str, name: str) -> float:
+    """search_guns' name scoring: substring hits, then SequenceMatcher ratio above 0.6"""
+    name = name.lower()
+    if query in name:
+        return 1.0 if query == name else 0.9
+    ratio = SequenceMatcher(None, query, name).ratio()
+    return ratio * 0.8 if ratio > 0.6 else 0.0
+
+class FilterIndex:
+    def __init__(self, index: GunIndex):
+        start = time.perf_counter()
+        self.index = index
+        self.version = index.version
+        entries = index.entries
+        self.ranks = np.array([gun.get("rank", 0) for gun in entries], dtype=np.int32)
+        names: Dict[str, int] = {}
+        self.name_ids = np.array([names.setdefault(clean_gun_name(gun["gun"]).lower(), len(names)) for gun in entries],
+                                 dtype=np.int32)
+        self.names = list(names)  # name id -> lowercase weapon name
+
+        lists: Dict[str, Dict[str, List[int]]] = {field: {} for field in FIELDS}
+        for position, gun in enumerate(entries):
+            lists["mode"].setdefault(gun["mode"], []).append(position)
+            lists["range"].setdefault(gun["range"], []).append(position)
+        for (name, slot), positions in index.attachments.items():
+            lists["attachment"][f"{name} — {slot}"] = positions
+            lists["slot"].setdefault(slot, []).extend(positions)
+
+        # Weapon class comes from the Multiplayer categories and applies to the weapon in every mode
+        by_weapon: Dict[str, List[int]] = {}
+        class_weapons: Dict[str, set] = {}
+        for position, gun in enumerate(entries):
+            wid = weapon_id(gun["gun"])
+            by_weapon.setdefault(wid, []).append(position)
+            if gun["mode"] == "Multiplayer":
+                class_weapons.setdefault(gun["range"], set()).add(wid)
+        for label, weapons in class_weapons.items():
+            lists["class"][label] = [position for wid in weapons for position in by_weapon[wid]]
+
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {
+            field: {label: np.unique(np.array(positions, dtype=np.int32)) for label, positions in values.items()}
+            for field, values in lists.items()
+        }
+
+        # Bare-word vocabulary: phrase tokens -> (field, label)
+        self.vocabulary: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        for mode in self.postings["mode"]:
+            self.vocabulary[tuple(tokenize(mode))] = ("mode", mode)
+        for alias, mode in MODE_ALIASES.items():
+            if mode in self.postings["mode"]:
+                self.vocabulary[(alias,)] = ("mode", mode)
+        # "sniper" / "close range" are Warzone categories; "smg" / "ar" are weapon classes
+        for label in list(self.postings["class"]) + list(self.postings["range"]):
+            field = "range" if label in WARZONE_RANGES or label not in self.postings["class"] else "class"
+            self.vocabulary[tuple(tokenize(label))] = (field, label)
+        for alias, label in RANGE_ALIASES.items():
+            field = "range" if label in WARZONE_RANGES or label not in self.postings["class"] else "class"
+            if label in self.postings[field]:
+                self.vocabulary[(alias,)] = (field, label)
+        self.name_tokens = {token for name in index.weapons.values() for token in tokenize(name)}
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    def resolve(self, field: str, value: str) -> Tuple:
+        """Vocabulary labels a filter value matches (case/punctuation-insensitive, aliases, prefixes)"""
+        value = value.replace("_", " ").strip()
+        if field == "attachment":
+            return tuple(f"{name} — {slot}" for name, slot in self.index.resolve_attachment(value))
+        key = tuple(tokenize(value))
+        if not key:
+            return ()
+        known = self.postings[field]
+        if field in ("mode", "range", "class") and key in self.vocabulary:
+            vocab_field, label = self.vocabulary[key]
+            if vocab_field == field or (field == "range" and label in self.postings["range"]):
+                return (label,)
+        exact = [label for label in known if tuple(tokenize(label)) == key]
+        if exact:
+            return tuple(exact)
+        compact = "".join(key)
+        return tuple(label for label in known if "".join(tokenize(label)).startswith(compact))
+
+    def parse(self, query: str) -> ParsedSearch:
+        filters, errors = [], []
+        max_rank = None
+
+        def take(match) -> str:
+            nonlocal max_rank
+            if match.group("rank") is not None:
+                limit = int(match.group("rank")) - (1 if match.group("op") == "<" else 0)
+                max_rank = limit if max_rank is None else min(max_rank, limit)
+                return " "
+            field = match.group("field").lower()
+            field = {"cat": "range", "category": "range", "att": "attachment", "type": "class"}.get(field, field)
+            if field not in FIELDS:
+                return match.group(0)  # not a filter ("ak:47"?) - leave as text
+            value = match.group("quoted") if match.group("quoted") is not None else match.group("value")
+            labels = self.resolve(field, value)
+            if labels:
+                filters.append(Filter(field, value, labels))
+            else:
+                errors.append(f"{field}:{value}")
+            return " "
+
+        rest = FILTER_PATTERN.sub(take, query)
+
+        # Bare words: longest vocabulary phrase first, unless the word belongs to a weapon name
+        tokens = tokenize(rest)
+        text_tokens = []
+        position = 0
+        phrases = sorted(self.vocabulary, key=len, reverse=True)
+        while position < len(tokens):
+            for phrase in phrases:
+                if tuple(tokens[position:position + len(phrase)]) == phrase and not (
+                        len(phrase) == 1 and phrase[0] in self.name_tokens):
+                    field, label = self.vocabulary[phrase]
+                    filters.append(Filter(field, " ".join(phrase), (label,)))
+                    position += len(phrase)
+                    break
+            else:
+                if tokens[position] not in STOPWORDS:
+                    text_tokens.append(tokens[position])
+                position += 1
+        return ParsedSearch(" ".join(text_tokens), tuple(filters), max_rank, tuple(errors))
+
+    def plan(self, parsed: ParsedSearch) -> Plan:
+        """One step per field (values of the same field are OR-ed), smallest first"""
+        by_field: Dict[str, List[Filter]] = {}
+        for item in parsed.filters:
+            by_field.setdefault(item.field, []).append(item)
+        steps = []
+        for field, items in by_field.items():
+            labels = tuple(dict.fromkeys(label for item in items for label in item.labels))
+            postings = [self.postings[field][label] for label in labels]
+            merged = postings[0] if len(postings) == 1 else np.unique(np.concatenate(postings))
+            steps.append(PlanStep(Filter(field, " | ".join(item.value for item in items), labels), merged))
+        steps.sort(key=lambda step: len(step.postings))
+        return Plan(tuple(steps), parsed.max_rank, parsed.text)
+
+    def execute(self, plan: Plan, limit: int = 10) -> List[Dict]:
+        """Intersect the posting lists, apply the rank cap, then score only the survivors"""
+        if plan.steps:
+            candidates = plan.steps[0].postings
+            for step in plan.steps[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, step.postings, assume_unique=True)
+        else:
+            candidates = np.arange(len(self.index.entries), dtype=np.int32)
+        if plan.max_rank is not None:
+            candidates = candidates[self.ranks[candidates] <= plan.max_rank]
+
+        if plan.text:
+            # Score each distinct weapon name once, however many loadouts it has
+            name_ids = np.unique(self.name_ids[candidates])
+            scores = np.zeros(len(self.names), dtype=np.float32)
+            scores[name_ids] = [name_score(plan.text, self.names[name_id]) for name_id in name_ids.tolist()]
+            candidate_scores = scores[self.name_ids[candidates]]
+            keep = candidate_scores > 0
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+            order = np.lexsort((candidates, self.ranks[candidates], -candidate_scores))
+            positions = candidates[order[:limit]].tolist()
+        else:
+            order = np.lexsort((candidates, self.ranks[candidates]))  # best rank first, then database order
+            positions = candidates[order[:limit]].tolist()
+        return [self.index.entries[position] for position in positions]
+
+    def search(self, query: str, limit: int = 10) -> Optional[List[Dict]]:
+        """Results for a structured query, or None when the query has no filters (plain name search)"""
+        parsed = self.parse(query)
+        if not parsed.structured:
+            return None
+        if parsed.errors:
+            return []
+        return self.execute(self.plan(parsed), limit)
+
+_filter_cache = DerivedIndexCache("filter_index", FilterIndex)
+filter_stats = _filter_cache.stats  # read by bot_metrics
+current_filter_index = _filter_cache.current
+load_filter_index = _filter_cache.load
+filter_index_for = _filter_cache.for_database
+
+def main(argv=None):
+    """Explain and run queries: python search_query.py "close range smg" "mode:verdansk slot:optic rank<=3" """
+    engine = load_filter_index()
+    print(f"🧩 Filter index for {len(engine.index.entries)} loadouts built in {engine.build_time_ms:.1f}ms")
+    for query in (argv if argv is not None else sys.argv[1:]) or ["close range smg", "best ar verdansk",
+                                                                  "mode:resurgence attachment:compensator rank<=3"]:
+        parsed = engine.parse(query)
+        print(f"\n🔍 {query}")
+        if parsed.errors:
+            print(f"   ❌ Unknown filter value: {', '.join(parsed.errors)}")
+            continue
+        plan = engine.plan(parsed)
+        print(f"   Plan: {plan.explain()}")
+        for gun in engine.execute(plan, 5):
+            print(f"   #{gun['rank']:<3} {clean_gun_name(gun['gun'])} - {gun['mode']} {gun['range']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Bounded conversation session store for the AI bot.
+Sessions are kept in LRU order, expire after an idle TTL, and are capped in
+number; each session's conversation is truncated (oldest messages first) to
+a prompt token budget so a long chat can't grow the Azure OpenAI request
+forever. Optionally the store is saved to a JSON file so conversations
+survive restarts; flush_sessions() writes every backed store on shutdown.
+
+Configuration (environment):
+    AI_SESSION_MAX           max concurrent sessions (default 1000)
+    AI_SESSION_TTL           idle seconds before a session is dropped (default 1800)
+    AI_SESSION_TOKEN_BUDGET  approx. prompt tokens kept per conversation (default 1500)
+    AI_SESSION_FILE          JSON file to persist sessions in (default off)
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+def estimate_tokens(message: Dict) -> int:
+    """Rough OpenAI token count: ~4 characters per token plus per-message overhead"""
+    return len(message.get("content") or "") // 4 + 4
+
+def truncate_conversation(conversation: List[Dict], token_budget: int) -> int:
+    """Drop the oldest messages until the conversation fits token_budget; returns how many were dropped
+
+    The newest message is always kept.
+    """
+    total = sum(estimate_tokens(message) for message in conversation)
+    dropped = 0
+    while total > token_budget and len(conversation) > 1:
+        total -= estimate_tokens(conversation.pop(0))
+        dropped += 1
+    return dropped
+
+_stores: "weakref.WeakSet[SessionStore]" = weakref.WeakSet()
+
+async def flush_sessions():
+    """Write every disk-backed store now, ignoring save_interval (call on shutdown)"""
+    for store in list(_stores):
+        await store.persist(force=True)
+
+def new_conversation() -> Dict:
+    return {"conversation": []}
+
+class SessionStore:
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800.0, token_budget: int = 1500,
+                 path: Optional[str] = None, factory: Callable[[], Dict] = new_conversation,
+                 name: str = "ai_bot", save_interval: float = 5.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.token_budget = token_budget
+        self.path = path
+        self.factory = factory
+        self.name = name
+        self.save_interval = save_interval
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()  # user id -> session, oldest first
+        self._last_seen: Dict[str, float] = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self._write_lock = threading.Lock()
+        self._generation = 0     # bumped per snapshot so a slow older write never replaces a newer file
+        self._written = 0
+        self.evictions = {"ttl": 0, "lru": 0}
+        self.truncated_messages = 0
+
+        if path:
+            self._load()
+        from bot_metrics import METRICS
+        METRICS.register_collector(self._samples)
+        _stores.add(self)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "SessionStore":
+        return cls(
+            max_sessions=int(os.getenv("AI_SESSION_MAX", 1000)),
+            ttl=float(os.getenv("AI_SESSION_TTL", 1800)),
+            token_budget=int(os.getenv("AI_SESSION_TOKEN_BUDGET", 1500)),
+            path=os.getenv("AI_SESSION_FILE") or None,
+            **kwargs,
+        )
+
+    def _expire(self, now: float):
+        """Drop idle sessions; the OrderedDict is in last-use order so this stops at the first live one"""
+        while self._sessions:
+            user_id = next(iter(self._sessions))
+            if now - self._last_seen[user_id] < self.ttl:
+                break
+            self._drop(user_id, "ttl")
+
+    def _drop(self, user_id: str, reason: str):
+        del self._sessions[user_id]
+        del self._last_seen[user_id]
+        self.evictions[reason] += 1
+        self._dirty = True
+
+    def _touch(self, user_id: str, now: float):
+        self._sessions.move_to_end(user_id)
+        self._last_seen[user_id] = now
+        self._dirty = True
+
+    def get(self, user_id: str) -> Dict:
+        """The user's session, creating it (and evicting the least recently used) if needed"""
+        now = time.time()
+        self._expire(now)
+        if user_id not in self._sessions:
+            while len(self._sessions) >= self.max_sessions:
+                self._drop(next(iter(self._sessions)), "lru")
+            self._sessions[user_id] = self.factory()
+        self._touch(user_id, now)
+        return self._sessions[user_id]
+
+    def reset(self, user_id: str) -> Dict:
+        """Start a fresh session for the user"""
+        self._sessions.pop(user_id, None)
+        self._last_seen.pop(user_id, None)
+        return self.get(user_id)
+
+    def add_message(self, user_id: str, role: str, content: str) -> Dict:
+        """Append to the user's conversation and truncate it to the token budget"""
+        session = self.get(user_id)
+        session["conversation"].append({"role": role, "content": content})
+        self.truncated_messages += truncate_conversation(session["conversation"], self.token_budget)
+        return session
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._sessions and time.time() - self._last_seen[user_id] < self.ttl
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "messages": sum(len(session.get("conversation", [])) for session in self._sessions.values()),
+            "evictions": dict(self.evictions),
+            "truncated_messages": self.truncated_messages,
+        }
+
+    def _samples(self):
+        stats = self.stats()
+        labels = {"store": self.name}
+        yield ("gunbot_sessions", "gauge", "Live AI conversation sessions", labels, stats["sessions"])
+        yield ("gunbot_session_messages", "gauge", "Messages held across AI sessions", labels, stats["messages"])
+        for reason, count in stats["evictions"].items():
+            yield ("gunbot_session_evictions_total", "counter", "AI sessions evicted",
+                   {**labels, "reason": reason}, count)
+        yield ("gunbot_session_truncated_messages_total", "counter",
+               "Messages dropped to keep conversations within the token budget", labels, stats["truncated_messages"])
+
+    # --- Optional disk backing ---
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for user_id, record in sorted(saved.items(), key=lambda item: item[1]["last_seen"]):
+            if now - record["last_seen"] < self.ttl:
+                self._sessions[user_id] = record["session"]
+                self._last_seen[user_id] = record["last_seen"]
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), "lru")
+        print(f"💬 Restored {len(self._sessions)} AI sessions from {self.path}")
+
+    def snapshot(self) -> Dict:
+        """JSON-ready copy of the store; take it on the loop, write it anywhere"""
+        return {user_id: {"last_seen": self._last_seen[user_id],
+                          "session": {**session, "conversation": list(session.get("conversation", []))}}
+                for user_id, session in self._sessions.items()}
+
+    def write(self, snapshot: Dict, generation: int = 0):
+        """Atomically replace the file; a unique temp file per write so overlapping writes can't interleave"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+            with self._write_lock:
+                if generation and generation < self._written:
+                    os.remove(tmp_path)  # a newer snapshot already landed
+                    return
+                os.replace(tmp_path, self.path)
+                self._written = max(self._written, generation)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def persist(self, force: bool = False):
+        """Save to disk off the loop if backed, changed, and save_interval has passed"""
+        if not self.path or not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < self.save_interval:
+            return
+        from bot_executor import run_blocking
+        self._dirty = False
+        self._last_save = now
+        self._generation += 1
+        try:
+            await run_blocking(self.write, self.snapshot(), self._generation)
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠️ Could not save AI sessions: {e}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing for identical concurrent commands.
+When many users run the same /search or /top at once (e.g. right after a
+meta update), the first request starts the computation and every identical
+request that arrives while it is running awaits the same result instead of
+loading and scoring again. Requests are identical when the command, its
+normalized arguments and the database file they read (path, mtime, size) all
+match.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+def database_key():
+    """Identity of the database file the factories will read, so a reload never joins a stale flight
+
+    Taken from the file itself rather than the last index built: after the file
+    changes, a new request gets a new key even before anything has reindexed,
+    and the computation it starts reads the new file. Only a stat, so it is
+    safe on the event loop.
+    """
+    from gun_index import database_file_key
+    return database_file_key()
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.executions: Dict[str, int] = {}  # command -> computations started
+        self.saved: Dict[str, int] = {}       # command -> requests that shared one
+
+    async def run(self, command: str, args: Tuple[Hashable, ...], factory: Callable[[], Awaitable],
+                  version: Hashable = None):
+        """Await factory() once per (command, args, version) among concurrent callers
+
+        The computation runs as its own task, so a caller that is cancelled does
+        not cancel it for the others. Exceptions are shared like results.
+        """
+        from bot_metrics import METRICS
+
+        key = (command, args, version if version is not None else database_key())
+        task = self._inflight.get(key)
+        if task is not None:
+            self.saved[command] = self.saved.get(command, 0) + 1
+            METRICS.inc("gunbot_singleflight_saved_total", "Requests served by an identical in-flight computation",
+                        {"command": command})
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        self.executions[command] = self.executions.get(command, 0) + 1
+        METRICS.inc("gunbot_singleflight_executions_total", "Computations started by the single-flight layer",
+                    {"command": command})
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": dict(self.executions),
+            "saved": dict(self.saved),
+        }
+
+SINGLE_FLIGHT = SingleFlight()
+
+async def coalesce(command: str, args: Tuple[Hashable, ...], factory: Callable[[], Awaitable], **kwargs):
+    """Shorthand for SINGLE_FLIGHT.run(...)"""
+    return await SINGLE_FLIGHT.run(command, args, factory, **kwargs)
@@ -1,21 +1,40 @@
 #!/usr/bin/env python3
 """
 Startup script for continuous Discord bot deployment on Render or other platforms.
-Downloads latest gun database and starts the Discord bot with health check server.
+Runs the Discord bot, the health/metrics HTTP server and the database
+refresher on a single asyncio loop. Startup phases overlap: the database
+download and index build run while the bot module is imported and the
+gateway logs in, and every phase is recorded on the startup timeline.
 """
 import os
 import sys
+import math
 import time
-import subprocess
-import threading
-import json
-from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import requests
+import signal
+import asyncio
 import datetime
+import importlib
+from pathlib import Path
+from typing import Optional
+from startup_timeline import get_timeline, STARTUP_BUDGET_SECONDS
+
+timeline = get_timeline()  # origin = process start, before the heavier imports below
+
+from aiohttp import web
+from loop_monitor import get_loop_monitor
+from bot_metrics import METRICS
+from bot_executor import run_blocking, shutdown_executor
+from session_store import flush_sessions
 
-webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
-if webhook_url:
+DATABASE_FILE = "all_guns_database.json"
+
+def post_deploy_webhook():
+    """Announce the deploy on DISCORD_WEBHOOK_URL (blocking; run it on the executor)"""
+    webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+    if not webhook_url:
+        return
+    import requests
+    
     requests.post(webhook_url, json={
         "embeds": [{
             "title": "🚀 B06 Meta Search Bot Re-Deployed",
@@ -24,23 +43,27 @@ if webhook_url:
             "footer": { "text": "Coolify Deploy" },
             "timestamp": datetime.datetime.utcnow().isoformat()
         }]
-    })
+    }, timeout=10)
 
 def download_latest_database():
     """Download the latest database before starting the bot"""
     print("🔄 Checking for latest gun database...")
     
+    # Try to download with environment variables
+    repo_owner = os.getenv('GITHUB_REPO_OWNER')
+    repo_name = os.getenv('GITHUB_REPO_NAME') 
+    github_token = os.getenv('GITHUB_TOKEN')
+    
+    if not repo_owner or not repo_name:
+        print("⚠️ GITHUB_REPO_OWNER/GITHUB_REPO_NAME not set - using local database")
+        return False
+    
     # Import the download function
     sys.path.append(str(Path(__file__).parent))
     
     try:
         from download_database import download_latest_database
         
-        # Try to download with environment variables
-        repo_owner = os.getenv('GITHUB_REPO_OWNER')
-        repo_name = os.getenv('GITHUB_REPO_NAME') 
-        github_token = os.getenv('GITHUB_TOKEN')
-        
         success = download_latest_database(repo_owner, repo_name, github_token)
         
         if success:
@@ -58,7 +81,7 @@ def check_database_exists():
     """Check if database file exists locally"""
     print(f"📁 Current working directory: {Path.cwd()}")
     print(f"📂 Files: {os.listdir()}")
-    db_path = Path("gun-database")
+    db_path = Path(DATABASE_FILE)
     if db_path.exists():
         print(f"✅ Database found: {db_path.stat().st_size} bytes")
         return True
@@ -66,109 +89,243 @@ def check_database_exists():
         print("❌ No database file found")
         return False
 
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    """Simple health check server for Render"""
-    
-    def do_GET(self):
-        if self.path == '/health':
-            # Check if database exists and bot is ready
-            db_exists = Path("gun-database").exists()
-            discord_token = os.getenv('DISCORD_SEARCH_BOT_TOKEN')
-            
-            if db_exists and discord_token:
-                response = {
-                    "status": "healthy",
-                    "service": "warzone-gun-search-bot",
-                    "database": "loaded",
-                    "discord": "configured"
-                }
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps(response).encode())
-            else:
-                response = {
-                    "status": "unhealthy",
-                    "database": "loaded" if db_exists else "missing",
-                    "discord": "configured" if discord_token else "missing"
-                }
-                self.send_response(503)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps(response).encode())
-        else:
-            # Default response for other paths
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html_response = '<html><body><h1>Warzone Gun Search Bot</h1><p>Discord bot is running!</p><p><a href="/health">Health Check</a></p></body></html>'
-            self.wfile.write(html_response.encode('utf-8'))
-    
-    def log_message(self, format, *args):
-        # Suppress default HTTP logs to keep Discord logs clean
-        pass
-
-def start_health_server():
-    """Start health check server for Render"""
-    port = int(os.getenv('PORT', 10000))
-    server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-    print(f"🌐 Health check server starting on port {port}")
-    server.serve_forever()
-
-def start_discord_bot():
-    """Start the Discord bot in a separate thread"""
-    print("🤖 Starting Discord search bot...")
-    
-    # Check for Discord token
-    discord_token = os.getenv('DISCORD_SEARCH_BOT_TOKEN')
-    if not discord_token:
-        print("❌ DISCORD_SEARCH_BOT_TOKEN not found in environment variables!")
-        print("   Add this in your Render dashboard under Environment Variables")
-        sys.exit(1)
-    
-    # Import and run the bot
-    try:
-        from discord_search_bot import bot
-        bot.run(discord_token)
-    except Exception as e:
-        print(f"❌ Error starting Discord bot: {e}")
-        sys.exit(1)
+SERVICE_NAME = "warzone-gun-search-bot"
+REFRESH_HOURS = float(os.getenv("DATABASE_REFRESH_HOURS", 6))
 
-def main():
-    print("🚀 Starting Discord Bot Service")
-    print("=" * 50)
-    
-    # Try to download latest database
-    db_downloaded = download_latest_database()
+def gateway_connected(bot) -> bool:
+    """Logged in, cache ready and heartbeating"""
+    if bot is None:
+        return False
+    return bot.is_ready() and not bot.is_closed() and math.isfinite(bot.latency)
+
+def service_status(state: dict) -> dict:
+    """Readiness = database indexed and Discord gateway connected"""
+    connected = gateway_connected(state["bot"])
+    ready = state["database_indexed"] and connected
+    return {
+        "status": "stopping" if state["stopping"] else "healthy" if ready else "starting",
+        "service": SERVICE_NAME,
+        "database": "indexed" if state["database_indexed"] else "loading",
+        "database_version": state.get("database_version"),
+        "discord": "connected" if connected else "connecting",
+        "uptime_seconds": round(time.monotonic() - state["started"], 1),
+        "event_loop": get_loop_monitor().snapshot(),
+        "startup": timeline.snapshot(),
+    }
+
+def build_http_app(state: dict) -> web.Application:
+    """Health, readiness and metrics endpoints served on the bot's own loop"""
+    async def health(request):
+        status = service_status(state)
+        return web.json_response(status, status=200 if status["status"] == "healthy" else 503)
+
+    async def live(request):
+        return web.json_response({"status": "alive", "service": SERVICE_NAME})
+
+    async def metrics(request):
+        return web.Response(text=METRICS.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def index(request):
+        html_response = '<html><body><h1>Warzone Gun Search Bot</h1><p>Discord bot is running!</p><p><a href="/health">Health Check</a> | <a href="/metrics">Metrics</a></p></body></html>'
+        return web.Response(text=html_response, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_get("/ready", health)
+    app.router.add_get("/live", live)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/{tail:.*}", index)
+    return app
+
+def _startup_samples():
+    """Startup phase durations for /metrics"""
+    for name in timeline.phases:
+        duration = timeline.duration(name)
+        if duration is not None:
+            yield ("gunbot_startup_phase_seconds", "gauge", "Duration of each startup phase", {"phase": name}, duration)
+    for name, at in timeline.marks.items():
+        yield ("gunbot_startup_mark_seconds", "gauge", "Seconds from process start to a startup milestone", {"mark": name}, at)
+
+METRICS.register_collector(_startup_samples)
+
+async def prepare_database(state: dict, stop: asyncio.Event):
+    """Download (if configured), then index; stops the service when no database is available"""
+    with timeline.phase("download"):
+        db_downloaded = await run_blocking(download_latest_database, timeout=600)
     
-    # Check if we have a database (either downloaded or existing)
     if not check_database_exists():
         if not db_downloaded:
             print("💡 No database available. Options:")
             print("   1. Set GITHUB_TOKEN, GITHUB_REPO_OWNER, GITHUB_REPO_NAME in environment")
-            print("   2. Upload gun-database manually to your deployment")
+            print(f"   2. Upload {DATABASE_FILE} manually to your deployment")
             print("   3. Run scraper locally first: python scrape.py")
-            sys.exit(1)
+        state["fatal"] = "database missing"
+        state["indexed"].set_result(None)
+        stop.set()
+        return
     
-    # Test database before starting bot
-    try:
-        from test_database import test_database
-        if not test_database():
-            print("❌ Database test failed!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"⚠️ Could not test database: {e}")
+    with timeline.phase("index"):
+        await index_database(state)
+    if not state["database_indexed"]:
+        print("❌ Database test failed - no loadouts found!")
+        state["fatal"] = "database empty"
+        stop.set()
+
+async def announce_when_ready(state: dict):
+    """Mark the ready milestone once the database is indexed and the gateway connected"""
+    while not (state["database_indexed"] and gateway_connected(state["bot"])):
+        await asyncio.sleep(0.05)
+    timeline.mark("ready")
+    print(f"✅ Service ready in {timeline.marks['ready']:.2f}s (budget {STARTUP_BUDGET_SECONDS:.0f}s)")
+    timeline.report()
+
+async def index_database(state: dict):
+    """Build the lookup indexes off the loop and record the loaded version
+
+    The first build also resolves state["indexed"], which the bot's on_ready
+    awaits instead of building the same indexes itself.
+    """
+    from gun_index import load_gun_index
+    from build_similarity import load_build_similarity
+    from vector_search import load_vector_index
+    from search_query import load_filter_index
+    from bm25_search import load_bm25_index
+    
+    index = await run_blocking(load_gun_index, DATABASE_FILE, timeout=300)
+    await run_blocking(load_build_similarity, DATABASE_FILE, timeout=300)
+    await run_blocking(load_vector_index, DATABASE_FILE, timeout=300)
+    await run_blocking(load_filter_index, DATABASE_FILE, timeout=300)
+    if os.getenv("SEARCH_RANKING", "classic").lower() == "bm25":
+        await run_blocking(load_bm25_index, DATABASE_FILE, timeout=300)
+    state["database_indexed"] = bool(index.entries)
+    state["database_version"] = index.version
+    print(f"🗂️ Database {index.version} indexed: {len(index.entries)} loadouts")
+    indexed = state.get("indexed")
+    if indexed is not None and not indexed.done():
+        indexed.set_result(index)
+    return index
+
+async def refresh_database_periodically(state: dict):
+    """Re-download the artifact and re-index every DATABASE_REFRESH_HOURS"""
+    if REFRESH_HOURS <= 0 or not (os.getenv('GITHUB_REPO_OWNER') and os.getenv('GITHUB_REPO_NAME')):
+        return
+    while True:
+        await asyncio.sleep(REFRESH_HOURS * 3600)
+        try:
+            await run_blocking(download_latest_database, timeout=600)
+            await index_database(state)
+        except Exception as e:
+            print(f"⚠️ Database refresh failed: {e}")
+
+async def run_discord_client(bot, discord_token: str):
+    """bot.start() with retries while Discord is unreachable; a bad token is fatal"""
+    import discord
+    import aiohttp
+    
+    delay = 5
+    while True:
+        try:
+            await bot.start(discord_token)
+            return
+        except discord.LoginFailure:
+            raise
+        except (OSError, aiohttp.ClientError, discord.GatewayNotFound, discord.ConnectionClosed) as e:
+            print(f"⚠️ Could not reach Discord ({e}) - retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+async def run_service(discord_token: str, bot=None, stop: Optional[asyncio.Event] = None) -> int:
+    """Supervise the Discord client, HTTP server and background jobs on one loop
+
+    bot defaults to discord_search_bot.bot, imported on the executor while the
+    database downloads and indexes. Setting stop (or SIGTERM/SIGINT) shuts the
+    service down cleanly.
+    """
+    loop = asyncio.get_running_loop()
+    state = {"database_indexed": False, "database_version": None, "stopping": False,
+             "started": time.monotonic(), "bot": bot, "fatal": None, "indexed": loop.create_future()}
+    stop = stop or asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    
+    with timeline.phase("http_server"):
+        runner = web.AppRunner(build_http_app(state), access_log=None)
+        await runner.setup()
+        port = int(os.getenv('PORT', 10000))
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+    print(f"🌐 Health check server listening on port {port}")
     
-    print("🎯 All checks passed - starting services...")
-    print("📡 Bot will be available for slash commands")
+    jobs = [
+        asyncio.create_task(prepare_database(state, stop), name="prepare-database"),
+        asyncio.create_task(run_blocking(post_deploy_webhook, timeout=15), name="deploy-webhook"),
+        asyncio.create_task(announce_when_ready(state), name="announce-ready"),
+        asyncio.create_task(refresh_database_periodically(state), name="refresh-database"),
+    ]
+    stop_task = asyncio.create_task(stop.wait(), name="stop-signal")
+    bot_task = None
+    exit_code = 0
     
-    # Start Discord bot in a separate thread
-    bot_thread = threading.Thread(target=start_discord_bot, daemon=True)
-    bot_thread.start()
+    if bot is None:
+        with timeline.phase("import_bot"):
+            import_task = asyncio.create_task(run_blocking(importlib.import_module, "discord_search_bot", timeout=120))
+            await asyncio.wait({import_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if import_task.done():
+            bot = import_task.result().bot
+    
+    if bot is not None:
+        state["bot"] = bot
+        bot.index_ready = state["indexed"]  # on_ready waits for index_database rather than racing it
+        
+        async def on_app_command_completion(interaction, command):
+            timeline.mark("first_command_served")
+        
+        bot.add_listener(on_app_command_completion)
+        
+        async def on_ready():
+            timeline.end("login")
+        
+        bot.add_listener(on_ready)
+        timeline.begin("login")
+        bot_task = asyncio.create_task(run_discord_client(bot, discord_token), name="discord-client")
+        done, _ = await asyncio.wait({bot_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if bot_task in done and bot_task.exception() is not None:
+            print(f"❌ Discord bot stopped: {bot_task.exception()}")
+            exit_code = 1
+    if state["fatal"]:
+        print(f"❌ Startup failed: {state['fatal']}")
+        exit_code = 1
+    
+    print("🛑 Shutting down...")
+    state["stopping"] = True
+    for task in jobs + [stop_task]:
+        task.cancel()
+    if bot is not None:
+        await bot.close()
+    if bot_task is not None and not bot_task.done():
+        bot_task.cancel()
+    await asyncio.gather(*[task for task in (bot_task,) if task], *jobs, stop_task, return_exceptions=True)
+    await runner.cleanup()
+    await flush_sessions()
+    shutdown_executor()
+    print("👋 Shutdown complete")
+    return exit_code
+
+def main():
+    print("🚀 Starting Discord Bot Service")
+    print("=" * 50)
+    print("📡 Downloading/indexing the database while the bot logs in...")
+    
+    discord_token = os.getenv('DISCORD_SEARCH_BOT_TOKEN')
+    if not discord_token:
+        print("❌ DISCORD_SEARCH_BOT_TOKEN not found in environment variables!")
+        print("   Add this in your Render dashboard under Environment Variables")
+        sys.exit(1)
     
-    # Start health check server (this will run indefinitely)
-    print("🌐 Starting health check server for Render...")
-    start_health_server()
+    sys.exit(asyncio.run(run_service(discord_token)))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
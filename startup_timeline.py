@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Startup phase timeline.
+Records when each startup phase (download, import, index, login, ready,
+first command) begins and ends relative to process start, so time-to-ready
+and time-to-first-command-served can be reported on /health and /metrics
+and checked against a budget.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", 20))
+
+class StartupTimeline:
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else time.monotonic()
+        self.phases: Dict[str, Dict[str, float]] = {}   # name -> {"start": s, "end": s}
+        self.marks: Dict[str, float] = {}                # name -> seconds since origin
+
+    def _now(self) -> float:
+        return time.monotonic() - self.origin
+
+    def begin(self, name: str):
+        self.phases[name] = {"start": self._now()}
+
+    def end(self, name: str):
+        phase = self.phases.setdefault(name, {"start": self._now()})
+        phase["end"] = self._now()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block; works around both sync code and awaits"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark(self, name: str, once: bool = True):
+        """Record a point in time (only the first occurrence when once=True)"""
+        if once and name in self.marks:
+            return
+        self.marks[name] = self._now()
+
+    def duration(self, name: str) -> Optional[float]:
+        phase = self.phases.get(name, {})
+        if "end" not in phase:
+            return None
+        return phase["end"] - phase["start"]
+
+    def overlapped(self, first: str, second: str) -> bool:
+        """True when the two phases ran at the same time for any period"""
+        a, b = self.phases.get(first), self.phases.get(second)
+        if not a or not b or "end" not in a or "end" not in b:
+            return False
+        return a["start"] < b["end"] and b["start"] < a["end"]
+
+    def snapshot(self) -> Dict:
+        return {
+            "phases": {name: {key: round(value, 3) for key, value in phase.items()}
+                       for name, phase in self.phases.items()},
+            "marks": {name: round(value, 3) for name, value in self.marks.items()},
+            "time_to_ready_seconds": self.marks.get("ready"),
+            "time_to_first_command_seconds": self.marks.get("first_command_served"),
+            "budget_seconds": STARTUP_BUDGET_SECONDS,
+        }
+
+    def report(self):
+        print("⏱️ Startup timeline:")
+        for name, phase in sorted(self.phases.items(), key=lambda item: item[1]["start"]):
+            end = phase.get("end")
+            span = f"{phase['start']:.2f}s → {end:.2f}s ({end - phase['start']:.2f}s)" if end is not None else f"{phase['start']:.2f}s → …"
+            print(f"   {name:<16}{span}")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            print(f"   {name:<16}@ {at:.2f}s")
+
+_timeline: Optional[StartupTimeline] = None
+
+def get_timeline() -> StartupTimeline:
+    global _timeline
+    if _timeline is None:
+        _timeline = StartupTimeline()
+    return _timeline
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Azure OpenAI chat-completions API.
+Point AsyncAzureOpenAI at it (AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8089) to
+exercise or load-test the /find conversation flow without a real model. It
+answers with configurable latency, can stream tokens as server-sent events,
+and replies like the bot's system prompt asks: clarifying questions until the
+conversation names a weapon, mode and range, then "SEARCH_READY: ...".
+
+Usage:
+    python stub_llm_server.py --port 8089 --latency 0.3 --tokens-per-second 40
+"""
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+from aiohttp import web
+
+class ScriptedReplies:
+    """Decides the assistant reply for a conversation"""
+    def __init__(self, database: Optional[Dict] = None, script: Optional[List[Dict]] = None):
+        self.script = script or []  # [{"match": regex, "reply": text}], checked first
+        self.parser = None
+        if database is not None:
+            from intent_parser import IntentParser
+            self.parser = IntentParser(database)
+
+    def reply(self, messages: List[Dict]) -> str:
+        user_text = " ".join(m["content"] for m in messages if m.get("role") == "user")
+        last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        for rule in self.script:
+            if re.search(rule["match"], last, re.IGNORECASE):
+                return rule["reply"]
+        if self.parser is None:
+            return "🎯 Which weapon, mode and range are you after?"
+
+        parsed = self.parser.parse(user_text)
+        if len(parsed.weapon_ids) != 1:
+            return "🔫 Which weapon are you looking for? For example **C9** or **Kar98k**."
+        weapon = self.parser.weapons[parsed.weapon_ids[0]]
+        if parsed.mode is None:
+            return f"🎮 Got it, **{weapon}**! Which mode - **Resurgence**, **Verdansk** or **Multiplayer**?"
+        if parsed.range is None:
+            return f"🎯 **{weapon}** in **{parsed.mode}** - which range? **Long Range**, **Close Range** or **Sniper**?"
+        return f"SEARCH_READY: {parsed.mode}_{parsed.range}_{weapon}"
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class StubLLMServer:
+    def __init__(self, replies: ScriptedReplies, latency: float = 0.3, jitter: float = 0.0,
+                 tokens_per_second: float = 50.0, error_rate: float = 0.0):
+        self.replies = replies
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/openai/deployments/{deployment}/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/chat/completions", self.chat_completions)
+        return app
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": {"message": "stub overloaded", "type": "server_error"}}, status=500)
+
+        messages = body.get("messages", [])
+        reply = self.replies.reply(messages)
+        model = body.get("model") or request.match_info.get("deployment", "stub")
+        completion_id = f"chatcmpl-stub-{self.requests}"
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(m.get("content") or "") for m in messages),
+            "completion_tokens": estimate_tokens(reply),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        tokens = re.findall(r"\S+\s*", reply)
+        if not body.get("stream"):
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(len(tokens) / self.tokens_per_second)  # the whole generation, then one reply
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": reply}}],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+
+        async def send(delta: Dict, finish_reason=None, extra=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            chunk.update(extra or {})
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        try:
+            await response.prepare(request)
+            await send({"role": "assistant", "content": ""})
+            for token in tokens:
+                await send({"content": token})
+                if self.tokens_per_second > 0:
+                    await asyncio.sleep(1 / self.tokens_per_second)
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            await send({}, "stop")
+            if include_usage:
+                await response.write(f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            self.disconnects += 1  # client stopped reading early (e.g. after SEARCH_READY)
+        return response
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on the running loop; returns the base URL (port 0 picks a free one)"""
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = self.runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+def load_database(path: str = "all_guns_database.json") -> Optional[Dict]:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"⚠️ {path} not found - replies won't reach SEARCH_READY")
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the Azure OpenAI chat-completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of random extra latency")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="generation rate (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--database", default="all_guns_database.json")
+    parser.add_argument("--script", help='JSON file of [{"match": regex, "reply": text}] checked before the default replies')
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, "r") as f:
+            script = json.load(f)
+    server = StubLLMServer(ScriptedReplies(load_database(args.database), script), args.latency, args.jitter,
+                           args.tokens_per_second, args.error_rate)
+
+    async def serve():
+        url = await server.start(args.host, args.port)
+        print(f"🧪 Stub LLM listening on {url} (latency {args.latency}s, {args.tokens_per_second} tokens/s)")
+        print(f"   AZURE_OPENAI_ENDPOINT={url} AZURE_OPENAI_KEY=stub")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the AI concurrency limiter: the concurrency cap holds, a full queue is
+rejected without waiting, deadlines cancel slow calls, and /find answers a
+slow stub LLM from the local search instead of hanging.
+"""
+import os
+import time
+import asyncio
+from ai_limiter import AILimiter, AIUnavailable
+
+def test_limiter_bounds_and_deadlines():
+    async def scenario():
+        limiter = AILimiter(max_concurrent=2, max_queue=1, timeout=0.3, name="test")
+        peak = 0
+
+        async def call(seconds=0.1):
+            nonlocal peak
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(seconds)
+            return "ok"
+
+        # 2 run, 1 waits, the 4th is rejected immediately
+        tasks = [asyncio.ensure_future(limiter.run(call)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        started = time.perf_counter()
+        try:
+            await limiter.run(call)
+            assert False, "queue cap not enforced"
+        except AIUnavailable as e:
+            assert e.reason == "queue_full"
+        assert time.perf_counter() - started < 0.05
+        assert await asyncio.gather(*tasks) == ["ok"] * 3
+        assert peak == 2
+
+        # A call slower than the deadline is cancelled
+        started = time.perf_counter()
+        try:
+            await limiter.run(lambda: call(5))
+            assert False, "deadline not enforced"
+        except AIUnavailable as e:
+            assert e.reason == "timeout"
+        assert time.perf_counter() - started < 0.5
+        assert limiter.in_flight == 0 and limiter.queued == 0
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["results"] == {"ok": 3, "queue_full": 1, "timeout": 1}
+    print(f"✅ Limiter: {stats['results']}")
+
+def test_find_falls_back_to_local_search():
+    from stub_llm_server import StubLLMServer, ScriptedReplies, load_database
+
+    async def scenario():
+        stub = StubLLMServer(ScriptedReplies(load_database()), latency=1.0)
+        os.environ["AZURE_OPENAI_KEY"] = "stub"
+        os.environ["AZURE_OPENAI_ENDPOINT"] = await stub.start()
+        from discord_ai_bot import ConversationalGunBot
+        gun_bot = ConversationalGunBot()
+        if not gun_bot.database.get("categories"):
+            await stub.stop()
+            return None, 0.0
+        gun_bot.ai_client.limiter = AILimiter(max_concurrent=1, max_queue=0, timeout=0.3, name="test-find")
+        weapon = gun_bot.intent_parser.weapons[next(iter(gun_bot.intent_parser.weapons))]
+
+        started = time.perf_counter()
+        reply = await gun_bot.handle_conversation("limiter-test", f"tell me about the {weapon}")
+        elapsed = time.perf_counter() - started
+        await stub.stop()
+        return (weapon, reply), elapsed
+
+    outcome, elapsed = asyncio.run(scenario())
+    if outcome is None:
+        print("⚠️ all_guns_database.json not found - skipped fallback check")
+        return
+    weapon, reply = outcome
+    assert elapsed < 1.0, f"fallback took {elapsed:.2f}s"
+    assert reply.startswith("⏳") and weapon.split()[0] in reply
+    print(f"✅ /find fell back to local search in {elapsed * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    test_limiter_bounds_and_deadlines()
+    test_find_falls_back_to_local_search()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test BM25 ranking: a weapon name plus one of its attachments ranks that
+weapon's builds with the attachment first, in either word order, about
+as often as the classic ranking does.
+"""
+from generate_database import generate_database
+from gun_index import GunIndex, clean_gun_name, weapon_id
+from bm25_search import BM25Index, terms
+from discord_search_bot import search_guns
+
+def test_bm25_multi_word():
+    assert terms("AK-74") == ["ak", "74"]
+    assert terms("Kar98k") == ["kar98k", "kar", "98", "k"]
+
+    database = generate_database(2000, seed=11)
+    index = GunIndex(database)
+    engine = BM25Index(index)
+    assert engine.search("", 5) == [] and engine.search("qqqq", 5) == []
+
+    checked, top_hits, classic_hits = 0, 0, 0
+    for (name, slot), positions in list(index.attachments.items())[:40]:
+        gun = index.entries[positions[0]]
+        weapon = clean_gun_name(gun["gun"])
+        def right(results):
+            """Top result is the weapon, running an attachment named like the query's"""
+            return bool(results) and weapon_id(results[0]["gun"]) == weapon_id(gun["gun"]) \
+                and any(name in line for line in results[0]["class"])
+
+        for query in (f"{weapon} {name}", f"{name} {weapon}"):
+            checked += 1
+            top_hits += right([loadout for _, loadout in engine.search(query.lower(), 1)])
+            classic_hits += right(search_guns(query.lower(), 1, database=database, ranking="classic"))
+    assert top_hits / checked >= 0.8, f"BM25 top-1 right for only {top_hits}/{checked}"
+    assert top_hits >= classic_hits - checked // 10, f"BM25 {top_hits} vs classic {classic_hits}"
+
+    # Partial words still match through prefix expansion
+    prefix = clean_gun_name(index.entries[0]["gun"]).lower()[:3]
+    assert engine.search(prefix, 3)
+    print(f"✅ BM25 top-1 right for {top_hits}/{checked} name + attachment queries "
+          f"(classic {classic_hits}/{checked}); built in {engine.build_time_ms:.0f}ms")
+
+if __name__ == "__main__":
+    test_bm25_multi_word()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test the blocking executor's bookkeeping: calls that time out or are
+cancelled while still queued leave the queue, so queue_depth drains to 0.
+"""
+import asyncio
+import threading
+from bot_executor import BlockingExecutor
+
+def test_queue_depth_drains_after_timeouts():
+    async def scenario():
+        executor = BlockingExecutor(threads=1, timeout=0.05)
+        release = threading.Event()
+        try:
+            # One call holds the only worker; the rest wait in the queue and time out there
+            calls = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(5)]
+            await asyncio.sleep(0.01)
+            assert executor.stats()["queue_depth"] == 4
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+
+            # A queued call whose caller is cancelled leaves the queue too
+            cancelled = asyncio.ensure_future(executor.run(release.wait, 5, timeout=5))
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            await asyncio.gather(cancelled, return_exceptions=True)
+
+            release.set()
+            assert await executor.run(lambda: "ok") == "ok"
+            stats = executor.stats()
+            assert stats["queue_depth"] == 0 and stats["running"] == 0, stats
+            assert stats["timeouts"] == 5
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(scenario())
+    print("✅ Executor queue depth drains after queued calls time out or are cancelled")
+
+if __name__ == "__main__":
+    test_queue_depth_drains_after_timeouts()
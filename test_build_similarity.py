@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the build-similarity engine behind /similar: weapons running the same
+attachments rank first, a weapon is never its own neighbour, and the engine
+is rebuilt only when the database file changes.
+"""
+import os
+import json
+import tempfile
+from gun_index import GunIndex
+from build_similarity import BuildSimilarity, load_build_similarity, similarity_stats
+
+def loadout(gun, mode, range_type, rank, parts):
+    return {"gun": gun, "mode": mode, "range": range_type, "rank": rank,
+            "class": [f"• {name} — {slot}" for name, slot in parts]}
+
+SNIPER = [("MONOLITHIC SUPPRESSOR", "Muzzle"), ("LONG BARREL", "Barrel"), ("KEPLER", "Optic")]
+SMG = [("COMPENSATOR", "Muzzle"), ("SHORT BARREL", "Barrel"), ("DRUM MAG", "Magazine")]
+
+DATABASE = {"categories": {
+    "Verdansk_Sniper": [loadout("Kar98k", "Verdansk", "Sniper", 1, SNIPER),
+                        loadout("HDR", "Verdansk", "Sniper", 2, SNIPER),
+                        loadout("LR 7.62", "Verdansk", "Sniper", 3, SNIPER[:2] + [("JAK GLASSLESS", "Optic")])],
+    "Verdansk_Close Range": [loadout("C9", "Verdansk", "Close Range", 1, SMG),
+                             loadout("Kar98k", "Verdansk", "Close Range", 2, SMG)],
+}}
+
+def test_similar_weapons():
+    engine = BuildSimilarity(GunIndex(DATABASE), k=3)
+    matches = engine.similar_weapons("hdr")
+    names = [match["gun"]["gun"] for match in matches]
+    assert names[0] == "Kar98k" and abs(matches[0]["score"] - 1.0) < 1e-5, matches[0]
+    assert "HDR" not in names, "a weapon is its own neighbour"
+    assert names.index("LR 7.62") < names.index("C9")  # 2 of 3 parts shared beats a slot layout match
+    assert all(a["score"] >= b["score"] for a, b in zip(matches, matches[1:]))
+    assert matches[0]["source"]["gun"] == "HDR"
+
+    # Kar98k has a sniper and an SMG build: C9 matches the SMG one exactly
+    by_name = {match["gun"]["gun"]: match for match in engine.similar_weapons("kar98k")}
+    assert abs(by_name["C9"]["score"] - 1.0) < 1e-5 and by_name["C9"]["source"]["range"] == "Close Range"
+    assert engine.similar_weapons("zzzz") == []
+
+def test_similarity_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "guns.json")
+        with open(path, "w") as f:
+            json.dump(DATABASE, f)
+        first = load_build_similarity(path)
+        hits, misses = similarity_stats["hits"], similarity_stats["misses"]
+        assert load_build_similarity(path) is first
+        assert similarity_stats["hits"] == hits + 1 and similarity_stats["misses"] == misses
+
+        changed = json.loads(json.dumps(DATABASE))
+        changed["categories"]["Verdansk_Sniper"].pop()
+        with open(path, "w") as f:
+            json.dump(changed, f)
+        rebuilt = load_build_similarity(path)
+        assert rebuilt is not first and len(rebuilt.index.entries) == 4
+        assert similarity_stats["misses"] == misses + 1
+
+if __name__ == "__main__":
+    test_similar_weapons()
+    test_similarity_cache()
+    print("✅ Similar builds rank by shared attachments and rebuild only on database change")
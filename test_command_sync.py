@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that command_sync only calls tree.sync() when the command schema changes.
+Uses a stub CommandTree, so no Discord connection is needed.
+"""
+import os
+import asyncio
+import tempfile
+from command_sync import sync_if_changed, schema_hash
+
+class StubCommand:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"name": self.name, "description": self.description, "type": 1, "options": []}
+
+class StubClient:
+    application_id = 1234
+
+class StubCommandTree:
+    """Records sync() calls instead of talking to Discord"""
+    def __init__(self, commands):
+        self.client = StubClient()
+        self.commands = list(commands)
+        self.sync_calls = 0
+        self.fail = False
+
+    def get_commands(self):
+        return list(self.commands)
+
+    async def sync(self, guild=None):
+        self.sync_calls += 1
+        if self.fail:
+            raise RuntimeError("sync failed")
+        return list(self.commands)
+
+def test_sync_only_when_schema_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, "command_sync.json")
+        tree = StubCommandTree([StubCommand("search", "Search for a weapon"),
+                                StubCommand("top", "Top weapons")])
+
+        async def sync(**kwargs):
+            return await sync_if_changed(tree, state_path=state_path, force=kwargs.get("force", False))
+
+        first = asyncio.run(sync())
+        assert first["synced"] and first["reason"] == "first sync"
+        assert tree.sync_calls == 1
+
+        # Reconnect with the same commands: no sync
+        second = asyncio.run(sync())
+        assert not second["synced"] and second["reason"] == "unchanged"
+        assert tree.sync_calls == 1
+        assert second["duration_ms"] >= 0
+
+        # Command order does not change the hash
+        before = schema_hash(tree)
+        tree.commands.reverse()
+        assert schema_hash(tree) == before
+
+        # Forced sync ignores the stored hash
+        assert asyncio.run(sync(force=True))["reason"] == "forced"
+        assert tree.sync_calls == 2
+
+        # Changed description: sync again, and a failed sync is retried next time
+        tree.commands[0] = StubCommand(tree.commands[0].name, "New description")
+        tree.fail = True
+        try:
+            asyncio.run(sync())
+            assert False, "sync failure should propagate"
+        except RuntimeError:
+            pass
+        tree.fail = False
+        changed = asyncio.run(sync())
+        assert changed["synced"] and changed["reason"] == "changed"
+        assert tree.sync_calls == 4
+        assert not asyncio.run(sync())["synced"]
+
+    print("✅ Command sync skips unchanged schemas")
+
+if __name__ == "__main__":
+    test_sync_only_when_schema_changes()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test download_database.py against a local stub of the GitHub artifacts API.
+Checks streaming install, the unchanged-artifact skip, re-download on a new
+artifact, and that corrupt or incomplete downloads never replace the database.
+"""
+import io
+import os
+import json
+import hashlib
+import zipfile
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from download_database import download_latest_database, make_session
+
+def make_artifact_zip(database: dict, member: str = "all_guns_database.json") -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr(member, json.dumps(database))
+        z.writestr("README.txt", "not the database")
+    return buffer.getvalue()
+
+class StubGitHub:
+    """Serves /repos/o/r/actions/artifacts and /download/<id> from memory"""
+    def __init__(self):
+        self.artifacts = {}      # id -> zip bytes
+        self.listing = []        # artifact dicts returned by the API
+        self.downloads = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/repos/o/r/actions/artifacts"):
+                    body = json.dumps({"total_count": len(stub.listing), "artifacts": stub.listing}).encode()
+                elif self.path.startswith("/download/"):
+                    stub.downloads += 1
+                    body = stub.artifacts[int(self.path.rsplit("/", 1)[1])]
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def publish(self, artifact_id: int, payload: bytes, size=None, digest=None):
+        self.artifacts[artifact_id] = payload
+        self.listing.insert(0, {
+            "id": artifact_id, "name": "gun-database", "expired": False,
+            "created_at": f"2026-01-{artifact_id:02d}T00:00:00Z",
+            "size_in_bytes": len(payload) if size is None else size,
+            "digest": digest or "sha256:" + hashlib.sha256(payload).hexdigest(),
+            "archive_download_url": f"{self.url}/download/{artifact_id}",
+        })
+
+def database(version: int) -> dict:
+    return {"total_guns": version, "last_updated": f"v{version}",
+            "categories": {"Resurgence_Close Range": [{"gun": f"Gun {version}", "loadout": []}]}}
+
+def test_download_database():
+    stub = StubGitHub()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            dest = os.path.join(tmp, "all_guns_database.json")
+
+            def download(**kwargs):
+                return download_latest_database("o", "r", "token", dest=dest, api_url=stub.url,
+                                                session=make_session("token", retries=0), **kwargs)
+
+            def installed():
+                with open(dest) as f:
+                    return json.load(f)["total_guns"]
+
+            # Member nested in a folder is still found; only it is extracted
+            stub.publish(1, make_artifact_zip(database(1), "artifacts/all_guns_database.json"))
+            assert download()
+            assert installed() == 1 and stub.downloads == 1
+            assert not os.path.exists(os.path.join(tmp, "README.txt"))
+
+            # Same artifact ID: no download
+            assert download()
+            assert stub.downloads == 1
+
+            # Database edited locally: re-download
+            with open(dest, "w") as f:
+                f.write("{}")
+            assert download()
+            assert installed() == 1 and stub.downloads == 2
+
+            # New artifact: downloaded; --force downloads again
+            stub.publish(2, make_artifact_zip(database(2)))
+            assert download() and installed() == 2 and stub.downloads == 3
+            assert download(force=True) and stub.downloads == 4
+
+            # Wrong digest or size: rejected, previous database kept
+            stub.publish(3, make_artifact_zip(database(3)), digest="sha256:" + "0" * 64)
+            assert not download()
+            stub.publish(4, make_artifact_zip(database(4)), size=10)
+            assert not download()
+            # Missing member: rejected
+            stub.publish(5, make_artifact_zip(database(5), "other.json"))
+            assert not download()
+            assert installed() == 2
+            assert sorted(os.listdir(tmp)) == [".database_artifact.json", "all_guns_database.json"]
+    finally:
+        stub.server.shutdown()
+
+    print("✅ Artifact download verified, cached and atomic")
+
+if __name__ == "__main__":
+    test_download_database()
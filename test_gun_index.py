@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the gun index lookups behind /where and /attachment: weapon names
+resolve exactly, by prefix, by substring and fuzzily to every placement of
+the weapon, and attachment names resolve to their (name, slot) pairs with
+per-slot build counts that ignore a part listed twice in one build.
+"""
+from gun_index import GunIndex
+
+def loadout(gun, mode, range_type, rank, parts):
+    return {"gun": gun, "mode": mode, "range": range_type, "rank": rank,
+            "class": [f"• {name} — {slot}" for name, slot in parts] + ["• Up to date for — Season 4"]}
+
+DATABASE = {"categories": {
+    "Verdansk_Long Range": [
+        loadout("AK-74\nNEW", "Verdansk", "Long Range", 1, [("COMPENSATOR", "Muzzle"), ("LONG BARREL", "Barrel")]),
+        loadout("Kar98k", "Verdansk", "Long Range", 2, [("MONOLITHIC SUPPRESSOR", "Muzzle"), ("LONG BARREL", "Barrel")]),
+    ],
+    "Resurgence_Sniper": [
+        loadout("Kar98k", "Resurgence", "Sniper", 1, [("COMPENSATOR", "Muzzle"), ("COMPENSATOR", "Muzzle")]),
+    ],
+    "Multiplayer_Assault Rifle": [
+        loadout("AK-74", "Multiplayer", "Assault Rifle", 3, [("Long Barrel", "Stock")]),
+    ],
+}}
+
+def test_where():
+    index = GunIndex(DATABASE)
+    placements = index.where("ak-74")
+    assert [(p.mode, p.category, p.rank) for p in placements] == \
+           [("Verdansk", "Long Range", 1), ("Multiplayer", "Assault Rifle", 3)]
+    assert placements[0].loadout is DATABASE["categories"]["Verdansk_Long Range"][0]
+    assert index.weapons["ak-74"] == "AK-74"  # 'NEW' badge stripped
+    for query in ("AK 74", "ak74", "ak", "kar", "98k", "kar98"):  # exact, compact, prefix, substring
+        assert index.where(query), query
+    assert index.resolve_weapon("ak") == "ak-74" and index.resolve_weapon("98k") == "kar98k"
+    assert index.resolve_weapon("kar89k") == "kar98k"  # fuzzy
+    assert index.where("zzzz") is None and index.where("") is None
+
+def test_attachments():
+    index = GunIndex(DATABASE)
+    assert index.resolve_attachment("compensator") == [("COMPENSATOR", "Muzzle")]
+    assert index.resolve_attachment("monolithic") == [("MONOLITHIC SUPPRESSOR", "Muzzle")]  # substring
+    assert index.resolve_attachment("compensater") == [("COMPENSATOR", "Muzzle")]            # fuzzy
+    # Same name in different case and slot: both pairs, in first-seen order
+    assert index.resolve_attachment("long-barrel") == [("LONG BARREL", "Barrel"), ("Long Barrel", "Stock")]
+    assert index.resolve_attachment("qqqq") == [] and index.resolve_attachment("") == []
+
+    # The Kar98k sniper build lists the compensator twice: one build, one count
+    assert index.slot_counts["Muzzle"] == {"COMPENSATOR": 2, "MONOLITHIC SUPPRESSOR": 1}
+    assert index.slot_counts["Barrel"] == {"LONG BARREL": 2}
+    assert "Season 4" not in str(index.slot_counts)  # footers aren't attachments
+    stats = index.attachment_stats("COMPENSATOR", "Muzzle")
+    assert stats["builds"] == 2 and stats["slot_rank"] == 1 and stats["slot_total"] == 3
+
+if __name__ == "__main__":
+    test_where()
+    test_attachments()
+    print("✅ Weapon and attachment lookups resolve as expected")
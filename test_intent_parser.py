@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the /find fast path: a query naming one weapon and enough of its
+category resolves locally (aliases included), while an ambiguous weapon or
+category is left to the LLM.
+"""
+from intent_parser import IntentParser
+
+def loadout(gun, mode, range_type, rank):
+    return {"gun": gun, "mode": mode, "range": range_type, "rank": rank, "class": []}
+
+DATABASE = {"categories": {
+    "Verdansk_Long Range": [loadout("Krig C", "Verdansk", "Long Range", 1), loadout("Kar98k", "Verdansk", "Long Range", 2),
+                            loadout("Krig 6", "Verdansk", "Long Range", 3)],
+    "Verdansk_Close Range": [loadout("C9", "Verdansk", "Close Range", 1), loadout("Krig C", "Verdansk", "Close Range", 2)],
+    "Resurgence_Close Range": [loadout("C9\nNEW", "Resurgence", "Close Range", 1)],
+    "Resurgence_Sniper": [loadout("Kar98k", "Resurgence", "Sniper", 1)],
+    "Multiplayer_Marksman Rifle": [loadout("SWAT 5.56", "Multiplayer", "Marksman Rifle", 4)],
+}}
+
+def test_resolve():
+    parser = IntentParser(DATABASE)
+
+    intent = parser.resolve("c9 verdansk close range")
+    assert (intent.weapon_id, intent.mode, intent.range) == ("c9", "Verdansk", "Close Range")
+    assert intent.loadout is DATABASE["categories"]["Verdansk_Close Range"][0]
+
+    # The weapon has only one loadout in the named category: mode or range alone is enough
+    assert parser.resolve("kar98k sniper").mode == "Resurgence"
+    assert parser.resolve("swat 5.56 dmr").range == "Marksman Rifle"
+
+    # Aliases
+    assert parser.resolve("c9 rebirth cqb")[2:4] == ("Resurgence", "Close Range")
+    assert parser.resolve("kar98k wz lr")[2:4] == ("Verdansk", "Long Range")
+    assert parser.resolve("c9 br short")[2:4] == ("Verdansk", "Close Range")
+
+    # Ambiguous: "krig" prefixes two weapons; C9 is close range in two modes; no category at all
+    assert parser.parse("krig verdansk lr").weapon_ids == ("krig-c", "krig-6")
+    assert parser.resolve("krig verdansk lr") is None
+    assert parser.resolve("krig c verdansk lr").weapon_id == "krig-c"  # two-word name
+    assert parser.resolve("c9 close range") is None
+    assert parser.resolve("kar98k") is None
+    assert parser.resolve("kar98k close range") is None  # no such loadout
+    assert parser.resolve("best gun for verdansk") is None
+
+    # An alias whose target isn't in the database isn't a category word
+    assert parser.parse("c9 pistols").range is None and parser.parse("c9 mp").mode == "Multiplayer"
+    assert parser.stats() == {"hits": 7, "misses": 5, "hit_rate": 7 / 12}
+
+if __name__ == "__main__":
+    test_resolve()
+    print("✅ Intent parser resolves unique queries and leaves ambiguous ones to the LLM")
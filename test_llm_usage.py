@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test LLM usage accounting: prompt components, per-hour and per-user
+aggregation, the AI_USAGE_LOG round trip used by the report, and how
+compose_query accounts calls that fail before or during a stream.
+"""
+import os
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from llm_usage import UsageLedger, prompt_components
+
+def test_usage_ledger():
+    categories_json = '{"Verdansk": ["Close Range", "Sniper"]}'
+    system_prompt = "You are a weapon expert.\n" + categories_json + "\nAsk clarifying questions."
+    conversation = [
+        {"role": "user", "content": "show me the c9"},
+        {"role": "assistant", "content": "Which mode?"},
+        {"role": "user", "content": "verdansk close range"},
+    ]
+    components = prompt_components(system_prompt, categories_json, conversation)
+    assert components["categories"] == len(categories_json) // 4
+    assert components["history"] > 0 and components["message"] > 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "usage.jsonl")
+        ledger = UsageLedger(path=path, metrics=False)
+        ledger.record("alice", "gpt-4", "continue", 120, 20, 0.4, components)
+        ledger.record("alice", "gpt-4", "search_ready", 150, 15, 0.5, components)
+        ledger.record("bob", "gpt-4", "error", 0, 0, 0.1, components, estimated=False)
+        asyncio.run(ledger.persist())
+
+        summary = ledger.summary()
+        assert summary["calls"] == 3 and summary["prompt_tokens"] == 270 and summary["completion_tokens"] == 35
+        assert summary["outcomes"] == {"continue": 1, "search_ready": 1, "error": 1}
+        assert abs(sum(c["share"] for c in summary["components"].values()) - 1.0) < 1e-9
+        (top_user, bucket), _ = ledger.top_users()
+        assert top_user == "alice" and bucket["calls"] == 2
+
+        reloaded = UsageLedger.load(path)
+        assert reloaded.summary()["prompt_tokens"] == 270
+        assert list(reloaded.hours) == list(ledger.hours)
+        report = reloaded.report()
+        assert "categories" in report and "alice" in report
+    print(report)
+
+class BrokenStream:
+    """A streamed completion that delivers one chunk and then drops the connection"""
+    def __init__(self):
+        self.sent = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent:
+            raise ConnectionResetError("stream dropped")
+        self.sent = True
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="The Kar98k is a great "))])
+
+    async def close(self):
+        pass
+
+def test_failed_calls_accounting():
+    os.environ.setdefault("AZURE_OPENAI_KEY", "stub")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+    from discord_ai_bot import AzureGunBotAI
+
+    async def scenario(create):
+        ai = AzureGunBotAI()
+        ai.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        ai.usage = UsageLedger(metrics=False)
+        async def on_text(text):
+            pass
+        reply = await ai.compose_query([{"role": "user", "content": "kar98k"}], {"Verdansk": ["Sniper"]},
+                                       on_text=on_text, user_id="carol")
+        return reply, ai.usage.summary()
+
+    async def rejected(**kwargs):
+        raise ConnectionRefusedError("no route to host")
+    async def broken(**kwargs):
+        return BrokenStream()
+
+    reply, summary = asyncio.run(scenario(rejected))
+    assert reply.startswith("Sorry") and summary["outcomes"] == {"error": 1}
+    assert summary["prompt_tokens"] == 0 and summary["estimated"] == 0
+
+    reply, summary = asyncio.run(scenario(broken))
+    assert reply.startswith("Sorry") and summary["outcomes"] == {"error": 1}
+    assert summary["prompt_tokens"] > 0 and summary["completion_tokens"] > 0 and summary["estimated"] == 1
+    print("✅ Rejected calls cost 0 tokens unestimated; a broken stream is billed for its prompt")
+
+if __name__ == "__main__":
+    test_usage_ledger()
+    test_failed_calls_accounting()
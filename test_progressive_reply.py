@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the streamed /find reply: edits are throttled, and the final text always
+reaches Discord, even when finish() arrives while an edit is still in flight.
+"""
+import os
+import asyncio
+
+os.environ.setdefault("AZURE_OPENAI_KEY", "stub")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+
+class FakeMessage:
+    def __init__(self, content, edit_seconds):
+        self.content = content
+        self.edit_seconds = edit_seconds
+        self.edits = 0
+
+    async def edit(self, content):
+        await asyncio.sleep(self.edit_seconds)  # the edit lands at the end of the request
+        self.content = content
+        self.edits += 1
+
+class FakeFollowup:
+    def __init__(self, edit_seconds):
+        self.edit_seconds = edit_seconds
+        self.messages = []
+
+    async def send(self, content, wait=False):
+        self.messages.append(FakeMessage(content, self.edit_seconds))
+        return self.messages[-1]
+
+class FakeInteraction:
+    def __init__(self, edit_seconds):
+        self.followup = FakeFollowup(edit_seconds)
+
+def test_final_text_survives_in_flight_edit():
+    from discord_ai_bot import ProgressiveReply
+
+    async def scenario(finish_after):
+        interaction = FakeInteraction(edit_seconds=0.05)
+        reply = ProgressiveReply(interaction, interval=0.02)
+        words = "The Kar98k is a strong long range pick".split()
+        for count in range(1, len(words) + 1):
+            await reply.update(" ".join(words[:count]))
+        await asyncio.sleep(finish_after)  # 0.03: the throttled edit is on the wire
+        await reply.finish(" ".join(words))  # a plain reply: final text == streamed text
+        return interaction.followup.messages, " ".join(words)
+
+    for finish_after in (0.0, 0.03, 0.2):
+        messages, final = asyncio.run(scenario(finish_after))
+        assert len(messages) == 1
+        assert messages[0].content == final, f"finish after {finish_after}s left {messages[0].content!r}"
+        assert messages[0].edits <= 2
+    print("✅ Streamed reply ends on the final text whenever finish() lands")
+
+if __name__ == "__main__":
+    test_final_text_survives_in_flight_edit()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the compose_query response cache against a local stub of the Azure
+OpenAI chat-completions endpoint: repeated questions are served from the
+cache, errors are never cached, and a category change invalidates it.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOpenAI:
+    """Answers POST .../chat/completions with a canned reply (or a 500 when failing)"""
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+        self.fail = False
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.calls += 1
+                time.sleep(stub.latency)
+                if stub.fail:
+                    body = json.dumps({"error": {"message": "stub failure", "type": "server_error"}}).encode()
+                    self.send_response(500)
+                else:
+                    question = request["messages"][-1]["content"]
+                    body = json.dumps({
+                        "id": f"chatcmpl-{stub.calls}", "object": "chat.completion", "created": 0, "model": "gpt-4",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": f"Which mode for {question}?"}}],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                    }).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+def test_compose_query_cache():
+    stub = StubOpenAI()
+    os.environ["AZURE_OPENAI_KEY"] = "stub-key"
+    os.environ["AZURE_OPENAI_ENDPOINT"] = stub.url
+    from discord_ai_bot import AzureGunBotAI
+
+    ai = AzureGunBotAI()
+    ai.client = ai.client.with_options(max_retries=0)
+    categories = {"Resurgence": ["Long Range", "Sniper"], "Verdansk": ["Close Range"]}
+
+    async def ask(text, cats=categories):
+        return await ai.compose_query([{"role": "user", "content": text}], cats)
+
+    async def scenario():
+        first = await ask("best sniper")
+        assert stub.calls == 1 and first == "Which mode for best sniper?"
+
+        # Same question modulo case/whitespace/punctuation: served from cache
+        assert await ask("  Best   SNIPER? ") == first
+        assert stub.calls == 1
+        assert ai.cache.stats()["saved_seconds"] >= stub.latency
+
+        # Errors are returned but not cached
+        stub.fail = True
+        error = await ask("show me c9")
+        assert error.startswith("Sorry") and stub.calls == 2
+        stub.fail = False
+        assert await ask("show me c9") == "Which mode for show me c9?"
+        assert stub.calls == 3
+
+        # Categories changed: cache invalidated
+        await ask("best sniper", {**categories, "Multiplayer": ["SMG"]})
+        assert stub.calls == 4
+        assert ai.cache.invalidations == 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        stub.server.shutdown()
+
+    stats = ai.cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    print(f"✅ compose_query cache: {stats['hits']} hit, {stats['misses']} misses, "
+          f"{stats['saved_seconds'] * 1000:.0f}ms saved")
+
+if __name__ == "__main__":
+    test_compose_query_cache()
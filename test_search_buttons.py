@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test /search result buttons: each custom_id matches GunButton's template,
+rebuilds the same button through from_custom_id and resolves to the loadout
+it was made for; repeated loadouts leave a gap in the numbering instead of
+shifting the labels.
+"""
+import re
+import asyncio
+from gun_index import GunIndex, clean_gun_name
+from discord_search_bot import GunButton, result_buttons
+
+def loadout(gun, mode, range_type, rank):
+    return {"gun": gun, "mode": mode, "range": range_type, "rank": rank, "class": []}
+
+DATABASE = {"categories": {
+    "Verdansk_Long Range": [loadout("AK-74\nNEW", "Verdansk", "Long Range", 1),
+                            loadout("SWAT 5.56", "Verdansk", "Long Range", 2)],
+    "Multiplayer_Marksman Rifle": [loadout("SWAT 5.56", "Multiplayer", "Marksman Rifle", 1)],
+}}
+
+def test_button_round_trip():
+    index = GunIndex(DATABASE)
+    ak, swat = DATABASE["categories"]["Verdansk_Long Range"]
+    swat_mp = DATABASE["categories"]["Multiplayer_Marksman Rifle"][0]
+    results = [ak, swat, ak, swat_mp, swat]  # results 3 and 5 repeat 1 and 2
+
+    buttons = result_buttons(results)
+    assert [button.item.label for button in buttons] == ["1", "2", "4"]
+
+    for button in buttons:
+        match = re.fullmatch(GunButton.__discord_ui_compiled_template__, button.custom_id)
+        assert match, f"{button.custom_id} doesn't match the GunButton template"
+        rebuilt = asyncio.run(GunButton.from_custom_id(None, button.item, match))
+        assert (rebuilt.category_key, rebuilt.wid, rebuilt.item.label) == \
+               (button.category_key, button.wid, button.item.label)
+        # The label's number in the result list is the loadout the click opens
+        expected = results[int(button.item.label) - 1]
+        assert index.loadout(rebuilt.category_key, rebuilt.wid) is expected
+
+    assert buttons[0].custom_id == "gun:Verdansk_Long Range:ak-74"
+    assert clean_gun_name(index.loadout("Multiplayer_Marksman Rifle", "swat-5-56")["gun"]) == "SWAT 5.56"
+    assert index.loadout("Verdansk_Sniper", "ak-74") is None  # stale button: dropped from the meta
+    print(f"✅ {len(buttons)} buttons round-trip through custom_id: {[b.custom_id for b in buttons]}")
+
+if __name__ == "__main__":
+    test_button_round_trip()
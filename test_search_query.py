@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test the structured /search grammar: filters and bare category words parse,
+weapon-name words stay text, and the posting-list plan returns exactly what
+a brute-force scan over the database would.
+"""
+from generate_database import generate_database
+from gun_index import GunIndex, parse_attachment, weapon_id
+from search_query import FilterIndex
+
+def brute_force(engine, mode=None, range_type=None, weapon_class=None, slot=None, max_rank=None, limit=10):
+    classes = {}
+    for gun in engine.index.entries:
+        if gun["mode"] == "Multiplayer":
+            classes.setdefault(gun["range"], set()).add(weapon_id(gun["gun"]))
+    matches = []
+    for position, gun in enumerate(engine.index.entries):
+        slots = {parsed[1] for parsed in map(parse_attachment, gun.get("class", [])) if parsed}
+        if ((mode is None or gun["mode"] == mode) and (range_type is None or gun["range"] == range_type)
+                and (weapon_class is None or weapon_id(gun["gun"]) in classes.get(weapon_class, ()))
+                and (slot is None or slot in slots) and (max_rank is None or gun["rank"] <= max_rank)):
+            matches.append((gun["rank"], position))
+    return [engine.index.entries[position] for _, position in sorted(matches)[:limit]]
+
+def test_structured_search():
+    engine = FilterIndex(GunIndex(generate_database(3000, seed=5)))
+
+    parsed = engine.parse("best close range smg")
+    assert {(f.field, f.labels) for f in parsed.filters} == {("range", ("Close Range",)), ("class", ("SMG",))}
+    assert parsed.text == ""
+    parsed = engine.parse('kar mode:verdansk range:"long range" rank<3')
+    assert parsed.text == "kar" and parsed.max_rank == 2
+    assert engine.parse("range:nowhere").errors == ("range:nowhere",)
+    assert not engine.parse("kar98k").structured
+
+    cases = [
+        ("close range smg", dict(range_type="Close Range", weapon_class="SMG")),
+        ("best ar verdansk", dict(mode="Verdansk", weapon_class="Assault Rifle")),
+        ("mode:resurgence slot:optic rank<=3", dict(mode="Resurgence", slot="Optic", max_rank=3)),
+        ("sniper multiplayer", dict(mode="Multiplayer", range_type="Sniper")),
+    ]
+    for query, expected in cases:
+        plan = engine.plan(engine.parse(query))
+        sizes = [len(step.postings) for step in plan.steps]
+        assert sizes == sorted(sizes), f"{query}: plan not smallest-first"
+        got = engine.execute(plan, 10)
+        want = brute_force(engine, **expected)
+        assert [id(gun) for gun in got] == [id(gun) for gun in want], f"{query}: {plan.explain()}"
+        print(f"✅ {query:<38} {plan.explain()} → {len(got)} results")
+
+    # Free text is scored only among the filtered candidates
+    results = engine.search("kar mode:verdansk", 10)
+    assert results and all(gun["mode"] == "Verdansk" and "kar" in gun["gun"].lower() for gun in results)
+    assert engine.search("mode:nowhere", 5) == []
+
+if __name__ == "__main__":
+    test_structured_search()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the AI session store: idle sessions expire, the least recently used
+session is evicted first, conversations are cut to the token budget while
+keeping the newest message, and sessions survive a save/load round trip
+(including the shutdown flush).
+"""
+import os
+import time
+import asyncio
+import tempfile
+from session_store import SessionStore, truncate_conversation, estimate_tokens, flush_sessions
+
+def test_ttl_and_lru():
+    store = SessionStore(max_sessions=3, ttl=0.1, name="test-ttl")
+    store.add_message("a", "user", "hi")
+    time.sleep(0.15)
+    assert "a" not in store
+    store.get("b")
+    assert len(store) == 1 and store.evictions["ttl"] == 1
+
+    store = SessionStore(max_sessions=3, ttl=60, name="test-lru")
+    for user_id in ("a", "b", "c"):
+        store.get(user_id)
+    store.get("a")  # a is now the most recently used
+    store.get("d")
+    assert "b" not in store and all(user_id in store for user_id in ("a", "c", "d"))
+    store.get("e")
+    assert "c" not in store and store.evictions["lru"] == 2
+
+def test_token_budget_keeps_newest():
+    conversation = [{"role": "user", "content": "x" * 400} for _ in range(5)]
+    conversation.append({"role": "user", "content": "newest " + "y" * 4000})
+    dropped = truncate_conversation(conversation, token_budget=300)
+    assert dropped == 5 and conversation[-1]["content"].startswith("newest")
+
+    store = SessionStore(token_budget=250, ttl=60, name="test-budget")
+    for turn in range(10):
+        store.add_message("a", "user", f"message {turn} " + "z" * 200)
+    conversation = store.get("a")["conversation"]
+    assert conversation[-1]["content"].startswith("message 9")
+    assert sum(estimate_tokens(message) for message in conversation) <= 250
+    assert store.truncated_messages == 10 - len(conversation)
+
+def test_save_load_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.json")
+        store = SessionStore(path=path, ttl=60, save_interval=3600, name="test-save")
+        store.add_message("a", "user", "kar98k for verdansk")
+        store.add_message("b", "user", "best smg")
+        store.add_message("a", "assistant", "SEARCH_READY: kar98k")
+
+        async def save():
+            await store.persist()            # first save goes through
+            store.add_message("b", "assistant", "which mode?")
+            await store.persist()            # inside save_interval: skipped
+            assert store._dirty
+            await flush_sessions()           # shutdown flush ignores the interval
+        asyncio.run(save())
+        assert not store._dirty
+        assert os.listdir(directory) == ["sessions.json"], "temp file left behind"
+
+        restored = SessionStore(path=path, ttl=60, name="test-load")
+        assert [m["content"] for m in restored.get("a")["conversation"]] == ["kar98k for verdansk", "SEARCH_READY: kar98k"]
+        assert restored.get("b")["conversation"][-1]["content"] == "which mode?"
+
+        # An older snapshot finishing after a newer one doesn't overwrite it
+        store.write({"old": {"last_seen": time.time(), "session": {"conversation": []}}}, generation=1)
+        assert "old" not in SessionStore(path=path, ttl=60, name="test-stale")
+
+if __name__ == "__main__":
+    test_ttl_and_lru()
+    test_token_budget_keeps_newest()
+    test_save_load_round_trip()
+    print("✅ Session store TTL, LRU, token budget and persistence behave")
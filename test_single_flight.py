@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test single-flight coalescing: identical concurrent calls run the factory
+once, a failure reaches every waiter, a cancelled waiter leaves the shared
+computation running, and a new database version starts its own flight.
+"""
+import os
+import asyncio
+import tempfile
+from single_flight import SingleFlight
+from gun_index import ALL_GUNS_STORE
+
+def test_single_flight():
+    async def scenario():
+        flight = SingleFlight()
+        runs = {"count": 0}
+
+        async def compute(value="result", seconds=0.05):
+            runs["count"] += 1
+            await asyncio.sleep(seconds)
+            return value
+
+        # N identical callers, one computation
+        results = await asyncio.gather(*[flight.run("search", ("kar98k", 5), compute, version=1) for _ in range(20)])
+        assert results == ["result"] * 20 and runs["count"] == 1
+        assert flight.executions["search"] == 1 and flight.saved["search"] == 19
+        assert flight.stats()["in_flight"] == 0
+
+        # An exception is shared by every waiter
+        async def fail():
+            runs["count"] += 1
+            await asyncio.sleep(0.02)
+            raise ValueError("database unavailable")
+        runs["count"] = 0
+        results = await asyncio.gather(*[flight.run("top", ("Verdansk",), fail, version=1) for _ in range(5)],
+                                       return_exceptions=True)
+        assert runs["count"] == 1 and all(isinstance(result, ValueError) for result in results)
+
+        # Cancelling one waiter doesn't cancel the computation for the others
+        runs["count"] = 0
+        first = asyncio.ensure_future(flight.run("search", ("ak",), lambda: compute("ak", 0.1), version=1))
+        second = asyncio.ensure_future(flight.run("search", ("ak",), lambda: compute("ak", 0.1), version=1))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        assert await second == "ak" and runs["count"] == 1
+        assert first.cancelled()
+
+        # A reloaded database (new version) doesn't join the older in-flight computation
+        runs["count"] = 0
+        old = asyncio.ensure_future(flight.run("search", ("m4",), lambda: compute("old", 0.1), version=1))
+        await asyncio.sleep(0.01)
+        new = await flight.run("search", ("m4",), lambda: compute("new", 0.01), version=2)
+        assert new == "new" and await old == "old" and runs["count"] == 2
+
+        # By default the key is the database file itself: rewriting it starts a new flight
+        runs["count"] = 0
+        with open(ALL_GUNS_STORE, "w") as f:
+            f.write('{"categories": {}}')
+        old = asyncio.ensure_future(flight.run("top", ("Verdansk",), lambda: compute("old", 0.1)))
+        await asyncio.sleep(0.01)
+        with open(ALL_GUNS_STORE, "w") as f:
+            f.write('{"categories": {"Verdansk_Sniper": []}}')
+        new = await flight.run("top", ("Verdansk",), lambda: compute("new", 0.01))
+        assert new == "new" and await old == "old" and runs["count"] == 2
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # database_key() reads ALL_GUNS_STORE relative to the working directory
+        try:
+            asyncio.run(scenario())
+        finally:
+            os.chdir(cwd)
+    print("✅ Single-flight shares results and errors, survives cancels, and keys on database version")
+
+if __name__ == "__main__":
+    test_single_flight()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Startup budget test for start.py.
+Runs the service with a slow fake database download and a fake Discord
+client that takes a while to log in, then checks that the two overlapped
+and that time-to-ready stayed within STARTUP_BUDGET_SECONDS.
+"""
+import math
+import socket
+import asyncio
+import pytest
+
+DOWNLOAD_SECONDS = 0.6
+LOGIN_SECONDS = 0.6
+
+class FakeBot:
+    """Just enough of discord.Client for run_service()"""
+    def __init__(self, login_seconds: float):
+        self.login_seconds = login_seconds
+        self.listeners = {}
+        self._ready = False
+        self._closed = asyncio.Event()
+
+    def add_listener(self, fn, name=None):
+        self.listeners.setdefault(name or fn.__name__, []).append(fn)
+
+    def is_ready(self) -> bool:
+        return self._ready
+
+    def is_closed(self) -> bool:
+        return self._closed.is_set()
+
+    @property
+    def latency(self) -> float:
+        return 0.05 if self._ready else math.inf
+
+    async def start(self, token: str):
+        await asyncio.sleep(self.login_seconds)
+        self._ready = True
+        for listener in self.listeners.get("on_ready", []):
+            await listener()
+        await self._closed.wait()
+
+    async def close(self):
+        self._closed.set()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def run_until_ready(start, bot: FakeBot) -> int:
+    stop = asyncio.Event()
+    service = asyncio.create_task(start.run_service("fake-token", bot=bot, stop=stop))
+    for _ in range(int(start.STARTUP_BUDGET_SECONDS / 0.05)):
+        if "ready" in start.timeline.marks or service.done():
+            break
+        await asyncio.sleep(0.05)
+    stop.set()  # same path as SIGTERM, without signalling the test process
+    return await service
+
+def test_startup_within_budget(monkeypatch):
+    monkeypatch.setenv("PORT", str(free_port()))
+    import start
+    from startup_timeline import StartupTimeline
+
+    def slow_download():
+        import time
+        time.sleep(DOWNLOAD_SECONDS)
+        return True
+
+    monkeypatch.setattr(start, "timeline", StartupTimeline())
+    monkeypatch.setattr(start, "download_latest_database", slow_download)
+
+    bot = FakeBot(LOGIN_SECONDS)
+    exit_code = asyncio.run(run_until_ready(start, bot))
+    snapshot = start.timeline.snapshot()
+
+    assert exit_code == 0
+    assert snapshot["time_to_ready_seconds"] is not None, "service never became ready"
+    assert snapshot["time_to_ready_seconds"] < start.STARTUP_BUDGET_SECONDS
+    # on_ready waits for index_database's build instead of running its own
+    assert bot.index_ready.done() and bot.index_ready.result().entries
+    assert start.timeline.overlapped("download", "login"), "download and login ran one after the other"
+    # Sequential startup would take at least download + login
+    assert snapshot["time_to_ready_seconds"] < DOWNLOAD_SECONDS + LOGIN_SECONDS + start.timeline.duration("index")
+    print(f"✅ Ready in {snapshot['time_to_ready_seconds']:.2f}s (budget {start.STARTUP_BUDGET_SECONDS:.0f}s)")
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_startup_within_budget(monkeypatch)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test the hashed n-gram vector index: reordered and split weapon names find
+the weapon, nonsense finds nothing, and search_guns falls back to it only
+when lexical matching comes up empty.
+"""
+import time
+from generate_database import generate_database
+from gun_index import GunIndex, clean_gun_name
+from vector_search import VectorIndex, vector_index_for, vector_stats
+from discord_search_bot import search_guns
+
+def test_vector_search():
+    database = generate_database(2000, seed=3)
+    engine = VectorIndex(GunIndex(database))
+    multi_word = sorted({clean_gun_name(gun["gun"]) for gun in engine.index.entries if " " in clean_gun_name(gun["gun"])})
+    assert multi_word, "synthetic database has no multi-word names"
+
+    found = 0
+    for name in multi_word:
+        reordered = " ".join(reversed(name.split()))
+        top = engine.search(reordered, 1)
+        found += bool(top) and clean_gun_name(top[0][1]["gun"]) == name
+    assert found / len(multi_word) >= 0.9, f"only {found}/{len(multi_word)} reordered names found"
+
+    assert engine.search("qqqq zzzz", 5) == []
+    assert engine.search("", 5) == []
+
+    # search_guns: lexical hits don't touch the vector index, misses reuse it (built once per database)
+    name = multi_word[0]
+    built = vector_index_for(database)
+    before = dict(vector_stats)
+    assert clean_gun_name(search_guns(name.lower(), 3, database=database, ranking="classic")[0]["gun"]) == name
+    assert vector_stats == before, "a lexical hit consulted the vector index"
+    reordered = " ".join(reversed(name.split()))
+    started = time.perf_counter()
+    results = search_guns(reordered, 3, database=database, ranking="classic")
+    assert results and clean_gun_name(results[0]["gun"]) == name
+    assert vector_stats["misses"] == before["misses"] and vector_stats["hits"] == before["hits"] + 1
+    assert vector_index_for(database) is built
+    print(f"✅ Vector index: {found}/{len(multi_word)} reordered names found, "
+          f"fallback search in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    test_vector_search()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Hashed character n-gram vector index - the last search tier.
+Weapon names, category labels and attachment names are turned into
+feature-hashed vectors of character trigrams plus whole tokens, L2-normalized
+once per database version and stored column-sorted (an inverted index over
+hashed features). A query is hashed the same way and scored against every
+distinct text by reading only the postings of its own features; the per-text
+scores are gathered into per-loadout scores (name, plus weighted category
+and best attachment) and cut with argpartition. This catches reordered
+words, split or joined tokens and typos that substring and SequenceMatcher
+matching miss, without downloading an embedding model.
+"""
+import re
+import sys
+import time
+import zlib
+import numpy as np
+from functools import lru_cache
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from gun_index import GunIndex, DerivedIndexCache, clean_gun_name
+from bot_metrics import percentile
+
+FEATURES = 1 << 18   # hashed feature space; collisions are rare at this size
+NGRAM = 3
+FIELD_WEIGHTS = {"name": 1.0, "category": 0.5, "attachment": 0.6}
+MIN_SCORE = 0.3      # below this a match is noise
+
+def text_features(text: str) -> Counter:
+    """Character trigrams of the text with and without spaces, plus its words and letter/digit runs
+
+    'kar 98', '98 kar' and 'kar98k' share most of their features.
+    """
+    text = text.lower()
+    tokens = re.findall(r"[a-z0-9]+", text)
+    if not tokens:
+        return Counter()
+    features = Counter()
+    for joined in (f" {' '.join(tokens)} ", f" {''.join(tokens)} "):
+        features.update(joined[i:i + NGRAM] for i in range(len(joined) - NGRAM + 1))
+    features.update(f"w:{token}" for token in tokens)
+    features.update(f"w:{run}" for run in re.findall(r"[a-z]+|[0-9]+", text) if run not in tokens)
+    return features
+
+@lru_cache(maxsize=1 << 16)
+def feature_column(feature: str) -> Tuple[int, float]:
+    """(column, sign) of a feature; crc32 so columns are stable across processes"""
+    code = zlib.crc32(feature.encode("utf-8"))
+    return code % FEATURES, 1.0 if (code // FEATURES) & 1 else -1.0
+
+def hash_features(features: Counter) -> Tuple[np.ndarray, np.ndarray]:
+    """(columns, values) of the L2-normalized, signed feature-hashed vector"""
+    values = {}
+    for feature, count in features.items():
+        column, sign = feature_column(feature)
+        values[column] = values.get(column, 0.0) + sign * count
+    columns = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+    data = np.fromiter(values.values(), dtype=np.float32, count=len(values))
+    norm = np.linalg.norm(data)
+    if norm > 0:
+        data /= norm
+    return columns, data
+
+class VectorIndex:
+    def __init__(self, index: GunIndex):
+        start = time.perf_counter()
+        self.index = index
+        self.version = index.version
+
+        # One sparse row per distinct text; loadouts point at their rows
+        rows: Dict[Tuple[str, str], int] = {}
+        def row(field: str, text: str) -> int:
+            return rows.setdefault((field, text), len(rows))
+
+        n = len(index.entries)
+        self.name_rows = np.zeros(n, dtype=np.int64)
+        self.category_rows = np.zeros(n, dtype=np.int64)
+        for position, gun in enumerate(index.entries):
+            self.name_rows[position] = row("name", clean_gun_name(gun["gun"]))
+            self.category_rows[position] = row("category", f"{gun['mode']} {gun['range']}")
+        attachment_lists: List[List[int]] = [[] for _ in range(n)]
+        for (name, slot), positions in index.attachments.items():  # already parsed by GunIndex
+            attachment_row = row("attachment", f"{name} {slot}")
+            for position in positions:
+                attachment_lists[position].append(attachment_row)
+
+        # Padded (n, max attachments) row table; padding points at a zero-score sentinel row
+        self.sentinel = len(rows)
+        width = max((len(ids) for ids in attachment_lists), default=0)
+        self.attachment_rows = np.full((n, max(width, 1)), self.sentinel, dtype=np.int64)
+        for position, ids in enumerate(attachment_lists):
+            self.attachment_rows[position, :len(ids)] = ids
+
+        # Sparse matrix of every distinct text (rows) over hashed features (columns), stored
+        # sorted by column so a query reads only the postings of its own features
+        columns, data, row_ids = [], [], []
+        for row_id, (field, text) in enumerate(rows):
+            row_columns, row_data = hash_features(text_features(text))
+            columns.append(row_columns)
+            data.append(row_data)
+            row_ids.append(np.full(len(row_columns), row_id, dtype=np.int64))
+        columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        order = np.argsort(columns, kind="stable")
+        self.columns = columns[order]
+        self.data = (np.concatenate(data) if data else np.zeros(0, dtype=np.float32))[order]
+        self.row_ids = (np.concatenate(row_ids) if row_ids else np.zeros(0, dtype=np.int64))[order]
+        self.rows = len(rows)
+        self.build_time_ms = (time.perf_counter() - start) * 1000
+
+    def _row_scores(self, query_columns: np.ndarray, query_data: np.ndarray) -> np.ndarray:
+        """Cosine of the query with every distinct text (plus a trailing 0 for the sentinel)"""
+        starts = np.searchsorted(self.columns, query_columns, side="left")
+        lengths = np.searchsorted(self.columns, query_columns, side="right") - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(self.rows + 1, dtype=np.float32)
+        # Positions of every posting of every query feature, without a Python loop
+        offsets = np.cumsum(lengths) - lengths
+        postings = np.arange(total) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+        weights = self.data[postings] * np.repeat(query_data, lengths)
+        return np.bincount(self.row_ids[postings], weights, minlength=self.rows + 1).astype(np.float32)
+
+    def search(self, query: str, limit: int = 10, min_score: float = MIN_SCORE) -> List[Tuple[float, Dict]]:
+        """[(score, loadout)] best first; a score is the name cosine plus weighted category and attachment cosines"""
+        features = text_features(query)
+        n = len(self.index.entries)
+        if not features or n == 0 or limit <= 0:
+            return []
+        row_scores = self._row_scores(*hash_features(features))
+
+        weights = FIELD_WEIGHTS
+        scores = weights["name"] * row_scores[self.name_rows]
+        scores += weights["category"] * row_scores[self.category_rows]
+        scores += weights["attachment"] * row_scores[self.attachment_rows].max(axis=1)
+
+        k = min(limit, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]  # best first, ties in database order
+        return [(float(scores[position]), self.index.entries[position]) for position in top
+                if scores[position] >= min_score]
+
+_vector_cache = DerivedIndexCache("vector_index", VectorIndex)
+vector_stats = _vector_cache.stats  # read by bot_metrics
+current_vector_index = _vector_cache.current
+load_vector_index = _vector_cache.load
+vector_index_for = _vector_cache.for_database
+
+def main(argv=None):
+    from generate_database import generate_database
+    print("🧭 Vector Index Timing")
+    print("=" * 50)
+    queries = ["horus fjx", "98 kar", "kilo one forty one", "volzhskiy", "krg 51"]
+    for size in (1000, 10000, 100000):
+        engine = VectorIndex(GunIndex(generate_database(size, seed=0)))
+        samples = []
+        for _ in range(20):
+            for query in queries:
+                started = time.perf_counter()
+                engine.search(query, 5)
+                samples.append(time.perf_counter() - started)
+        print(f"📊 {size:>6} loadouts, {engine.rows} distinct texts, {len(engine.data)} non-zeros: "
+              f"build {engine.build_time_ms:.0f}ms, query p50 {percentile(samples, 50) * 1000:.2f}ms, "
+              f"p99 {percentile(samples, 99) * 1000:.2f}ms")
+
+    engine = load_vector_index()
+    print()
+    for query in queries:
+        matches = engine.search(query, 3)
+        names = ", ".join(f"{clean_gun_name(gun['gun'])} {gun['mode']} {gun['range']} ({score:.2f})"
+                          for score, gun in matches)
+        print(f"🔍 {query}: {names or 'no match'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())